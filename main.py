@@ -5,6 +5,7 @@ from src.utils.ui_renderer import (
     render_fundamental_report, 
     render_social_report, 
     render_final_report,
+    render_missing_input,
     build_candlestick_chart,
 )
 # Import Schemas to convert Dicts back to Objects
@@ -12,12 +13,32 @@ from src.schema.technical import TechnicalConsensus
 from src.schema.fundamental import FundamentalAnalysisOutput
 from src.schema.social_news import NewsSocialFusionOutput
 from src.utils.helper import ensure_object
+from src.workflow.speculative import is_missing_input
+from src.core.usage_recorder import usage_recorder
+from src.core.mongo_manger import init_mongo, close_mongo
+from src.core.config import settings
+from src.services.scheduler import prewarm_scheduler
+from src.workflow.nodes.data_preparation import load_symbol_data, run_data
 
 from langgraph.types import Command
 from langchain_core.messages import AIMessage, HumanMessage
 import uuid
 import asyncio 
 
+@cl.on_app_startup
+async def startup():
+    """Opens the shared MongoDB client once for the whole process."""
+    await init_mongo()
+    if settings.prewarm_enabled:
+        prewarm_scheduler.start(load_symbol_data)
+
+@cl.on_app_shutdown
+async def shutdown():
+    """Flushes buffered telemetry before the process exits."""
+    await prewarm_scheduler.stop()
+    await usage_recorder.stop()
+    close_mongo()
+
 @cl.on_chat_start
 async def start():
     """Initializes the session."""
@@ -67,7 +88,7 @@ async def run_graph(inputs):
     
     # Placeholder to store the final report data
     final_report_payload = None
-    price_history_payload = None
+    data_ref = None
     chart_symbol = None
     chart_short_name = None
 
@@ -94,7 +115,7 @@ async def run_graph(inputs):
                     await cl.Message(content="🔄 آغاز بررسی جامع نماد بورسی ...").send()
                     research_step = cl.Step(name="کاوش عمیق نماد بورسی (0%)", type="process" , parent_id=cl.context.current_step.id)
                     await research_step.send()
-                price_history_payload = node_output.get("price_history", [])
+                data_ref = node_output.get("data_ref")
                 chart_symbol = node_output.get("symbol")
                 chart_short_name = node_output.get("short_name")
 
@@ -128,8 +149,11 @@ async def run_graph(inputs):
                 if raw_data and not reports_shown["technical"] and research_step:
                     reports_shown["technical"] = True
                     async with cl.Step(name="تحلیل تکنیکال", type="run", parent_id=research_step.id) as step:
-                        report_obj = ensure_object(raw_data, TechnicalConsensus)
-                        step.output = render_technical_report(report_obj) if report_obj else "Error parsing data"
+                        if is_missing_input(raw_data):
+                            step.output = render_missing_input(raw_data)
+                        else:
+                            report_obj = ensure_object(raw_data, TechnicalConsensus)
+                            step.output = render_technical_report(report_obj) if report_obj else "Error parsing data"
 
             # Fundamental Report
             if node_name == "fundamental_consensus" or (node_name == "fundamental_graph" and not reports_shown["fundamental"]):
@@ -140,8 +164,11 @@ async def run_graph(inputs):
                 if raw_data and not reports_shown["fundamental"] and research_step:
                     reports_shown["fundamental"] = True
                     async with cl.Step(name="تحلیل بنیادی", type="run", parent_id=research_step.id) as step:
-                        report_obj = ensure_object(raw_data, FundamentalAnalysisOutput)
-                        step.output = render_fundamental_report(report_obj) if report_obj else "Error parsing data"
+                        if is_missing_input(raw_data):
+                            step.output = render_missing_input(raw_data)
+                        else:
+                            report_obj = ensure_object(raw_data, FundamentalAnalysisOutput)
+                            step.output = render_fundamental_report(report_obj) if report_obj else "Error parsing data"
 
             # Social Report
             if node_name == "social_news_consensus" or (node_name == "social_news_graph" and not reports_shown["social"]):
@@ -152,8 +179,11 @@ async def run_graph(inputs):
                 if raw_data and not reports_shown["social"] and research_step:
                     reports_shown["social"] = True
                     async with cl.Step(name="تحلیل اخبار و شبکه اجتماعی", type="run", parent_id=research_step.id) as step:
-                        report_obj = ensure_object(raw_data, NewsSocialFusionOutput)
-                        step.output = render_social_report(report_obj) if report_obj else "Error parsing data"
+                        if is_missing_input(raw_data):
+                            step.output = render_missing_input(raw_data)
+                        else:
+                            report_obj = ensure_object(raw_data, NewsSocialFusionOutput)
+                            step.output = render_social_report(report_obj) if report_obj else "Error parsing data"
 
             # --- 5. Capture Final Report & Close Step ---
             if node_name == "reporter_agent":
@@ -180,8 +210,9 @@ async def run_graph(inputs):
     await asyncio.sleep(0.5)
     if final_report_payload:
         await cl.Message(content=render_final_report(final_report_payload) , parent_id=None).send()
+        price_history = await run_data.get(data_ref, "price_history") if data_ref else []
         candlestick_figure = build_candlestick_chart(
-            price_history_payload or [],
+            price_history or [],
             chart_symbol or "",
             chart_short_name,
         )
@@ -2,7 +2,7 @@ from urllib.parse import quote_plus
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import SecretStr
-from typing import Optional , Dict
+from typing import Any, Optional , Dict, List
 
 
 
@@ -24,6 +24,75 @@ class Settings(BaseSettings):
     mongo_collection_name: str = 'market_analysis'
     mongo_llm_usage_collection_name: str = 'llm_usage'
     mongo_agent_run_collection_name: str = 'agent_runs'
+    mongo_codal_collection_name: str = 'codal_documents'
+    mongo_tweet_collection_name: str = 'sahamyab_tweets'
+    mongo_crawl_cursor_collection_name: str = 'crawl_cursors'
+    mongo_tavily_collection_name: str = 'tavily_results'
+    mongo_bars_collection_name: str = 'price_bars'
+    mongo_news_collection_name: str = 'symbol_news'
+    mongo_posts_collection_name: str = 'symbol_posts'
+    mongo_snapshot_collection_name: str = 'symbol_snapshots'
+    mongo_daily_bars_collection_name: str = 'daily_bars'  # time-series
+    mongo_trade_detail_collection_name: str = 'trade_details'  # time-series
+    market_store_enabled: bool = True
+    data_lake_path: str = "data/lake"  # local Parquet copy for research (python -m src.services.data_lake)
+    mongo_max_pool_size: int = 50
+    mongo_min_pool_size: int = 0
+    mongo_server_selection_timeout_ms: int = 5000
+    mongo_compressors: Optional[str] = None  # e.g. "zstd,snappy,zlib"
+    mongo_ensure_indexes: bool = True
+
+    #in-process symbol document cache
+    symbol_cache_ttl_seconds: float = 300.0
+    symbol_cache_max_size: int = 64
+
+    #langgraph checkpointer ("memory" keeps threads in process, "mongo" persists them)
+    checkpoint_backend: str = "memory"
+    checkpoint_max_threads: int = 256
+    checkpoint_ttl_seconds: float = 6 * 3600
+    checkpoint_intern_min_bytes: int = 4096  # serialized values at least this large are stored once per content
+    mongo_checkpoint_collection_name: str = 'graph_checkpoints'
+    mongo_checkpoint_writes_collection_name: str = 'graph_checkpoint_writes'
+    mongo_checkpoint_blobs_collection_name: str = 'graph_checkpoint_blobs'
+    run_data_cache_max_size: int = 64  # run inputs referenced from state by data_ref
+    run_data_cache_ttl_seconds: float = 3600.0
+
+    #market calendar (weekday numbers: Monday=0 ... Saturday=5, Sunday=6)
+    market_timezone: str = "Asia/Tehran"
+    market_trading_weekdays: List[int] = [5, 6, 0, 1, 2]
+    market_open_time: str = "09:00"
+    market_close_time: str = "12:30"
+    market_holidays: List[str] = []  # ISO Gregorian dates, e.g. ["2026-03-21"]
+
+    #freshness policy per document section
+    freshness_section_policies: Dict[str, Dict[str, Any]] = {
+        "market_data": {"policy": "session", "ttl_seconds": 900},
+        "technical_analysis": {"policy": "session", "ttl_seconds": 900},
+        "fundamental_analysis": {"policy": "quarterly", "ttl_seconds": 30 * 24 * 3600},
+        "social_post": {"policy": "ttl", "ttl_seconds": 3600},
+        "news_announcements": {"policy": "ttl", "ttl_seconds": 3600},
+        "search": {"policy": "ttl", "ttl_seconds": 6 * 3600},
+    }
+
+    #pre-warm scheduler for popular symbols
+    prewarm_enabled: bool = False
+    prewarm_top_n: int = 20
+    prewarm_concurrency: int = 3
+    prewarm_interval_seconds: float = 900.0
+    prewarm_lead_minutes: int = 30  # start this long before the session opens
+    prewarm_jitter_seconds: float = 30.0
+    prewarm_lookback_days: int = 14
+
+    #pipeline single-flight (cross-worker lease is opt-in)
+    pipeline_lease_enabled: bool = False
+    pipeline_lease_ttl_seconds: float = 300.0
+    pipeline_lease_poll_seconds: float = 2.0
+    mongo_lease_collection_name: str = 'pipeline_leases'
+
+    #llm usage recorder
+    usage_queue_max_size: int = 10_000
+    usage_batch_size: int = 100
+    usage_flush_interval_seconds: float = 2.0
 
     #log info
     log_level:str = "INFO"
@@ -41,6 +110,34 @@ class Settings(BaseSettings):
     proxy_url:str
     tavily_base_url:str = "https://api.tavily.com/"
     tavily_api_key:SecretStr
+    tavily_timeout_seconds: int = 60
+    tavily_lean_mode: bool = True  # skip raw page text; only the answer, headlines and snippets are used
+    tavily_cache_ttl_seconds: float = 21600
+    tavily_memory_cache_size: int = 128
+    codal_request_timeout_seconds: float = 20.0
+    codal_max_concurrency: int = 5
+    codal_parse_workers: int = 4
+    codal_prefetch_enabled: bool = True
+    codal_prefetch_limit: int = 20
+    codal_memory_cache_size: int = 512
+    sahamyab_crawl_lookback_days: int = 7
+    sahamyab_crawl_max_pages: int = 30
+    sahamyab_crawl_concurrency: int = 3
+    sahamyab_tweets_limit: int = 200  # recent posts copied into the analysis document
+    twitter_max_queries: int = 4  # query variants per symbol (ticker, hashtag, company names)
+    twitter_max_pages_per_query: int = 3
+    twitter_query_timeout_seconds: float = 45.0
+    twitter_cache_ttl_seconds: int = 1800
+    twitter_cache_max_size: int = 256
+    social_sample_size: int = 10  # representative posts sent to each social LLM node
+    social_simhash_max_distance: int = 3
+    news_cluster_threshold: float = 0.5  # shingle Jaccard for two items to be the same event
+    news_cluster_window_hours: float = 72
+    news_events_limit: int = 10  # distinct events sent to the news agent
+    codal_ranker_enabled: bool = True
+    codal_rank_min_score: float = 6.0
+    codal_rank_max_selected: int = 5
+    codal_rank_max_per_type: int = 2
 
     #model config
     model_name:str = 'qwen/qwen3-235b-a22b'
@@ -51,6 +148,39 @@ class Settings(BaseSettings):
     max_tokens:Optional[int] = 16255
     top_p:float = 0.0
 
+    #model routing
+    llm_routing_enabled: bool = False
+    llm_tier_profiles: Dict[str, Dict[str, Any]] = {
+        # "model": None means `model_name`; a fallback only fires when it resolves to a different model
+        "fast": {"model": "qwen/qwen3-32b", "reasoning_effort": "low", "max_tokens": 4096, "fallback_tier": "heavy"},
+        "heavy": {"model": None, "reasoning_effort": None, "max_tokens": None, "fallback_tier": "heavy_fallback"},
+        "heavy_fallback": {"model": "qwen/qwen3-32b", "reasoning_effort": None, "max_tokens": None, "fallback_tier": None},
+    }
+    llm_node_tiers: Dict[str, str] = {
+        "codal_agent": "fast",  # report selection; the long-form analysis is `codal_analysis`
+        "codal_analysis": "heavy",
+        "trend_agent": "fast",
+        "oscillator_agent": "fast",
+        "volatility_agent": "fast",
+        "volume_agent": "fast",
+        "sr_agent": "fast",
+        "sahamyab_agent": "fast",
+        "technical_consensus": "heavy",
+        "fundamental_consensus": "heavy",
+        "social_news_consensus": "heavy",
+        "reporter_agent": "heavy",
+    }
+    llm_slow_latency_seconds: float = 45.0
+    llm_max_error_rate: float = 0.5
+
+    #speculative consensus
+    speculative_consensus_enabled: bool = False
+    speculative_straggler_timeouts: Dict[str, float] = {"codal_agent": 60.0, "fundamental_graph": 150.0}
+    speculative_late_input_grace_seconds: float = 5.0
+
+    #rule-based technical sub-agents (node names, e.g. ["trend_agent", "sr_agent"]; the consensus stays on the LLM)
+    technical_rule_nodes: List[str] = []
+
     @property
     def mongo_uri(self):
         if self.mongo_username is None or self.mongo_password is None or self.mongo_password.get_secret_value() is None:
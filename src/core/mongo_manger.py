@@ -1,19 +1,146 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import  OperationFailure , DuplicateKeyError
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReplaceOne, ReturnDocument
+from pymongo.errors import  OperationFailure , DuplicateKeyError, BulkWriteError
 from src.core.config import settings
 from src.core.logger import logger
 
+
+class MongoClientRegistry:
+    """
+    Process-wide registry of Motor clients keyed by URI.
+    A client owns a connection pool and topology monitor, so it is created once
+    and shared by every MongoManager; it is closed only on app shutdown.
+    """
+    _clients: dict[str, AsyncIOMotorClient] = {}
+
+    @classmethod
+    def get_client(cls, uri: str | None = None) -> AsyncIOMotorClient:
+        uri = uri or settings.mongo_uri
+        client = cls._clients.get(uri)
+        if client is None:
+            options = {
+                "maxPoolSize": settings.mongo_max_pool_size,
+                "minPoolSize": settings.mongo_min_pool_size,
+                "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+            }
+            if settings.mongo_compressors:
+                options["compressors"] = settings.mongo_compressors
+            client = AsyncIOMotorClient(uri, **options)
+            cls._clients[uri] = client
+            logger.info("✅ MongoDB Client Initialized")
+        return client
+
+    @classmethod
+    def close_all(cls) -> None:
+        for client in cls._clients.values():
+            client.close()
+        cls._clients.clear()
+        logger.info("🔒 MongoDB Connections Closed")
+
+
+def _index_specs() -> dict[str, list[IndexModel]]:
+    """Indexes backing the app's hot queries, keyed by collection name."""
+    specs = {
+        settings.mongo_collection_name: [
+            # latest document per symbol: find_one({"symbol"}, sort=analysis_datetime desc)
+            IndexModel([("symbol", ASCENDING), ("analysis_datetime", DESCENDING)], name="symbol_analysis_datetime"),
+        ],
+        settings.mongo_llm_usage_collection_name: [
+            IndexModel([("session_id", ASCENDING), ("created_at", DESCENDING)], name="session_created_at"),
+            IndexModel([("node_name", ASCENDING), ("created_at", DESCENDING)], name="node_created_at"),
+        ],
+        settings.mongo_agent_run_collection_name: [
+            IndexModel([("symbol", ASCENDING), ("updated_at", DESCENDING)], name="symbol_updated_at"),
+        ],
+        settings.mongo_tweet_collection_name: [
+            IndexModel([("symbol", ASCENDING), ("published_at", DESCENDING)], name="symbol_published_at"),
+        ],
+        settings.mongo_daily_bars_collection_name: [
+            IndexModel([("meta.asset_id", ASCENDING), ("ts", ASCENDING)], name="asset_ts"),
+        ],
+        settings.mongo_trade_detail_collection_name: [
+            IndexModel([("meta.asset_id", ASCENDING), ("ts", ASCENDING)], name="asset_ts"),
+        ],
+        settings.mongo_lease_collection_name: [
+            # Mongo removes leases abandoned by crashed workers once they expire.
+            IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        ],
+    }
+    if settings.checkpoint_backend == "mongo":
+        # Checkpoints of abandoned threads expire on their own.
+        ttl = IndexModel([("updated_at", ASCENDING)], name="updated_at_ttl", expireAfterSeconds=int(settings.checkpoint_ttl_seconds))
+        thread_ns_checkpoint = IndexModel(
+            [("thread_id", ASCENDING), ("checkpoint_ns", ASCENDING), ("checkpoint_id", DESCENDING)], name="thread_ns_checkpoint"
+        )
+        specs[settings.mongo_checkpoint_collection_name] = [thread_ns_checkpoint, ttl]
+        specs[settings.mongo_checkpoint_writes_collection_name] = [thread_ns_checkpoint, ttl]
+        specs[settings.mongo_checkpoint_blobs_collection_name] = [ttl]
+    return specs
+
+
+def _timeseries_specs() -> dict[str, dict]:
+    """Time-series collections (one measurement per asset and trading day), keyed by collection name."""
+    daily = {"timeField": "ts", "metaField": "meta", "granularity": "hours"}
+    return {
+        settings.mongo_daily_bars_collection_name: daily,
+        settings.mongo_trade_detail_collection_name: daily,
+    }
+
+
+async def ensure_timeseries_collections() -> None:
+    """Creates missing time-series collections; they cannot be created implicitly by the first insert."""
+    db = MongoClientRegistry.get_client()[settings.mongo_db_name]
+    existing = set(await db.list_collection_names())
+    for collection_name, timeseries in _timeseries_specs().items():
+        if collection_name in existing:
+            continue
+        try:
+            await db.create_collection(collection_name, timeseries=timeseries)
+            logger.info(f"🕰️ Created time-series collection '{collection_name}'.")
+        except OperationFailure as e:
+            logger.error(f"❌ Failed to create time-series collection '{collection_name}': {e}")
+
+
+async def ensure_indexes() -> None:
+    """Creates missing indexes; existing ones with the same name and keys are a no-op on the server."""
+    db = MongoClientRegistry.get_client()[settings.mongo_db_name]
+    for collection_name, indexes in _index_specs().items():
+        try:
+            created = await db[collection_name].create_indexes(indexes)
+            logger.debug(f"🗂️ Indexes ensured on '{collection_name}': {created}")
+        except OperationFailure as e:
+            logger.error(f"❌ Failed to ensure indexes on '{collection_name}': {e}")
+
+
+async def init_mongo() -> None:
+    """Creates the shared client, runs topology discovery and index management once at app startup."""
+    client = MongoClientRegistry.get_client()
+    try:
+        await client.admin.command("ping")
+        logger.info("🏓 MongoDB reachable.")
+    except Exception as e:
+        logger.error(f"❌ MongoDB ping failed at startup: {e}")
+        return
+
+    if settings.mongo_ensure_indexes:
+        await ensure_timeseries_collections()
+        await ensure_indexes()
+
+
+def close_mongo() -> None:
+    MongoClientRegistry.close_all()
+
+
 class MongoManager:
     """
-    A Singleton-like or Instance-based wrapper for MongoDB operations.
-    Handles connection, writing (insert), and reading (find).
+    Lightweight collection handle for MongoDB operations.
+    Handles writing (insert), and reading (find) over the shared client from MongoClientRegistry.
     """
     def __init__(self, collection_name: str | None = None):
         try:
-            self.client = AsyncIOMotorClient(settings.mongo_uri)
+            self.client = MongoClientRegistry.get_client()
             self.db = self.client[settings.mongo_db_name]
             self.collection = self.db[collection_name or settings.mongo_collection_name]
-            logger.info("✅ MongoDB Client Initialized")
         except Exception as e:
             logger.critical(f"❌ Failed to initialize MongoDB Client: {e}", exc_info=True)
             raise
@@ -40,6 +167,51 @@ class MongoManager:
             logger.error(f"❌ Unexpected error writing to MongoDB: {e}", exc_info=True)
             return None
 
+    async def write_many(self, documents: list[dict]) -> int:
+        """
+        Bulk insert (unordered, so one bad document does not stop the batch).
+        Returns the number of inserted documents.
+        """
+        if not documents:
+            return 0
+        try:
+            result = await self.collection.insert_many(documents, ordered=False)
+            logger.debug(f"💾 Bulk inserted {len(result.inserted_ids)} documents.")
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            logger.error(f"❌ Bulk insert partially failed ({inserted}/{len(documents)} written): {e}")
+            return inserted
+        except Exception as e:
+            logger.error(f"❌ Unexpected error during bulk insert: {e}", exc_info=True)
+            return 0
+
+    async def bulk_upsert(self, documents: list[dict], raise_errors: bool = False) -> int:
+        """
+        Upserts many documents by `_id` in one unordered bulk write.
+        Returns the number of newly inserted documents; with `raise_errors`, failures
+        are re-raised instead of being reported as a count.
+        """
+        if not documents:
+            return 0
+        try:
+            result = await self.collection.bulk_write(
+                [ReplaceOne({'_id': document['_id']}, document, upsert=True) for document in documents],
+                ordered=False,
+            )
+            logger.debug(f"💾 Bulk upsert: {result.upserted_count} inserted, {result.modified_count} updated.")
+            return result.upserted_count
+        except BulkWriteError as e:
+            logger.error(f"❌ Bulk upsert partially failed: {e.details.get('writeErrors', [])[:3]}")
+            if raise_errors:
+                raise
+            return e.details.get("nUpserted", 0)
+        except Exception as e:
+            logger.error(f"❌ Unexpected error during bulk upsert: {e}", exc_info=True)
+            if raise_errors:
+                raise
+            return 0
+
     async def upsert_data(self, document: dict) -> str:
         """
         Smart Save: 
@@ -72,17 +244,48 @@ class MongoManager:
             logger.error(f"❌ Error during upsert: {e}", exc_info=True)
             return None
 
-    async def read_data(self, query: dict, limit: int = 1, sort: list[tuple[str, int]] | None = None):
+    async def set_fields(
+        self, doc_id, fields: dict, projection: dict | None = None, unset: list[str] | None = None
+    ) -> dict | None:
+        """
+        Partial update: `$set`s only the given (optionally dotted) fields, and `$unset`s
+        `unset`, creating the document if needed; returns the updated document in the same round trip.
+        """
+        update = {'$set': fields}
+        if unset:
+            update['$unset'] = {field: "" for field in unset}
+        try:
+            document = await self.collection.find_one_and_update(
+                {'_id': doc_id},
+                update,
+                projection=projection,
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            logger.info(f"🔄 Updated {len(fields)} fields on document with ID: {doc_id}")
+            return document
+        except Exception as e:
+            logger.error(f"❌ Error during partial update: {e}", exc_info=True)
+            return None
+
+    async def read_data(
+        self,
+        query: dict,
+        limit: int = 1,
+        sort: list[tuple[str, int]] | None = None,
+        projection: dict | None = None,
+    ):
         """
         Reads data based on a query filter. 
         If limit is 1, returns a single dict. Otherwise returns a list.
+        `projection` limits the returned fields (e.g. {"analysis_datetime": 1}).
         """
         try:
             if limit == 1:
-                document = await self.collection.find_one(query, sort=sort)
+                document = await self.collection.find_one(query, projection, sort=sort)
                 return document
             else:
-                cursor = self.collection.find(query)
+                cursor = self.collection.find(query, projection)
                 if sort:
                     cursor = cursor.sort(sort)
                 cursor = cursor.limit(limit)
@@ -95,6 +298,15 @@ class MongoManager:
             logger.error(f"❌ Unexpected error reading from MongoDB: {e}", exc_info=True)
             return None
 
+    async def aggregate(self, pipeline: list[dict], limit: int | None = None) -> list[dict]:
+        """Runs an aggregation pipeline and returns up to `limit` result documents."""
+        try:
+            cursor = self.collection.aggregate(pipeline)
+            return await cursor.to_list(length=limit)
+        except Exception as e:
+            logger.error(f"❌ Aggregation failed: {e}", exc_info=True)
+            return []
+
     def close(self):
-        self.client.close()
-        logger.info("🔒 MongoDB Connection Closed")
+        """Handles share the registry client; connections are closed by close_mongo() on shutdown."""
+        pass
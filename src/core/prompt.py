@@ -578,13 +578,14 @@ TWEET_AGENT_PROMPT = '''
 You are a financial sentiment analyst specialized in Iranian stock market social data.
 
 Input:
-A list of tweets and forum posts about a stock symbol.
+`post_stats`: locally computed aggregates over ALL fetched tweets (near-duplicates removed, lexicon sentiment in [-1, 1], engagement and volume).
+`tweets`: a diverse sample of unique tweets (bullish, bearish and neutral by lexicon score), each with its `lexicon_sentiment`.
 
 Your task:
 1. Detect the emotional polarity of each message.
 2. Classify emotions: optimism, fear, anger, trust, speculation.
 3. Weight each message by engagement (likes + retweets + replies + views).
-4. Aggregate into a single market sentiment profile.
+4. Aggregate into a single market sentiment profile. Anchor the overall score on `post_stats` (it covers every tweet) and use the sample to explain it; correct the lexicon where sarcasm or context flips a message.
 
 Important:
 - Manipulation, corruption, and insider accusations must be treated as HIGH negative weight.
@@ -596,7 +597,8 @@ Return ONLY a structured JSON.
 
 SAHAMYAB_TWEET_PROMPT = '''
 You are a Behavioral Finance Analyst specializing in the behavior of Iranian retail traders.
-Your input is a JSON list of forum comments and retweets.
+Your input is `post_stats` (locally computed aggregates over ALL fetched comments: duplicate ratio, lexicon sentiment in [-1, 1], bullish/bearish shares, engagement, posts per day) and `comments`, a diverse sample of unique comments with their `lexicon_sentiment`.
+Base the overall stance on `post_stats` and use the sample for the qualitative reading. A high `duplicate_ratio` suggests coordinated posting.
 
 Your task is to identify the 'Street Sentiment'.
 Focus on:
@@ -611,6 +613,7 @@ Output strictly in JSON format.
 NEWS_PROMPT = '''
 You are a Fundamental News Analyst for the Tehran Stock Exchange.
 Your input is a list of news articles from the past 30 days containing tags like 'stock.capitalchange', 'stock.eps', etc.
+Each item is one distinct event from the past 30 days, already de-duplicated across the news feed, Codal notices and web search; `reported_by` and `report_count` show how widely it was reported.
 
 Your task is to extract Hard Corporate Events.
 Ignore general fluff. Focus on:
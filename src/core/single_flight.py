@@ -0,0 +1,90 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from pymongo.errors import DuplicateKeyError
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.mongo_manger import MongoManager
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent async calls that share a key: the first caller runs the
+    work, later callers await the same task. The entry is dropped once it finishes,
+    so the next call after completion starts fresh.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            logger.info(f"🤝 Joining in-flight {self.name} for '{key}'.")
+        # Shield so one caller disconnecting does not cancel the work the others wait on.
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+
+class MongoLease:
+    """
+    Cross-process lease stored as one document per key in a Mongo collection.
+    Acquiring is an upsert guarded by `expires_at`, so an expired lease can be taken over;
+    a TTL index on `expires_at` cleans up leases left behind by crashed workers.
+    """
+    def __init__(self, collection_name: str, ttl_seconds: float):
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def _collection(self):
+        return MongoManager(self.collection_name).collection
+
+    async def acquire(self, key: str) -> bool:
+        now = datetime.utcnow()
+        try:
+            await self._collection().update_one(
+                {"_id": key, "expires_at": {"$lte": now}},
+                {"$set": {"owner": self.owner, "acquired_at": now, "expires_at": now + timedelta(seconds=self.ttl_seconds)}},
+                upsert=True,
+            )
+            return True
+        except DuplicateKeyError:
+            # A live lease held by another worker made the upsert collide on _id.
+            return False
+
+    async def release(self, key: str) -> None:
+        try:
+            await self._collection().delete_one({"_id": key, "owner": self.owner})
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to release lease '{key}': {e}")
+
+    async def wait_released(self, key: str, poll_seconds: float) -> bool:
+        """Polls until the lease is gone or expired. Returns False if it is still held after one TTL."""
+        deadline = asyncio.get_running_loop().time() + self.ttl_seconds
+        while asyncio.get_running_loop().time() < deadline:
+            holder = await self._collection().find_one(
+                {"_id": key, "expires_at": {"$gt": datetime.utcnow()}}, {"owner": 1}
+            )
+            if holder is None:
+                return True
+            await asyncio.sleep(poll_seconds)
+        return False
+
+
+# One pipeline run per symbol at a time within this process.
+pipeline_flight = SingleFlight("pipeline run")
+
+# Optional extension of the same guarantee across workers sharing one Mongo.
+pipeline_lease = MongoLease(settings.mongo_lease_collection_name, settings.pipeline_lease_ttl_seconds)
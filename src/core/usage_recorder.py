@@ -0,0 +1,100 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.mongo_manger import MongoManager
+
+
+class UsageRecorder:
+    """
+    Background writer for LLM usage telemetry.
+    Documents are queued without awaiting Mongo and flushed by a single task
+    with `insert_many`, either when a batch fills up or every `flush_interval` seconds.
+    The queue is bounded: when it is full new documents are dropped (and counted)
+    so telemetry can never hold memory or block an agent.
+    """
+    def __init__(
+        self,
+        collection_name: str = settings.mongo_llm_usage_collection_name,
+        max_queue_size: int = settings.usage_queue_max_size,
+        batch_size: int = settings.usage_batch_size,
+        flush_interval: float = settings.usage_flush_interval_seconds,
+    ):
+        self.collection_name = collection_name
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._mongo: Optional[MongoManager] = None
+        self._in_flight: List[Dict[str, Any]] = []
+
+    def _ensure_started(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        if self._mongo is None:
+            self._mongo = MongoManager(self.collection_name)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info("📮 LLM usage recorder started.")
+
+    def record(self, document: Dict[str, Any]) -> None:
+        """Queues a document for the next flush. Never blocks."""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(document)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning(f"⚠️ LLM usage queue full; {self.dropped} documents dropped so far.")
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if batch:
+            await self._mongo.write_many(batch)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                self._in_flight = [await self._queue.get()]
+                deadline = loop.time() + self.flush_interval
+                while len(self._in_flight) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        self._in_flight.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._write(self._in_flight)
+                self._in_flight = []
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"❌ LLM usage recorder stopped unexpectedly: {e}", exc_info=True)
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        batch = []
+        while self._queue is not None and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def stop(self) -> None:
+        """Stops the background task and flushes everything still buffered."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+        pending = self._in_flight + self._drain()
+        self._in_flight = []
+        for start in range(0, len(pending), self.batch_size):
+            await self._write(pending[start:start + self.batch_size])
+        if pending:
+            logger.info(f"📮 Flushed {len(pending)} LLM usage documents on shutdown.")
+
+
+usage_recorder = UsageRecorder()
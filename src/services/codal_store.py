@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.mongo_manger import MongoManager
+from src.services.providers.codal import HTML_PARSER, CodalClient
+
+
+def codal_document_key(url: str) -> str:
+    """Stable key for a Codal filing: its LetterSerial when the URL carries one, else a URL hash."""
+    query = parse_qs(urlparse(url).query)
+    for name in ("LetterSerial", "letterSerial", "TracingNo", "tracingNo"):
+        if query.get(name):
+            return f"{name.lower()}:{query[name][0]}"
+    return "url:" + hashlib.sha256(url.strip().encode("utf-8")).hexdigest()
+
+
+class CodalDocumentStore:
+    """
+    Persistent store of extracted Codal report text.
+    Filings are immutable once published, so a URL is downloaded and parsed once;
+    later reads come from an in-process cache or the `codal_documents` collection.
+    """
+    def __init__(self, collection_name: str = settings.mongo_codal_collection_name):
+        self.collection_name = collection_name
+        self._memory = TTLCache(max_size=settings.codal_memory_cache_size, ttl_seconds=24 * 3600)
+        self._prefetching: Dict[str, asyncio.Task] = {}
+
+    async def get_many(self, urls: List[str]) -> Dict[str, str]:
+        """Stored text for the URLs that are already in the store."""
+        found: Dict[str, str] = {}
+        missing_keys: Dict[str, str] = {}
+        for url in urls:
+            key = codal_document_key(url)
+            text = self._memory.get(key)
+            if text is not None:
+                found[url] = text
+            else:
+                missing_keys[key] = url
+
+        if missing_keys:
+            documents = await MongoManager(self.collection_name).read_data(
+                {"_id": {"$in": list(missing_keys)}},
+                limit=len(missing_keys),
+                projection={"text": 1},
+            ) or []
+            if isinstance(documents, dict):
+                documents = [documents]
+            for document in documents:
+                url = missing_keys[document["_id"]]
+                found[url] = document.get("text", "")
+                self._memory.set(document["_id"], found[url])
+        return found
+
+    async def _put(self, url: str, text: str, batch_seconds: float) -> None:
+        key = codal_document_key(url)
+        self._memory.set(key, text)
+        await MongoManager(self.collection_name).upsert_data({
+            "_id": key,
+            "url": url,
+            "text": text,
+            "text_length": len(text),
+            "content_sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "parser": HTML_PARSER,
+            "batch_fetch_seconds": round(batch_seconds, 3),
+            "fetched_at": datetime.utcnow(),
+        })
+
+    async def fetch(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        """Report text for each URL (None if it could not be scraped), scraping only store misses."""
+        # Let a running prefetch for the same filings finish instead of downloading them twice.
+        prefetching = {self._prefetching[url] for url in urls if url in self._prefetching}
+        if prefetching:
+            await asyncio.wait(prefetching)
+        return await self._fetch_missing(urls)
+
+    async def _fetch_missing(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        stored = await self.get_many(urls)
+        misses = [url for url in dict.fromkeys(urls) if url not in stored]
+        if stored:
+            logger.info(f"📚 Codal store hit for {len(stored)}/{len(set(urls))} reports.")
+
+        scraped: Dict[str, Optional[str]] = {}
+        if misses:
+            started_at = time.perf_counter()
+            async with CodalClient() as codal_client:
+                scraped = await codal_client.fetch_reports(misses)
+            elapsed = time.perf_counter() - started_at
+            await asyncio.gather(*(
+                self._put(url, text, elapsed) for url, text in scraped.items() if text is not None
+            ))
+
+        return {url: stored.get(url, scraped.get(url)) for url in urls}
+
+    async def _prefetch(self, urls: List[str]) -> None:
+        try:
+            await self._fetch_missing(urls)
+        except Exception as e:
+            logger.warning(f"⚠️ Codal prefetch failed: {e}")
+
+    def schedule_prefetch(self, notices: List[Dict[str, Any]]) -> None:
+        """Warms the store for the newest notices in the background."""
+        urls = [notice["url"] for notice in notices[: settings.codal_prefetch_limit] if notice.get("url")]
+        if not settings.codal_prefetch_enabled or not urls:
+            return
+        urls = [url for url in urls if url not in self._prefetching]
+        if not urls:
+            return
+        task = asyncio.get_running_loop().create_task(self._prefetch(urls))
+        for url in urls:
+            self._prefetching[url] = task
+        task.add_done_callback(lambda _: [self._prefetching.pop(url, None) for url in urls])
+
+
+codal_store = CodalDocumentStore()
@@ -0,0 +1,222 @@
+import asyncio
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.mongo_manger import MongoManager
+from src.services.market_store import TRADE_DETAIL_FIELDS, market_store
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+BAR_COLUMNS = ("open", "high", "low", "close", "volume", "value", "count")
+STATEMENTS = ("balance_sheet", "profit_loss", "cash_flow", "financial_ratios")
+
+
+def _require_pyarrow() -> None:
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("The data lake needs pyarrow (`pip install pyarrow`).")
+
+
+class ParquetDataLake:
+    """
+    Local columnar copy of the Mongo market stores for research and batch analytics.
+
+    Layout (hive partitions, one Parquet file per leaf):
+        <root>/bars/asset_id=<id>/year=<yyyy>/part.parquet
+        <root>/trade_details/asset_id=<id>/year=<yyyy>/part.parquet
+        <root>/fundamentals/asset_id=<id>/part.parquet   (long table: statement, item, period, value)
+
+    Files are read memory-mapped; bar tables convert to the DataFrame shape the technical
+    analyzers take, and statement tables back to the {item: {period: value}} dicts the
+    fundamental agents read. Needs the optional `pyarrow` dependency.
+    """
+    def __init__(self, root: str = settings.data_lake_path):
+        self.root = Path(root)
+
+    # ---------- writing ----------
+
+    def _write_partitioned(self, dataset: str, asset_id: str, columns: Dict[str, np.ndarray]) -> int:
+        if not len(columns["ts"]):
+            return 0
+        table = pa.table({name: pa.array(values) for name, values in columns.items()})
+        years = columns["ts"].astype("datetime64[Y]").astype(int) + 1970
+        written = 0
+        for year in np.unique(years):
+            directory = self.root / dataset / f"asset_id={asset_id}" / f"year={year}"
+            directory.mkdir(parents=True, exist_ok=True)
+            part = table.filter(pa.array(years == year))
+            pq.write_table(part, directory / "part.parquet", compression="zstd")
+            written += part.num_rows
+        return written
+
+    def write_bars(self, asset_id: str, bars: Dict[str, np.ndarray]) -> int:
+        _require_pyarrow()
+        return self._write_partitioned("bars", asset_id, bars)
+
+    def write_trade_details(self, asset_id: str, details: Dict[str, np.ndarray]) -> int:
+        _require_pyarrow()
+        return self._write_partitioned("trade_details", asset_id, details)
+
+    def write_fundamentals(self, asset_id: str, fundamental_analysis: Dict[str, Any]) -> int:
+        """Flattens the statement dicts of a symbol document into the long statement table."""
+        _require_pyarrow()
+        rows: Dict[str, List[Any]] = {"statement": [], "item": [], "period": [], "value": []}
+        for statement in STATEMENTS:
+            for item, periods in (fundamental_analysis.get(statement) or {}).items():
+                for period, value in (periods or {}).items():
+                    try:
+                        number = float(value) if value is not None else None
+                    except (TypeError, ValueError):
+                        continue
+                    rows["statement"].append(statement)
+                    rows["item"].append(item)
+                    rows["period"].append(str(period))
+                    rows["value"].append(number)
+        if not rows["item"]:
+            return 0
+        directory = self.root / "fundamentals" / f"asset_id={asset_id}"
+        directory.mkdir(parents=True, exist_ok=True)
+        table = pa.table({
+            "statement": pa.array(rows["statement"]).dictionary_encode(),
+            "item": pa.array(rows["item"]).dictionary_encode(),
+            "period": pa.array(rows["period"]),
+            "value": pa.array(rows["value"], type=pa.float64()),
+        })
+        pq.write_table(table, directory / "part.parquet", compression="zstd")
+        return table.num_rows
+
+    # ---------- reading ----------
+
+    def _read(self, dataset: str, asset_ids: Optional[Iterable[str]], filters: List[tuple], columns: Optional[List[str]]):
+        _require_pyarrow()
+        path = self.root / dataset
+        if not path.exists():
+            return None
+        if asset_ids is not None:
+            filters = filters + [("asset_id", "in", [str(asset_id) for asset_id in asset_ids])]
+        # Explicit types: asset ids are strings even when they look numeric.
+        fields = [("asset_id", pa.string())] + ([("year", pa.int32())] if dataset != "fundamentals" else [])
+        return pq.read_table(
+            path,
+            columns=columns,
+            filters=filters or None,
+            partitioning=ds.partitioning(pa.schema(fields), flavor="hive"),
+            memory_map=True,
+        )
+
+    def read_bars(
+        self,
+        asset_ids: Optional[Iterable[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        columns: Optional[List[str]] = None,
+    ):
+        """Bars of the given assets (all by default) as an Arrow table; year partitions outside [start, end] are skipped."""
+        filters = []
+        if start:
+            filters += [("year", ">=", start.year), ("ts", ">=", pa.scalar(start, type=pa.timestamp("ms")))]
+        if end:
+            filters += [("year", "<=", end.year), ("ts", "<=", pa.scalar(end, type=pa.timestamp("ms")))]
+        if columns:
+            columns = list(dict.fromkeys(["ts", "asset_id", *columns]))
+        return self._read("bars", asset_ids, filters, columns)
+
+    def read_trade_details(self, asset_ids: Optional[Iterable[str]] = None, columns: Optional[List[str]] = None):
+        return self._read("trade_details", asset_ids, [], columns)
+
+    def read_fundamentals(self, asset_ids: Optional[Iterable[str]] = None):
+        return self._read("fundamentals", asset_ids, [], None)
+
+    def bars_frame(self, asset_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        One asset's bars as the OHLCV DataFrame the technical analyzers accept.
+        Null-free float columns are handed to pandas without copying (split blocks).
+        """
+        table = self.read_bars([asset_id], start, end, columns=["open", "high", "low", "close", "volume"])
+        if table is None or table.num_rows == 0:
+            return pd.DataFrame()
+        table = table.drop([name for name in ("asset_id", "year") if name in table.column_names])
+        df = table.sort_by("ts").to_pandas(split_blocks=True, self_destruct=True)
+        return df.rename(columns={"ts": "date"})
+
+    def fundamental_analysis(self, asset_id: str) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Statement tables of one asset in the `fundamental_analysis` shape of the symbol document."""
+        table = self.read_fundamentals([asset_id])
+        if table is None or table.num_rows == 0:
+            return {}
+        df = table.to_pandas()
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (statement, item), group in df.groupby(["statement", "item"], observed=True, sort=False):
+            result.setdefault(str(statement), {})[str(item)] = dict(zip(group["period"], group["value"]))
+        return result
+
+    # ---------- export ----------
+
+    def _manifest_path(self) -> Path:
+        return self.root / "_manifest.json"
+
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            return json.loads(self._manifest_path().read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    async def export_from_mongo(self, full: bool = False) -> Dict[str, int]:
+        """
+        Syncs the lake from Mongo: bars and trade details from the time-series store and
+        statements from the latest symbol documents. Incremental by default: an asset's
+        year partitions are rewritten from the year of its previous export onwards.
+        """
+        _require_pyarrow()
+        manifest = {} if full else self._load_manifest()
+        documents = await MongoManager().aggregate([
+            {"$match": {"rahavard_asset_id": {"$ne": None}}},
+            {"$sort": {"analysis_datetime": -1}},
+            {"$group": {
+                "_id": "$rahavard_asset_id",
+                "symbol": {"$first": "$symbol"},
+                "fundamental_analysis": {"$first": "$fundamental_analysis"},
+            }},
+        ])
+
+        totals = {"assets": 0, "bars": 0, "trade_details": 0, "statements": 0}
+        for document in documents:
+            asset_id = str(document["_id"])
+            since = None
+            if asset_id in manifest:
+                since = datetime(datetime.fromisoformat(manifest[asset_id]).year, 1, 1)
+            bars, details = await asyncio.gather(
+                market_store.bars(asset_id, start=since, fields=BAR_COLUMNS),
+                market_store.trade_details(asset_id, start=since, fields=TRADE_DETAIL_FIELDS),
+            )
+            totals["bars"] += self.write_bars(asset_id, bars)
+            totals["trade_details"] += self.write_trade_details(asset_id, details)
+            totals["statements"] += self.write_fundamentals(asset_id, document.get("fundamental_analysis") or {})
+            totals["assets"] += 1
+            manifest[asset_id] = datetime.utcnow().isoformat()
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._manifest_path().write_text(json.dumps(manifest, indent=2))
+        logger.info(f"🪣 Data lake export finished: {totals}")
+        return totals
+
+
+data_lake = ParquetDataLake()
+
+
+if __name__ == "__main__":
+    import sys
+
+    asyncio.run(data_lake.export_from_mongo(full="--full" in sys.argv))
@@ -0,0 +1,166 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import jdatetime
+
+from src.core.config import settings
+from src.core.logger import logger
+
+# Top-level sections of the market_analysis document that can be refreshed independently.
+SECTIONS = (
+    "market_data",
+    "technical_analysis",
+    "fundamental_analysis",
+    "social_post",
+    "news_announcements",
+    "search",
+)
+
+
+class TehranMarketCalendar:
+    """Trading days, session hours and holidays of the Tehran exchange (TSE/IFB)."""
+    def __init__(
+        self,
+        trading_weekdays: List[int],
+        open_time: str,
+        close_time: str,
+        holidays: List[str],
+        tz_name: str,
+    ):
+        self.trading_weekdays = set(trading_weekdays)
+        self.open_time = time.fromisoformat(open_time)
+        self.close_time = time.fromisoformat(close_time)
+        self.holidays = {date.fromisoformat(day) for day in holidays}
+        self.tz = ZoneInfo(tz_name)
+
+    def now(self) -> datetime:
+        return datetime.now(self.tz)
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() in self.trading_weekdays and day not in self.holidays
+
+    def is_open(self, moment: datetime) -> bool:
+        local = moment.astimezone(self.tz)
+        return self.is_trading_day(local.date()) and self.open_time <= local.time() < self.close_time
+
+    def next_open(self, moment: datetime) -> datetime:
+        """First session open strictly after `moment`."""
+        local = moment.astimezone(self.tz)
+        day = local.date()
+        if local.time() >= self.open_time:
+            day += timedelta(days=1)
+        for _ in range(31):
+            if self.is_trading_day(day):
+                break
+            day += timedelta(days=1)
+        return datetime.combine(day, self.open_time, tzinfo=self.tz)
+
+    def last_close(self, moment: datetime) -> datetime:
+        """Most recent session close at or before `moment`."""
+        local = moment.astimezone(self.tz)
+        day = local.date()
+        if local.time() < self.close_time:
+            day -= timedelta(days=1)
+        # Bounded walk back over weekends and holiday runs (e.g. Nowruz).
+        for _ in range(31):
+            if self.is_trading_day(day):
+                break
+            day -= timedelta(days=1)
+        return datetime.combine(day, self.close_time, tzinfo=self.tz)
+
+
+def _jalali_quarter(moment: datetime, tz: ZoneInfo) -> tuple[int, int]:
+    local = jdatetime.date.fromgregorian(date=moment.astimezone(tz).date())
+    return local.year, (local.month - 1) // 3
+
+
+class FreshnessPolicy:
+    """
+    Decides which sections of a stored symbol document are stale.
+
+    Per-section rules (FRESHNESS_SECTION_POLICIES):
+      - "session": while the market is open, stale after `ttl_seconds`; otherwise stale
+        only if it was written before the most recent session close.
+      - "quarterly": stale once a new Jalali quarter starts, or after `ttl_seconds`
+        since filings for a quarter keep arriving for weeks after it closes.
+      - "ttl": stale after `ttl_seconds`.
+    """
+    def __init__(self, calendar: TehranMarketCalendar, section_policies: Dict[str, Dict[str, Any]]):
+        self.calendar = calendar
+        self.section_policies = section_policies
+
+    @staticmethod
+    def section_timestamp(document: Dict[str, Any], section: str) -> Optional[datetime]:
+        """
+        Section write time as an aware datetime. Documents written before per-section
+        timestamps fall back to `analysis_datetime`; once a document has `section_updated_at`,
+        a section without an entry counts as never written (stale), since `analysis_datetime`
+        moves with every partial refresh.
+        """
+        section_updated_at = document.get("section_updated_at")
+        if section_updated_at:
+            updated = section_updated_at.get(section)
+            if not isinstance(updated, datetime):
+                return None
+            # Stored as naive UTC.
+            return updated.replace(tzinfo=timezone.utc) if updated.tzinfo is None else updated
+
+        legacy = document.get("analysis_datetime")
+        if isinstance(legacy, str):
+            try:
+                legacy = datetime.fromisoformat(legacy)
+            except ValueError:
+                return None
+        if isinstance(legacy, datetime):
+            # Written with datetime.now(), i.e. server local time.
+            return legacy.astimezone() if legacy.tzinfo is None else legacy
+        return None
+
+    def is_stale(self, section: str, updated_at: Optional[datetime], now: datetime) -> bool:
+        if updated_at is None:
+            return True
+
+        rule = self.section_policies.get(section) or {}
+        policy = rule.get("policy", "ttl")
+        ttl = timedelta(seconds=rule.get("ttl_seconds", 3600))
+
+        if policy == "session":
+            if self.calendar.is_open(now):
+                return now - updated_at > ttl
+            return updated_at < self.calendar.last_close(now)
+
+        if policy == "quarterly":
+            if _jalali_quarter(updated_at, self.calendar.tz) != _jalali_quarter(now, self.calendar.tz):
+                return True
+            return now - updated_at > ttl
+
+        return now - updated_at > ttl
+
+    def stale_sections(self, symbol: str, document: Optional[Dict[str, Any]], now: Optional[datetime] = None) -> List[str]:
+        """Returns the sections to refresh; all of them when the symbol has no stored document."""
+        if not document:
+            logger.info(f"🔎 Symbol '{symbol}' not found in DB. Scheduling full analysis.")
+            return list(SECTIONS)
+
+        now = now or self.calendar.now()
+        stale = [
+            section for section in SECTIONS
+            if self.is_stale(section, self.section_timestamp(document, section), now)
+        ]
+        if stale:
+            logger.info(f"📉 Stale sections for '{symbol}': {stale}")
+        else:
+            logger.info(f"✅ Data for '{symbol}' is fresh. Skipping refresh.")
+        return stale
+
+
+market_calendar = TehranMarketCalendar(
+    trading_weekdays=settings.market_trading_weekdays,
+    open_time=settings.market_open_time,
+    close_time=settings.market_close_time,
+    holidays=settings.market_holidays,
+    tz_name=settings.market_timezone,
+)
+
+freshness_policy = FreshnessPolicy(market_calendar, settings.freshness_section_policies)
@@ -0,0 +1,97 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.utils.text import normalize_persian_text
+
+# (filing type, title patterns, base score). Patterns are matched on normalized titles,
+# so spacing/ZWNJ and Arabic letter variants do not matter. First match wins.
+FILING_TYPES: List[Tuple[str, Tuple[str, ...], float]] = [
+    ("interpretive_report", ("گزارش تفسیری",), 9.0),
+    ("financial_statements", ("صورت های مالی", "صورتهای مالی", "اطلاعات و صورت"), 9.0),
+    ("monthly_activity", ("گزارش فعالیت ماهانه", "فعالیت ماهانه"), 8.5),
+    ("earnings_forecast", ("پیش بینی درآمد", "پیش بینی سود"), 8.0),
+    ("capital_increase", ("افزایش سرمایه",), 7.5),
+    ("material_disclosure", ("افشای اطلاعات با اهمیت", "اطلاعات با اهمیت"), 7.0),
+    ("board_decision", ("تصمیمات هیئت مدیره", "تصمیمات هیات مدیره", "تصمیمات مجمع", "خلاصه تصمیمات"), 6.5),
+    ("clarification", ("شفاف سازی",), 5.5),
+    ("trading_halt", ("توقف نماد", "بازگشایی نماد", "توقف معاملات"), 4.0),
+    ("meeting_notice", ("آگهی دعوت", "زمان تشکیل مجمع", "دعوت به مجمع"), 2.5),
+    ("dividend_schedule", ("زمان بندی پرداخت سود", "جدول زمانبندی پرداخت"), 2.0),
+    ("administrative", ("تغییر نشانی", "آگهی ثبت", "معرفی", "تغییر در ترکیب", "صاحبان امضای مجاز", "حسابرس"), 1.0),
+]
+
+# Lightweight lexical signals on top of the filing type.
+KEYWORD_BONUS: Dict[str, float] = {
+    "حسابرسی شده": 1.0,
+    "تلفیقی": 0.5,
+    "سود": 0.5,
+    "درآمد": 0.5,
+    "فروش": 0.5,
+    "تولید": 0.5,
+    "قرارداد": 0.5,
+    "سرمایه گذاری": 0.5,
+}
+CORRECTION_PENALTY = ("اصلاحیه", -1.0)
+
+
+def classify_codal_title(title: str) -> Tuple[Optional[str], float]:
+    """Returns (filing type, score) for a notice title; type is None when no rule matches."""
+    normalized = normalize_persian_text(title)
+    filing_type, score = None, 0.0
+    for name, patterns, base in FILING_TYPES:
+        if any(pattern in normalized for pattern in patterns):
+            filing_type, score = name, base
+            break
+
+    score += sum(bonus for keyword, bonus in KEYWORD_BONUS.items() if keyword in normalized)
+    if CORRECTION_PENALTY[0] in normalized:
+        score += CORRECTION_PENALTY[1]
+    return filing_type, score
+
+
+class CodalRanker:
+    """
+    Picks the Codal notices worth reading without an LLM call.
+    Notices are scored by filing type and keywords (with a small bonus for recency, input is
+    newest first), capped per filing type, and the best ones above `min_score` are selected.
+    The ranking is ambiguous, and the caller should fall back to the LLM, when no notice
+    matches a known filing type strongly enough.
+    """
+    def __init__(
+        self,
+        min_score: float = settings.codal_rank_min_score,
+        max_selected: int = settings.codal_rank_max_selected,
+        max_per_type: int = settings.codal_rank_max_per_type,
+    ):
+        self.min_score = min_score
+        self.max_selected = max_selected
+        self.max_per_type = max_per_type
+
+    def rank(self, reports: List[Dict[str, Any]]) -> Tuple[List[str], bool]:
+        """Returns (selected report ids, ambiguous)."""
+        if not reports:
+            return [], False
+
+        scored = []
+        for position, report in enumerate(reports):
+            filing_type, score = classify_codal_title(report.get("title") or "")
+            recency = 0.5 * (1 - position / len(reports))
+            scored.append((score + recency, position, filing_type, report["id"]))
+
+        selected: List[str] = []
+        per_type: Dict[Optional[str], int] = {}
+        for score, _, filing_type, report_id in sorted(scored, key=lambda item: (-item[0], item[1])):
+            if score < self.min_score or filing_type is None or len(selected) >= self.max_selected:
+                continue
+            if per_type.get(filing_type, 0) >= self.max_per_type:
+                continue
+            per_type[filing_type] = per_type.get(filing_type, 0) + 1
+            selected.append(report_id)
+
+        ambiguous = not selected
+        logger.debug(f"Codal ranking: selected={selected} ambiguous={ambiguous}")
+        return selected, ambiguous
+
+
+codal_ranker = CodalRanker()
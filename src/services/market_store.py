@@ -0,0 +1,188 @@
+from datetime import datetime, time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.mongo_manger import MongoManager
+
+# Canonical bar columns -> Rahavard trade history fields.
+BAR_FIELDS = {
+    "open": "open_price",
+    "high": "high_price",
+    "low": "low_price",
+    "close": "real_close_price",
+    "last": "close_price",
+    "volume": "volume",
+    "value": "value",
+    "count": "count",
+}
+TRADE_DETAIL_FIELDS = (
+    "person_buy_volume",
+    "person_buyer_count",
+    "person_sell_volume",
+    "person_seller_count",
+    "person_owner_change",
+    "company_buy_volume",
+    "company_buyer_count",
+    "company_sell_volume",
+    "company_seller_count",
+    "company_owner_change",
+)
+
+
+def bar_timestamp(value: Any) -> Optional[datetime]:
+    """Trading day of a Rahavard `date_time` as a midnight datetime (same cleaning as the pipeline)."""
+    if not value:
+        return None
+    try:
+        day = pd.to_datetime(str(value).replace("da", "-")).date()
+    except (ValueError, TypeError):
+        return None
+    return datetime.combine(day, time.min)
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None and not isinstance(value, bool) else None
+    except (TypeError, ValueError):
+        return None
+
+
+class MarketTimeSeriesStore:
+    """
+    Daily bars and person/company trade details in MongoDB time-series collections,
+    one measurement per asset and trading day (`ts`, with `meta.asset_id`).
+
+    Time-series collections do not support upserts, so ingestion is deduplicated:
+    days already stored are skipped, except the most recent stored day, whose
+    measurement is replaced since it may have been written during the session.
+    Range reads return column arrays ready for numpy-based analytics.
+    """
+    def __init__(
+        self,
+        bars_collection: str = settings.mongo_daily_bars_collection_name,
+        trade_details_collection: str = settings.mongo_trade_detail_collection_name,
+    ):
+        self.bars_collection = bars_collection
+        self.trade_details_collection = trade_details_collection
+
+    @staticmethod
+    def _bar_measurement(asset_id: str, symbol: str, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        ts = bar_timestamp(row.get("date_time"))
+        close = _number(row.get(BAR_FIELDS["close"]))
+        if ts is None or close is None:
+            return None
+        measurement = {"ts": ts, "meta": {"asset_id": str(asset_id), "symbol": symbol}}
+        for name, field in BAR_FIELDS.items():
+            measurement[name] = _number(row.get(field))
+        return measurement
+
+    @staticmethod
+    def _trade_detail_measurement(asset_id: str, symbol: str, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        ts = bar_timestamp(row.get("date_time"))
+        if ts is None:
+            return None
+        measurement = {"ts": ts, "meta": {"asset_id": str(asset_id), "symbol": symbol}}
+        for field in TRADE_DETAIL_FIELDS:
+            measurement[field] = _number(row.get(field))
+        return measurement
+
+    async def _ingest(self, collection_name: str, asset_id: str, measurements: List[Dict[str, Any]]) -> int:
+        if not measurements:
+            return 0
+        # One measurement per day; the provider sometimes repeats a day across pages.
+        by_day = {m["ts"]: m for m in measurements}
+        collection = MongoManager(collection_name).collection
+        query = {"meta.asset_id": str(asset_id), "ts": {"$gte": min(by_day), "$lte": max(by_day)}}
+        existing = sorted({doc["ts"] async for doc in collection.find(query, {"ts": 1, "_id": 0})})
+
+        if existing and existing[-1] in by_day:
+            try:
+                await collection.delete_many({"meta.asset_id": str(asset_id), "ts": existing[-1]})
+                existing.pop()
+            except OperationFailure as e:
+                # Deletes filtered on the time field need MongoDB 7.0+.
+                logger.warning(f"⚠️ Could not replace latest measurement in '{collection_name}': {e}")
+
+        stored = set(existing)
+        new = [m for ts, m in sorted(by_day.items()) if ts not in stored]
+        if not new:
+            return 0
+        try:
+            result = await collection.insert_many(new, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            logger.warning(f"⚠️ Partial time-series insert into '{collection_name}': {e.details.get('writeErrors', [])[:1]}")
+            return e.details.get("nInserted", 0)
+
+    async def ingest_bars(self, asset_id: str, symbol: str, history: List[Dict[str, Any]]) -> int:
+        """Stores new daily bars from `get_trade_history`. Returns the number of inserted days."""
+        measurements = [m for m in (self._bar_measurement(asset_id, symbol, row) for row in history or []) if m]
+        inserted = await self._ingest(self.bars_collection, asset_id, measurements)
+        logger.info(f"🕯️ Stored {inserted} new daily bars for {symbol}.")
+        return inserted
+
+    async def ingest_trade_details(self, asset_id: str, symbol: str, details: List[Dict[str, Any]]) -> int:
+        """Stores new person/company trade details from `get_symbol_trade_detail_history`."""
+        if not isinstance(details, list):
+            return 0
+        measurements = [m for m in (self._trade_detail_measurement(asset_id, symbol, row) for row in details) if m]
+        inserted = await self._ingest(self.trade_details_collection, asset_id, measurements)
+        logger.info(f"👥 Stored {inserted} new trade-detail days for {symbol}.")
+        return inserted
+
+    async def _range(
+        self,
+        collection_name: str,
+        asset_id: str,
+        fields: Sequence[str],
+        start: Optional[datetime],
+        end: Optional[datetime],
+    ) -> Dict[str, np.ndarray]:
+        time_filter: Dict[str, Any] = {}
+        if start:
+            time_filter["$gte"] = start
+        if end:
+            time_filter["$lte"] = end
+        query: Dict[str, Any] = {"meta.asset_id": str(asset_id)}
+        if time_filter:
+            query["ts"] = time_filter
+
+        cursor = MongoManager(collection_name).collection.find(
+            query, {"_id": 0, "ts": 1, **{field: 1 for field in fields}}
+        ).sort("ts", 1)
+        rows = await cursor.to_list(length=None)
+
+        arrays = {"ts": np.array([row["ts"] for row in rows], dtype="datetime64[ms]")}
+        for field in fields:
+            arrays[field] = np.fromiter(
+                (np.nan if row.get(field) is None else row[field] for row in rows), dtype=np.float64, count=len(rows)
+            )
+        return arrays
+
+    async def bars(
+        self,
+        asset_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        fields: Sequence[str] = ("open", "high", "low", "close", "volume"),
+    ) -> Dict[str, np.ndarray]:
+        """Daily bars in [start, end], oldest first, as {"ts": datetime64 array, field: float64 array}."""
+        return await self._range(self.bars_collection, asset_id, fields, start, end)
+
+    async def trade_details(
+        self,
+        asset_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        fields: Sequence[str] = TRADE_DETAIL_FIELDS,
+    ) -> Dict[str, np.ndarray]:
+        """Person/company trade details in [start, end], oldest first, as column arrays."""
+        return await self._range(self.trade_details_collection, asset_id, fields, start, end)
+
+
+market_store = MarketTimeSeriesStore()
@@ -0,0 +1,167 @@
+import hashlib
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.utils.helper import item_timestamp, parse_iso_date, parse_persian_date
+from src.utils.text import normalize_persian_text
+
+# Preferred source for the canonical item of a cluster: official filing, then the feed, then the web.
+SOURCE_PRIORITY = {"codal": 0, "rahavard": 1, "tavily": 2}
+
+_NUM_PERM = 64
+_BANDS, _ROWS = 16, 4  # 16 bands x 4 rows: candidate pairs from Jaccard ~0.5 upwards
+_PRIME = np.uint64(4294967311)  # > 2**32, and a * x stays below 2**63 for 32-bit inputs
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, 2**31 - 1, size=_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 2**31 - 1, size=_NUM_PERM, dtype=np.uint64)
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def shingles(text: str, size: int = 4) -> Set[str]:
+    """Character shingles of normalized text; robust for short Persian headlines."""
+    text = _PUNCTUATION.sub(" ", normalize_persian_text(text)).lower()
+    text = " ".join(text.split())
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash_signature(shingle_set: Set[str]) -> np.ndarray:
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "big") for s in shingle_set),
+        dtype=np.uint64,
+        count=len(shingle_set),
+    )
+    return ((np.outer(hashes, _PERM_A) + _PERM_B) % _PRIME).min(axis=0)
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def collect_news_items(
+    news: Optional[List[Dict[str, Any]]],
+    codal: Optional[List[Dict[str, Any]]],
+    tavily_results: Optional[List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """Brings the three feeds to one shape: source, headline text, timestamp and the original item."""
+    tehran = ZoneInfo(settings.market_timezone)
+    items = []
+    for item in news or []:
+        items.append({
+            "source": "rahavard",
+            "text": item.get("title") or (item.get("body") or "")[:300],
+            "published_at": item_timestamp(item, "date", parse_iso_date, tz=tehran),
+            "item": item,
+        })
+    for item in codal or []:
+        items.append({
+            "source": "codal",
+            "text": item.get("title") or "",
+            "published_at": item_timestamp(item, "publishDate", parse_persian_date, tz=tehran),
+            "item": item,
+        })
+    for item in tavily_results or []:
+        items.append({
+            "source": "tavily",
+            "text": item.get("title") or (item.get("content") or "")[:300],
+            "published_at": item_timestamp(item, "published_date", parse_iso_date),
+            "item": item,
+        })
+    return [item for item in items if item["text"]]
+
+
+def cluster_news_items(
+    items: List[Dict[str, Any]],
+    threshold: float = settings.news_cluster_threshold,
+    window_hours: float = settings.news_cluster_window_hours,
+) -> List[List[int]]:
+    """
+    Groups items that report the same event. MinHash/LSH proposes candidate pairs, which are
+    merged when their exact shingle Jaccard is >= `threshold` and they were published within
+    `window_hours` of each other (recurring filings such as monthly reports share most of their
+    title, so time keeps them apart). Returns clusters as lists of item indices.
+    """
+    shingle_sets = [shingles(item["text"]) for item in items]
+    signatures = [minhash_signature(s) if s else None for s in shingle_sets]
+    window = timedelta(hours=window_hours)
+
+    parent = list(range(len(items)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    buckets: Dict[tuple, List[int]] = {}
+    for index, signature in enumerate(signatures):
+        if signature is None:
+            continue
+        for band in range(_BANDS):
+            key = (band, signature[band * _ROWS:(band + 1) * _ROWS].tobytes())
+            buckets.setdefault(key, []).append(index)
+
+    checked = set()
+    for members in buckets.values():
+        for position, i in enumerate(members):
+            for j in members[position + 1:]:
+                if (i, j) in checked or find(i) == find(j):
+                    continue
+                checked.add((i, j))
+                a, b = items[i]["published_at"], items[j]["published_at"]
+                if a and b and abs(a - b) > window:
+                    continue
+                if _jaccard(shingle_sets[i], shingle_sets[j]) >= threshold:
+                    parent[find(j)] = find(i)
+
+    clusters: Dict[int, List[int]] = {}
+    for index in range(len(items)):
+        clusters.setdefault(find(index), []).append(index)
+    return list(clusters.values())
+
+
+def cluster_news_events(
+    news: Optional[List[Dict[str, Any]]],
+    codal: Optional[List[Dict[str, Any]]],
+    tavily_results: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    One event per cluster of Rahavard feed items, Codal notices and Tavily results, newest first.
+    The canonical item is the newest one from the most authoritative source (Codal, then the
+    feed, then the web); Codal notices carry only a title, so the event's `body` is the
+    longest article text (feed body or web snippet) of any member. The event also carries
+    how many items and sources reported it.
+    """
+    items = collect_news_items(news, codal, tavily_results)
+    if not items:
+        return []
+
+    events = []
+    for cluster in cluster_news_items(items):
+        members = [items[i] for i in cluster]
+        newest_first = sorted(members, key=lambda item: item["published_at"] or datetime.min, reverse=True)
+        canonical = min(newest_first, key=lambda item: SOURCE_PRIORITY[item["source"]])
+        dates = [item["published_at"] for item in members if item["published_at"]]
+        sources = sorted({item["source"] for item in members}, key=SOURCE_PRIORITY.get)
+        bodies = [item["item"].get("body") or item["item"].get("content") or "" for item in members]
+        events.append({
+            "source": canonical["source"],
+            "published_at": canonical["published_at"] or (max(dates) if dates else None),
+            "first_seen": min(dates) if dates else None,
+            "sources": sources,
+            "source_count": len(sources),
+            "item_count": len(members),
+            "item": canonical["item"],
+            "body": max(bodies, key=len) or None,
+        })
+
+    events.sort(key=lambda event: event["published_at"] or datetime.min, reverse=True)
+    logger.info(f"🗞️ Clustered {len(items)} news/Codal/web items into {len(events)} distinct events.")
+    return events
@@ -1,17 +1,25 @@
 import asyncio
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 
 # Import custom modules
 from src.core.config import settings
 from src.core.logger import logger
 from src.core.mongo_manger import MongoManager
+from src.core.cache import symbol_data_cache
+from src.services.freshness import SECTIONS, FreshnessPolicy
+from src.services.codal_store import codal_store
+from src.services.social.sahamyab_crawler import sahamyab_crawler
+from src.services.social.twitter_search import twitter_search
+from src.services.web_search import tavily_search
+from src.services.symbol_details import symbol_details
+from src.services.market_store import market_store
+from src.utils.helper import normalize_timestamps, parse_iso_date, parse_persian_date
 
 # Clients
 from src.services.providers.rahavard import RahavardClient
 from src.services.providers.sahamyab import SahamyabClient
-from src.services.providers.twitter_rapid import TwitterRapidClient
-from src.services.providers.tavily_search import TavilyClient
 
 # Analyzers
 from src.services.technical.trend import TrendAnalyzer
@@ -22,6 +30,40 @@ from src.services.technical.sr import SupportResistanceAnalyzer
 from src.services.technical.spark_trend import SparklineReporter
 from src.services.technical.smart_money import SmartMoneyAnalyzer
 
+# Provider endpoints each document section is built from; a partial refresh only calls these.
+SECTION_ENDPOINTS = {
+    "market_data": {"rahavard": {"history", "details"}, "sahamyab": {"trade_info", "symbol_info"}},
+    "technical_analysis": {"rahavard": {"history", "pivots", "real_legal_trade"}},
+    "fundamental_analysis": {"rahavard": {"balance", "profit_loss", "cash_flow", "ratios"}},
+    "social_post": {"sahamyab": {"tweets"}, "twitter": {"rapid_tweets"}},
+    "news_announcements": {"rahavard": {"news"}, "sahamyab": {"codal"}},
+    "search": {"tavily": {"tavily"}},
+}
+
+# Fields of the Rahavard asset snapshot kept in the summary (read by the fundamental agents and
+# the search queries); the raw snapshot is stored in the `snapshot` detail document.
+SNAPSHOT_SUMMARY_FIELDS = ("name", "category_name", "last_value", "last_free_float", "last_pb", "eps", "dps")
+
+# Fields of the stored document a partial refresh needs before fetching anything.
+BASE_DOCUMENT_PROJECTION = {
+    "rahavard_asset_id": 1,
+    "symbol": 1,
+    "short_name": 1,
+    "market_data.general_snapshot.name": 1,
+    "analysis_datetime": 1,
+    "section_updated_at": 1,
+}
+
+
+def endpoints_for(sections: list[str]) -> dict[str, set[str]]:
+    """Union of provider endpoints needed to rebuild `sections`."""
+    endpoints: dict[str, set[str]] = {}
+    for section in sections:
+        for provider, keys in SECTION_ENDPOINTS[section].items():
+            endpoints.setdefault(provider, set()).update(keys)
+    return endpoints
+
+
 class StockAnalysisPipeline:
     def __init__(self, symbol_name: str):
         self.symbol_name = symbol_name
@@ -29,6 +71,8 @@ class StockAnalysisPipeline:
         self.rahavard_data = {}
         self.sahamyab_data = {}
         self.external_data = {}
+        self.base_document = {}
+        self.asset_id = None
         self.df = pd.DataFrame()
 
     def _transform_rahavard_to_df(self, trade_history: list) -> pd.DataFrame:
@@ -91,39 +135,51 @@ class StockAnalysisPipeline:
             logger.warning(f"Could not calculate return for {days_ago} days ago: {e}")
             return None
 
-    async def fetch_rahavard_data(self):
-        """Fetches critical market data. Returns False if critical failure."""
+    async def fetch_rahavard_data(self, keys: set[str] | None = None):
+        """
+        Fetches critical market data. Returns False if critical failure.
+        Only the endpoints in `keys` are called (all by default); the symbol lookup is
+        skipped when the stored document already carries the asset id.
+        """
         logger.info("1️⃣ Fetching Rahavard Data...")
         try:
             async with RahavardClient() as r_client:
-                symbol_info = await r_client.get_symbol_id(self.symbol_name)
-                
-                if not symbol_info:
-                    logger.error(f"❌ Symbol {self.symbol_name} not found in Rahavard.")
-                    return False
+                asset_id = self.base_document.get("rahavard_asset_id")
+                symbol_info = None
+                if not asset_id:
+                    symbol_info = await r_client.get_symbol_id(self.symbol_name)
 
-                asset_id = symbol_info['id']
+                    if not symbol_info:
+                        logger.error(f"❌ Symbol {self.symbol_name} not found in Rahavard.")
+                        return False
+
+                    asset_id = symbol_info['id']
+                self.asset_id = asset_id
                 logger.debug(f"Asset ID: {asset_id}")
 
-                # Gather all data points
+                endpoints = {
+                    'history': lambda: r_client.get_trade_history(asset_id, count=365),
+                    'details': lambda: r_client.get_asset_details(asset_id),
+                    'pivots': lambda: r_client.get_pivot_indicators(asset_id),
+                    'balance': lambda: r_client.get_balance_sheet(asset_id),
+                    'profit_loss': lambda: r_client.get_profit_loss(asset_id),
+                    'cash_flow': lambda: r_client.get_cash_flow(asset_id),
+                    'ratios': lambda: r_client.get_financial_ratios(asset_id),
+                    'news': lambda: r_client.get_news(asset_id),
+                    'real_legal_trade': lambda: r_client.get_symbol_trade_detail_history(asset_id , count=7),
+                }
+                selected = [key for key in endpoints if keys is None or key in keys]
+
+                # Gather the selected data points
                 results = await asyncio.gather(
-                    r_client.get_trade_history(asset_id, count=365),
-                    r_client.get_asset_details(asset_id),
-                    r_client.get_pivot_indicators(asset_id),
-                    r_client.get_balance_sheet(asset_id),
-                    r_client.get_profit_loss(asset_id),
-                    r_client.get_cash_flow(asset_id),
-                    r_client.get_financial_ratios(asset_id),
-                    r_client.get_news(asset_id),
-                    r_client.get_symbol_trade_detail_history(asset_id , count=7),
+                    *(endpoints[key]() for key in selected),
                     return_exceptions=True # Prevent one failure from crashing all
                 )
 
                 # Unpack and check for exceptions in results
-                keys = ['history', 'details', 'pivots', 'balance', 'profit_loss', 'cash_flow', 'ratios', 'news' , 'real_legal_trade']
-                self.rahavard_data = {'info': symbol_info}
+                self.rahavard_data = {'info': symbol_info} if symbol_info else {}
                 
-                for key, result in zip(keys, results):
+                for key, result in zip(selected, results):
                     if isinstance(result, Exception):
                         logger.error(f"⚠️ Error fetching {key}: {result}")
                         self.rahavard_data[key] = {} if key != "history" else []
@@ -134,7 +190,7 @@ class StockAnalysisPipeline:
                             self.rahavard_data[key] = result
 
                 # Post-processing returns
-                if self.rahavard_data.get('history'):
+                if self.rahavard_data.get('history') and 'details' in selected:
                     self.rahavard_data['details'] = self.rahavard_data.get('details') or {}
                     self.rahavard_data['details']['returns'] = {}
                     periods = {'return_7_d': 6, 'return_1_m': 30, 'return_3_m': 90}
@@ -149,65 +205,91 @@ class StockAnalysisPipeline:
             logger.critical(f"🔥 Critical error in Rahavard Fetch: {e}", exc_info=True)
             return False
 
-    async def fetch_sahamyab_data(self):
-        """Fetches social/sentiment data."""
+    async def fetch_sahamyab_data(self, keys: set[str] | None = None):
+        """Fetches social/sentiment data. Only the endpoints in `keys` are called (all by default)."""
         logger.info("2️⃣ Fetching Sahamyab Data...")
         try:
             async with SahamyabClient() as s_client:
+                endpoints = {
+                    "trade_info": lambda: s_client.get_trade_info(self.symbol_name),
+                    "symbol_info": lambda: s_client.get_overall_info(self.symbol_name),
+                    "tweets": lambda: sahamyab_crawler.sync(s_client, self.symbol_name),
+                    "codal": lambda: s_client.get_codal_notices(self.symbol_name),
+                }
+                selected = [key for key in endpoints if keys is None or key in keys]
                 results = await asyncio.gather(
-                    s_client.get_trade_info(self.symbol_name),
-                    s_client.get_overall_info(self.symbol_name),
-                    s_client.get_tweets(self.symbol_name),
-                    s_client.get_codal_notices(self.symbol_name),
+                    *(endpoints[key]() for key in selected),
                     return_exceptions=True
                 )
                 
                 # Check for exceptions
-                cleaned_results = []
-                for res in results:
+                self.sahamyab_data = {}
+                for key, res in zip(selected, results):
                     if isinstance(res, Exception):
-                        logger.warning(f"⚠️ Sahamyab sub-task failed: {res}")
-                        cleaned_results.append({}) # Default empty dict
+                        logger.warning(f"⚠️ Sahamyab sub-task '{key}' failed: {res}")
+                        self.sahamyab_data[key] = {} # Default empty dict
                     else:
-                        cleaned_results.append(res)
+                        self.sahamyab_data[key] = res
 
-                self.sahamyab_data = {
-                    "trade_info": cleaned_results[0],
-                    "symbol_info": cleaned_results[1],
-                    "tweets": cleaned_results[2],
-                    "codal": cleaned_results[3]
-                }
+                # New filings are immutable; scrape them into the Codal store ahead of the agents.
+                if self.sahamyab_data.get("codal"):
+                    codal_store.schedule_prefetch(self.sahamyab_data["codal"])
         except Exception as e:
             logger.error(f"❌ Error in Sahamyab Fetch: {e}", exc_info=True)
 
-    async def fetch_external_search(self):
+    async def fetch_external_search(self, twitter: bool = True, tavily: bool = True):
         """Fetches Twitter RapidAPI and Tavily. Non-critical."""
         logger.info("3️⃣ Fetching External Search Data (Twitter/Tavily)...")
-        
-        # Twitter Rapid API
+        await asyncio.gather(
+            self._fetch_rapid_tweets() if twitter else asyncio.sleep(0),
+            self._fetch_tavily() if tavily else asyncio.sleep(0),
+        )
+
+    async def _fetch_rapid_tweets(self):
+        # Twitter Rapid API: ticker, hashtag and company-name queries fetched concurrently
         try:
-            async with TwitterRapidClient(base_url=settings.rapid_base_url) as rapid_twitter:
-                end_date = datetime.now().date()
-                start_date = end_date - timedelta(days=90)
-                self.external_data['rapid_tweets'] = await rapid_twitter.search_tweets(
-                    query=self.symbol_name, start_date=start_date, end_date=end_date
-                )
+            info = self.rahavard_data.get('info') or {}
+            names = [
+                info.get('short_name') or self.base_document.get('short_name'),
+                self.rahavard_data.get('details', {}).get('name')
+                or ((self.base_document.get('market_data') or {}).get('general_snapshot') or {}).get('name'),
+            ]
+            end_date = datetime.now().date()
+            start_date = end_date - timedelta(days=90)
+            self.external_data['rapid_tweets'] = await twitter_search.search(
+                self.symbol_name, names, start_date=start_date, end_date=end_date
+            )
         except Exception as e:
             logger.warning(f"⚠️ Twitter RapidAPI failed: {e}")
             self.external_data['rapid_tweets'] = []
 
-        # Tavily Search
+    async def _fetch_tavily(self):
+        # Tavily Search (cached per normalized query; raw results kept in their own collection)
         try:
-            async with TavilyClient(api_key=settings.tavily_api_key.get_secret_value(), base_url=settings.tavily_base_url) as tavily:
-                asset_name = self.rahavard_data.get('details', {}).get('name', '')
-                query = f"تحلیل بنیادی و تکنیکال و بررسی نماد {self.symbol_name} یا {asset_name}"
-                end_date = datetime.now().date()
-                start_date = end_date - timedelta(days=30)
-                self.external_data['tavily'] = await tavily.search(query=query, start_date=start_date, end_date=end_date)
+            asset_name = (
+                self.rahavard_data.get('details', {}).get('name')
+                or ((self.base_document.get('market_data') or {}).get('general_snapshot') or {}).get('name', '')
+            )
+            query = f"تحلیل بنیادی و تکنیکال و بررسی نماد {self.symbol_name} یا {asset_name}"
+            end_date = datetime.now().date()
+            start_date = end_date - timedelta(days=30)
+            self.external_data['tavily'] = await tavily_search.search(query, start_date=start_date, end_date=end_date)
         except Exception as e:
             logger.warning(f"⚠️ Tavily Search failed: {e}")
             self.external_data['tavily'] = None
 
+    async def store_time_series(self):
+        """Appends the fetched daily bars and trade details to the time-series store. Non-critical."""
+        if not settings.market_store_enabled or not self.asset_id:
+            return
+        try:
+            await asyncio.gather(
+                market_store.ingest_bars(self.asset_id, self.symbol_name, self.rahavard_data.get('history') or []),
+                market_store.ingest_trade_details(self.asset_id, self.symbol_name, self.rahavard_data.get('real_legal_trade') or []),
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Time-series ingestion failed: {e}")
+
     def run_technical_analysis(self):
         """Runs the technical analysis logic."""
         logger.info("⚙️ Running Technical Analysis ...")
@@ -216,7 +298,7 @@ class StockAnalysisPipeline:
             
             if self.df.empty or len(self.df) < 50:
                 logger.error("❌ Insufficient historical data for technical analysis.")
-                return None
+                return None, None
 
             current_price = int(self.df['close'].iloc[0])
             
@@ -251,6 +333,14 @@ class StockAnalysisPipeline:
             logger.error(f"❌ Error during technical analysis execution: {e}", exc_info=True)
             return None, None
 
+    def _normalize_dates(self):
+        """Parses provider timestamps once at ingestion into naive-UTC `published_at` fields."""
+        tehran = ZoneInfo(settings.market_timezone)
+        normalize_timestamps(self.sahamyab_data.get("codal"), "publishDate", parse_persian_date, tz=tehran)
+        # Naive provider timestamps are Tehran wall time; offset-aware ones keep their offset.
+        normalize_timestamps(self.sahamyab_data.get("tweets"), "sendTime", parse_iso_date, tz=tehran)
+        normalize_timestamps(self.rahavard_data.get("news"), "date", parse_iso_date, tz=tehran)
+
     def _merge_sahamyab_extra_data(self):
         """Merges extra sahamyab fields into rahavard details structure."""
         try:
@@ -275,71 +365,202 @@ class StockAnalysisPipeline:
         except Exception as e:
             logger.warning(f"⚠️ Error merging extra data: {e}")
 
-    async def execute(self):
-        """Main execution method."""
-        logger.info(f"🚀 Starting Pipeline for Symbol: {self.symbol_name}")
-        
-        # 1. Critical Data
-        success = await self.fetch_rahavard_data()
-        if not success:
-            logger.error("🛑 Stopping pipeline due to missing Rahavard data.")
-            return
-
-        # 2. Secondary Data (Parallel)
-        await asyncio.gather(
-            self.fetch_sahamyab_data(),
-            self.fetch_external_search()
+    async def _load_base_document(self) -> dict:
+        document = await self.mongo_manager.read_data(
+            {"symbol": self.symbol_name},
+            limit=1,
+            sort=[("analysis_datetime", -1)],
+            projection=BASE_DOCUMENT_PROJECTION,
         )
+        return document or {}
+
+    def _legacy_section_timestamps(self, refreshed: list[str]) -> dict:
+        """
+        First section-level write to a document from before `section_updated_at`: the sections
+        not refreshed now keep their age from the old `analysis_datetime`, which this write moves.
+        """
+        if not self.base_document or self.base_document.get("section_updated_at"):
+            return {}
+        fields = {}
+        for section in SECTIONS:
+            if section in refreshed:
+                continue
+            written_at = FreshnessPolicy.section_timestamp(self.base_document, section)
+            if written_at is not None:
+                fields[f"section_updated_at.{section}"] = written_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return fields
+
+    def _identity_fields(self) -> dict:
+        info = self.rahavard_data.get("info")
+        if not info:
+            return {key: self.base_document.get(key) for key in ("_id", "rahavard_asset_id", "symbol", "short_name")}
+        return {
+            '_id': f'{info["trade_symbol"]}_{info["id"]}',
+            "rahavard_asset_id": info['id'],
+            "symbol": info['trade_symbol'],
+            "short_name": info['short_name'],
+        }
+
+    def _current_price(self) -> int | None:
+        if self.df.empty:
+            self.df = self._transform_rahavard_to_df(self.rahavard_data.get('history'))
+        return int(self.df['close'].iloc[0]) if not self.df.empty else None
 
-        # 3. Technical Analysis
-        technicals, current_price = self.run_technical_analysis()
-        if not technicals:
-            logger.error("🛑 Stopping pipeline due to Technical Analysis failure.")
-            return
-
-        # 4. Merge Data
-        self._merge_sahamyab_extra_data()
-
-        # 5. Construct Final Document
-        try:
-            final_document = {
-                '_id': f'{self.rahavard_data["info"]["trade_symbol"]}_{self.rahavard_data["info"]["id"]}',
-                "rahavard_asset_id": self.rahavard_data["info"]['id'],
-                "symbol": self.rahavard_data["info"]['trade_symbol'],
-                "short_name": self.rahavard_data["info"]['short_name'],
-                "analysis_datetime": datetime.now(),
-                "data_points_analyzed": len(self.df),
-                "price_history": self.rahavard_data.get('history', [])[:180],
+    def _section_fields(self, section: str, technicals: dict | None, current_price: int | None) -> dict:
+        """Top-level document fields written when `section` is refreshed."""
+        if section == "market_data":
+            return {
                 "market_data": {
                     "current_price": current_price,
-                    "general_snapshot": self.rahavard_data.get('details')
-                },
-                "technical_analysis": technicals,
+                    "general_snapshot": {
+                        key: value for key, value in (self.rahavard_data.get('details') or {}).items()
+                        if key in SNAPSHOT_SUMMARY_FIELDS
+                    },
+                }
+            }
+        if section == "technical_analysis":
+            support_resistance = {
+                key: value for key, value in (technicals.get("support_resistance") or {}).items()
+                if key != "raw_pivots_debug"
+            }
+            return {
+                "data_points_analyzed": len(self.df),
+                "technical_analysis": {**technicals, "support_resistance": support_resistance},
+            }
+        if section == "fundamental_analysis":
+            return {
                 "fundamental_analysis": {
                     "balance_sheet": self.rahavard_data.get("balance"),
                     "profit_loss": self.rahavard_data.get("profit_loss"),
                     "cash_flow": self.rahavard_data.get("cash_flow"),
                     "financial_ratios": self.rahavard_data.get("ratios")
-                },
+                }
+            }
+        if section == "social_post":
+            return {
                 "social_post": {
-                    "latest_sahamyab_tweet": self.sahamyab_data.get('tweets'),
-                    "rapid_tweets": self.external_data.get('rapid_tweets')
-                },
+                    "sahamyab_post_count": len(self.sahamyab_data.get('tweets') or []),
+                    "rapid_tweet_count": len(self.external_data.get('rapid_tweets') or []),
+                }
+            }
+        if section == "news_announcements":
+            return {
                 "news_announcements": {
-                    "news": self.rahavard_data.get('news'),
-                    "codal": self.sahamyab_data.get("codal")
-                },
+                    "news_count": len(self.rahavard_data.get('news') or []),
+                    "codal_count": len(self.sahamyab_data.get("codal") or []),
+                }
+            }
+        if section == "search":
+            return {
                 "search": {
                     "tavily": self.external_data.get('tavily')
                 }
             }
+        return {}
 
-            # 6. Save to DB
-            await self.mongo_manager.upsert_data(final_document)
+    def _detail_fields(self, section: str, technicals: dict | None) -> dict:
+        """Bulky payloads of `section`, stored in the detail collections (see SymbolDetailStore)."""
+        if section == "technical_analysis":
+            return {"bars": {
+                "price_history": self.rahavard_data.get('history', [])[:180],
+                "raw_pivots_debug": (technicals.get("support_resistance") or {}).get("raw_pivots_debug"),
+            }}
+        if section == "market_data":
+            return {"snapshot": {"general_snapshot": self.rahavard_data.get('details')}}
+        if section == "social_post":
+            return {"posts": {
+                "latest_sahamyab_tweet": self.sahamyab_data.get('tweets'),
+                "rapid_tweets": self.external_data.get('rapid_tweets'),
+            }}
+        if section == "news_announcements":
+            return {"news": {
+                "news": self.rahavard_data.get('news'),
+                "codal": self.sahamyab_data.get("codal"),
+            }}
+        return {}
+
+    async def execute(self, sections: list[str] | None = None, projection: dict | None = None) -> dict | None:
+        """
+        Main execution method. Refreshes `sections` (all of them by default) and returns the
+        stored document after the update (limited to `projection`), or None if the run failed.
+        Each section is fetched from only the endpoints listed in SECTION_ENDPOINTS and written
+        with a `$set` of its own fields and its `section_updated_at` entry.
+        """
+        sections = [section for section in SECTIONS if not sections or section in sections]
+        if len(sections) < len(SECTIONS):
+            self.base_document = await self._load_base_document()
+            if not self.base_document:
+                logger.info("No stored document to merge into; running a full refresh.")
+                sections = list(SECTIONS)
+        endpoints = endpoints_for(sections)
+
+        logger.info(f"🚀 Starting Pipeline for Symbol: {self.symbol_name} (sections: {sections})")
+        
+        # 1. Critical Data (also resolves the asset id for new symbols)
+        if "rahavard" in endpoints or not self.base_document:
+            success = await self.fetch_rahavard_data(endpoints.get("rahavard", set()))
+            if not success:
+                logger.error("🛑 Stopping pipeline due to missing Rahavard data.")
+                return None
+
+        # 2. Secondary Data (Parallel), while the fetched bars are appended to the time-series store
+        await asyncio.gather(
+            self.store_time_series(),
+            self.fetch_sahamyab_data(endpoints["sahamyab"]) if "sahamyab" in endpoints else asyncio.sleep(0),
+            self.fetch_external_search(twitter="twitter" in endpoints, tavily="tavily" in endpoints)
+            if {"twitter", "tavily"} & endpoints.keys() else asyncio.sleep(0),
+        )
+
+        # 3. Technical Analysis
+        technicals, current_price = None, None
+        if "technical_analysis" in sections:
+            technicals, current_price = self.run_technical_analysis()
+            if not technicals:
+                logger.error("🛑 Stopping pipeline due to Technical Analysis failure.")
+                return None
+        elif "market_data" in sections:
+            current_price = self._current_price()
+
+        # 4. Merge Data
+        if "market_data" in sections:
+            self._merge_sahamyab_extra_data()
+        self._normalize_dates()
+
+        # 5. Construct the partial update
+        try:
+            identity = self._identity_fields()
+            refreshed_at = datetime.utcnow()
+            fields = {
+                **{key: value for key, value in identity.items() if key != "_id"},
+                "analysis_datetime": datetime.now(),
+            }
+            details = {}
+            for section in sections:
+                fields.update(self._section_fields(section, technicals, current_price))
+                fields[f"section_updated_at.{section}"] = refreshed_at
+                details.update(self._detail_fields(section, technicals))
+            fields.update(self._legacy_section_timestamps(sections))
+
+            # 6. Save to DB: details first, so a section is only marked fresh once its payload is stored
+            if details and not await symbol_details.write_many(identity["_id"], identity["symbol"], details):
+                logger.error("🛑 Failed to store detail documents; the summary is left unchanged.")
+                return None
+
+            document = await self.mongo_manager.set_fields(
+                identity["_id"], fields, projection=projection,
+                # price bars used to be embedded in the summary
+                unset=["price_history"] if "technical_analysis" in sections else None,
+            )
+            if not document:
+                symbol_data_cache.invalidate(identity["symbol"])
+                return None
+
+            symbol_data_cache.set(identity["symbol"], document)
+            return document
 
         except Exception as e:
             logger.critical(f"❌ Error constructing or saving final document: {e}", exc_info=True)
-
+            return None
 
 if __name__ == "__main__":
     target_symbol = "فملی"
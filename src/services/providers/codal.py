@@ -0,0 +1,102 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from aiohttp import ClientSession, ClientTimeout
+from bs4 import BeautifulSoup
+
+try:
+    from src.core.logger import logger
+except ImportError:
+    logger = logging.getLogger("Finance Agent System")
+    logging.basicConfig(level=logging.INFO)
+
+from src.core.config import settings
+from src.utils.proxy import (
+    build_proxy_connector,
+    normalize_proxy_url,
+    proxy_request_kwargs,
+)
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Parsing Codal pages is CPU-bound; keep it off the event loop.
+_parse_pool = ThreadPoolExecutor(max_workers=settings.codal_parse_workers, thread_name_prefix="codal-parse")
+
+
+def parse_codal_html(content: bytes) -> str:
+    """Extracts the text of all <p> tags from a Codal report page."""
+    soup = BeautifulSoup(content, HTML_PARSER)
+    p_tags = soup.find_all('p')
+
+    final_text = []
+    for p in p_tags:
+        text = p.get_text(separator="\n", strip=True)
+        if text:
+            final_text.append(text)
+
+    return "\n".join(final_text)
+
+
+class CodalClient:
+    """
+    Async scraper for Codal report pages.
+    One pooled session per client, at most `max_concurrency` downloads at a time,
+    a single attempt per URL bounded by `timeout`, and parsing in a thread pool.
+    """
+    def __init__(
+        self,
+        timeout: float = settings.codal_request_timeout_seconds,
+        max_concurrency: int = settings.codal_max_concurrency,
+        proxy_url: Optional[str] = settings.proxy_url,
+    ):
+        self.timeout = ClientTimeout(total=timeout)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.session: Optional[ClientSession] = None
+        self.proxy_url = normalize_proxy_url(proxy_url)
+        self.max_concurrency = max_concurrency
+
+    async def __aenter__(self):
+        self.session = ClientSession(
+            headers=settings.default_headers,
+            timeout=self.timeout,
+            connector=build_proxy_connector(self.proxy_url, limit=self.max_concurrency),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.session:
+            await self.session.close()
+
+    async def fetch_report(self, url: str) -> str:
+        """Downloads and parses one report. Raises on HTTP errors or timeout."""
+        async with self.semaphore:
+            logger.info(f"Scraping Codal report: {url}")
+            async with self.session.get(
+                url,
+                ssl=False,
+                **proxy_request_kwargs(self.proxy_url),
+            ) as response:
+                response.raise_for_status()
+                content = await response.read()
+
+        text = await asyncio.get_running_loop().run_in_executor(_parse_pool, parse_codal_html, content)
+        logger.debug(f"Parsed {len(text)} characters from {url}.")
+        return text
+
+    async def fetch_reports(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        """Scrapes all URLs concurrently; failed or timed-out reports map to None."""
+        results = await asyncio.gather(*(self.fetch_report(url) for url in urls), return_exceptions=True)
+        reports: Dict[str, Optional[str]] = {}
+        for url, result in zip(urls, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"⚠️ Failed to scrape {url}: {result!r}")
+                reports[url] = None
+            else:
+                reports[url] = result
+        return reports
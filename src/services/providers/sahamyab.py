@@ -174,9 +174,17 @@ class SahamyabClient:
             logger.error(f"Error fetching overall info for {symbol}: {e}")
             return None
 
-    async def get_tweets(self, symbol: str, page: int = 0, last_tweet_id: Optional[str] = None) -> List[Dict]:
+    async def get_tweets(
+        self,
+        symbol: str,
+        page: int = 0,
+        last_tweet_id: Optional[str] = None,
+        include_media: bool = False,
+        raise_errors: bool = False,
+    ) -> List[Dict]:
         """
         Fetches user comments/tweets about the symbol.
+        Posts with media are dropped unless `include_media` is set.
         """
         url = f'guest/twiter/list'
         params = {'v': '0.1'}
@@ -192,6 +200,9 @@ class SahamyabClient:
             data = await self._request('POST', url, params=params, json_data=payload)
             
             items = data.get('items', [])
+            if include_media:
+                return items
+
             # Filter out items with media content (as per original logic)
             filtered_items = [
                 item for item in items 
@@ -201,6 +212,8 @@ class SahamyabClient:
             return filtered_items
         except Exception as e:
             logger.error(f"Error fetching tweets for {symbol}: {e}")
+            if raise_errors:
+                raise
             return []
 
     async def get_codal_notices(self, symbol: str, cleaned: bool = True) -> List[Dict]:
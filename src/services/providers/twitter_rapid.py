@@ -1,7 +1,7 @@
 import asyncio
 import json
 from datetime import date, datetime
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Tuple, Union, Any
 import aiohttp
 from aiohttp import ClientSession, ClientTimeout, TCPConnector
 import logging
@@ -109,57 +109,88 @@ class TwitterRapidClient:
             logger.error(f"Connection failed while calling Twitter RapidAPI: {e}")
             raise
 
-    async def search_tweets(
-        self, 
-        query: str, 
-        start_date: Union[str, date], 
-        end_date: Union[str, date], 
+    def _clean_tweets(self, raw_results: List[Dict]) -> List[Dict]:
+        """Keeps Persian tweets, mapped to a clean dictionary structure."""
+        cleaned_tweets = []
+        for tweet in raw_results:
+            if tweet.get('language') == 'fa':
+                cleaned_tweets.append({
+                    'tweet_id': tweet.get('tweet_id'),
+                    'text': tweet.get('text'),
+                    'likes': tweet.get('favorite_count'),
+                    'retweets': tweet.get('retweet_count'),
+                    'views': tweet.get('views'),
+                    'replies': tweet.get('reply_count'),
+                    'created_at': tweet.get('creation_date'),
+                    'user': (tweet.get('user') or {}).get('username')
+                })
+        return cleaned_tweets
+
+    async def search_page(
+        self,
+        query: str,
+        start_date: Union[str, date],
+        end_date: Union[str, date],
         limit: int = 20,
         min_retweets: int = 1,
         min_likes: int = 1,
-        section: str = "top"
-    ) -> List[Dict]:
+        section: str = "top",
+        continuation_token: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
         """
-        Search for tweets using specific filters.
+        Fetches one result page. Returns (tweets, continuation token of the next page or None).
+        Errors are raised so callers can decide how to degrade.
         """
-        formatted_start = self._format_date(start_date)
-        formatted_end = self._format_date(end_date)
-        
         params = {
             "query": query,
             "section": section,
             "min_retweets": str(min_retweets),
             "min_likes": str(min_likes),
             "limit": str(limit),
-            "start_date": formatted_start,
-            "end_date": formatted_end
+            "start_date": self._format_date(start_date),
+            "end_date": self._format_date(end_date)
         }
+        endpoint = 'search'
+        if continuation_token:
+            endpoint = 'search/continuation'
+            params["continuation_token"] = continuation_token
 
-        logger.info(f"Searching tweets for '{query}' from {formatted_start} to {formatted_end}")
+        data = await self._request(endpoint, params)
+        raw_results = data.get('results', [])
+        next_token = data.get('continuation_token') if raw_results else None
+        return self._clean_tweets(raw_results), next_token
 
-        try:
-            data = await self._request('search',params)
-            
-            raw_results = data.get('results', [])
-            
-            # Map to clean dictionary structure
-            cleaned_tweets = []
-            for tweet in raw_results:
-                if tweet.get('language') == 'fa':
-                    tweet_info = {
-                        'text': tweet.get('text'),
-                        'likes': tweet.get('favorite_count'),
-                        'retweets': tweet.get('retweet_count'),
-                        'views': tweet.get('views'),
-                        'replies': tweet.get('reply_count'),
-                        'created_at': tweet.get('creation_date'), 
-                        'user': tweet.get('user', {}).get('username') 
-                }
-                    cleaned_tweets.append(tweet_info)
-            
-            logger.info(f"Successfully retrieved {len(cleaned_tweets)} tweets.")
-            return cleaned_tweets
+    async def search_tweets(
+        self, 
+        query: str, 
+        start_date: Union[str, date], 
+        end_date: Union[str, date], 
+        limit: int = 20,
+        min_retweets: int = 1,
+        min_likes: int = 1,
+        section: str = "top",
+        max_pages: int = 1
+    ) -> List[Dict]:
+        """
+        Search for tweets using specific filters, following the continuation token for up to `max_pages` pages.
+        """
+        logger.info(f"Searching tweets for '{query}' from {self._format_date(start_date)} to {self._format_date(end_date)}")
 
+        cleaned_tweets: List[Dict] = []
+        token = None
+        try:
+            for _ in range(max_pages):
+                page, token = await self.search_page(
+                    query, start_date, end_date, limit=limit, min_retweets=min_retweets,
+                    min_likes=min_likes, section=section, continuation_token=token,
+                )
+                cleaned_tweets.extend(page)
+                if not token:
+                    break
         except Exception as e:
             logger.error(f"Failed to fetch tweets for query '{query}': {e}")
-            return []
+            if not cleaned_tweets:
+                return []
+
+        logger.info(f"Successfully retrieved {len(cleaned_tweets)} tweets.")
+        return cleaned_tweets
@@ -0,0 +1,171 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.mongo_manger import MongoManager
+from src.services.freshness import TehranMarketCalendar, freshness_policy, market_calendar
+
+
+class PrewarmScheduler:
+    """
+    Keeps popular symbols warm so user requests skip the fetch phase.
+
+    Popularity is the number of recent agent runs per symbol (`agent_runs`), plus a
+    baseline for symbols analyzed recently (`market_analysis`). From `lead_minutes`
+    before the session opens until it closes, every `interval_seconds` the top-N
+    symbols are refreshed through `refresh(symbol)`, at most `concurrency` at a time,
+    each start delayed by a random jitter so providers are not hit in one burst.
+    """
+    def __init__(
+        self,
+        calendar: TehranMarketCalendar,
+        top_n: int = settings.prewarm_top_n,
+        concurrency: int = settings.prewarm_concurrency,
+        interval_seconds: float = settings.prewarm_interval_seconds,
+        lead_minutes: int = settings.prewarm_lead_minutes,
+        jitter_seconds: float = settings.prewarm_jitter_seconds,
+        lookback_days: int = settings.prewarm_lookback_days,
+    ):
+        self.calendar = calendar
+        self.top_n = top_n
+        self.concurrency = concurrency
+        self.interval_seconds = interval_seconds
+        self.lead = timedelta(minutes=lead_minutes)
+        self.jitter_seconds = jitter_seconds
+        self.lookback_days = lookback_days
+        self._refresh: Optional[Callable[[str], Awaitable[Any]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ranking: List[Dict[str, Any]] = []
+        self._queued: List[str] = []
+        self._in_progress: set[str] = set()
+        self._failed: List[str] = []
+        self._completed = 0
+        self._last_cycle_started_at: Optional[datetime] = None
+        self._last_cycle_finished_at: Optional[datetime] = None
+        self._next_run_at: Optional[datetime] = None
+
+    async def popular_symbols(self) -> List[Dict[str, Any]]:
+        """Top-N symbols by recent agent runs, with recently analyzed symbols as a baseline."""
+        # Agent runs are stamped in UTC, summary documents in local time.
+        window = timedelta(days=self.lookback_days)
+        runs = await MongoManager(settings.mongo_agent_run_collection_name).aggregate([
+            {"$match": {"updated_at": {"$gte": datetime.utcnow() - window}, "symbol": {"$nin": [None, ""]}}},
+            {"$group": {"_id": "$symbol", "runs": {"$sum": 1}}},
+        ])
+        analyzed = await MongoManager().aggregate([
+            {"$match": {"analysis_datetime": {"$gte": datetime.now() - window}}},
+            {"$project": {"_id": 0, "symbol": 1}},
+        ])
+
+        scores: Dict[str, float] = {}
+        for row in runs:
+            scores[row["_id"]] = scores.get(row["_id"], 0.0) + row["runs"]
+        for row in analyzed:
+            if row.get("symbol"):
+                scores[row["symbol"]] = scores.get(row["symbol"], 0.0) + 1.0
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[: self.top_n]
+        return [{"symbol": symbol, "score": score} for symbol, score in ranked]
+
+    async def _warm(self, symbol: str, semaphore: asyncio.Semaphore) -> None:
+        await asyncio.sleep(random.uniform(0, self.jitter_seconds))
+        async with semaphore:
+            self._queued.remove(symbol)
+            self._in_progress.add(symbol)
+            try:
+                # The orchestrator's load path logs its own errors and returns None, or the last
+                # stored copy when the refresh failed, so a symbol only counts as warm once its
+                # returned document has no stale sections left.
+                document = await self._refresh(symbol)
+                stale = freshness_policy.stale_sections(symbol, document) if document else None
+                if stale is None:
+                    logger.warning(f"⚠️ Pre-warm failed for '{symbol}': no data returned.")
+                    self._failed.append(symbol)
+                elif stale:
+                    logger.warning(f"⚠️ Pre-warm failed for '{symbol}': sections still stale {stale}.")
+                    self._failed.append(symbol)
+                else:
+                    self._completed += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Pre-warm failed for '{symbol}': {e}")
+                self._failed.append(symbol)
+            finally:
+                self._in_progress.discard(symbol)
+
+    async def run_cycle(self) -> None:
+        """Ranks symbols and refreshes the top-N once."""
+        self._last_cycle_started_at = datetime.utcnow()
+        self._completed = 0
+        self._failed = []
+        self._ranking = await self.popular_symbols()
+        self._queued = [row["symbol"] for row in self._ranking]
+        logger.info(f"🔥 Pre-warming {len(self._queued)} symbols: {self._queued}")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._warm(symbol, semaphore) for symbol in list(self._queued)))
+
+        self._last_cycle_finished_at = datetime.utcnow()
+        logger.info(f"🔥 Pre-warm cycle done: {self._completed} refreshed, {len(self._failed)} failed.")
+        logger.info(f"🔥 Pre-warm status: {self.status()}")
+
+    def _in_window(self, now: datetime) -> bool:
+        """True from `lead` before the open until the close of a trading day."""
+        if self.calendar.is_open(now):
+            return True
+        return self.calendar.next_open(now) - now <= self.lead
+
+    def _next_wake(self, now: datetime) -> datetime:
+        if self._in_window(now):
+            return now + timedelta(seconds=self.interval_seconds)
+        return self.calendar.next_open(now) - self.lead
+
+    async def _loop(self) -> None:
+        while True:
+            now = self.calendar.now()
+            if self._in_window(now):
+                try:
+                    await self.run_cycle()
+                except Exception as e:
+                    logger.error(f"❌ Pre-warm cycle failed: {e}", exc_info=True)
+                now = self.calendar.now()
+            self._next_run_at = self._next_wake(now)
+            await asyncio.sleep(max((self._next_run_at - now).total_seconds(), 1.0))
+
+    def start(self, refresh: Callable[[str], Awaitable[Any]]) -> None:
+        """Starts the background loop; `refresh(symbol)` is the orchestrator's load path."""
+        if self._task is not None and not self._task.done():
+            return
+        self._refresh = refresh
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+        logger.info("🔥 Pre-warm scheduler started.")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("🔥 Pre-warm scheduler stopped.")
+
+    def status(self) -> Dict[str, Any]:
+        """Snapshot of the scheduler's queue for monitoring."""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "ranking": list(self._ranking),
+            "queued": list(self._queued),
+            "in_progress": sorted(self._in_progress),
+            "completed": self._completed,
+            "failed": list(self._failed),
+            "last_cycle_started_at": self._last_cycle_started_at,
+            "last_cycle_finished_at": self._last_cycle_finished_at,
+            "next_run_at": self._next_run_at,
+        }
+
+
+prewarm_scheduler = PrewarmScheduler(market_calendar)
@@ -0,0 +1,166 @@
+import hashlib
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.core.config import settings
+from src.utils.text import normalize_persian_text
+
+# Finance-oriented Persian/English polarity lexicon. Multi-word phrases are matched on
+# normalized text, single words on tokens.
+POSITIVE_TERMS = {
+    "صف خرید", "خرید", "صعود", "صعودی", "رشد", "سود", "سودده", "مثبت", "حمایت", "افزایش",
+    "ارزنده", "ارزان", "قوی", "عالی", "سبز", "برگشت", "پول هوشمند", "ورود پول", "بازدهی",
+    "نگه دارید", "نفروشید", "هدف", "سقف جدید", "رکورد", "بالا",
+    "bullish", "buy", "long", "breakout", "strong",
+}
+NEGATIVE_TERMS = {
+    "صف فروش", "فروش", "ریزش", "نزولی", "نزول", "سقوط", "زیان", "ضرر", "منفی", "کاهش",
+    "ضعیف", "قرمز", "افت", "ترس", "خروج پول", "فرار", "دستکاری", "رانت", "تخلف", "کلاهبرداری",
+    "گران", "حباب", "توقف", "پایین",
+    "bearish", "sell", "short", "dump", "weak",
+}
+_TOKEN = re.compile(r"[\w#@]+", re.UNICODE)
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _term_hits(normalized: str, tokens: Sequence[str], terms: set) -> int:
+    token_set = set(tokens)
+    return sum(
+        (term in normalized) if " " in term else (term in token_set)
+        for term in terms
+    )
+
+
+def lexicon_score(normalized: str) -> float:
+    """(positive - negative) / (positive + negative) hits, 0.0 when the post has no polar terms."""
+    tokens = _tokens(normalized)
+    positive = _term_hits(normalized, tokens, POSITIVE_TERMS)
+    negative = _term_hits(normalized, tokens, NEGATIVE_TERMS)
+    total = positive + negative
+    return (positive - negative) / total if total else 0.0
+
+
+def simhash(normalized: str) -> int:
+    """64-bit SimHash over word unigrams and bigrams."""
+    tokens = _tokens(normalized)
+    features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    if not features:
+        return 0
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "big") for f in features],
+        dtype=np.uint64,
+    )
+    bits = ((hashes[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)).astype(np.int8)
+    votes = (2 * bits - 1).sum(axis=0)
+    return int(sum(1 << i for i in np.flatnonzero(votes > 0)))
+
+
+def dedupe_near_duplicates(fingerprints: List[int], max_distance: int = 3) -> Tuple[List[int], List[int]]:
+    """
+    Groups fingerprints within `max_distance` Hamming bits. Returns (kept indices, group size per kept index).
+    Uses 4 x 16-bit bands: any pair within 3 bits shares at least one identical band.
+    Input order decides which member of a group is kept.
+    """
+    buckets: Dict[Tuple[int, int], List[int]] = {}
+    kept: List[int] = []
+    group_size: Dict[int, int] = {}
+    for index, fingerprint in enumerate(fingerprints):
+        bands = [(band, (fingerprint >> (16 * band)) & 0xFFFF) for band in range(4)]
+        duplicate_of = None
+        for key in bands:
+            for candidate in buckets.get(key, []):
+                if bin(fingerprints[candidate] ^ fingerprint).count("1") <= max_distance:
+                    duplicate_of = candidate
+                    break
+            if duplicate_of is not None:
+                break
+
+        if duplicate_of is None:
+            kept.append(index)
+            group_size[index] = 1
+            for key in bands:
+                buckets.setdefault(key, []).append(index)
+        else:
+            group_size[duplicate_of] += 1
+    return kept, [group_size[index] for index in kept]
+
+
+def summarize_posts(
+    posts: List[Dict[str, Any]],
+    text_key: str,
+    engagement_keys: Sequence[str],
+    time_key: Optional[str] = None,
+    sample_size: int = settings.social_sample_size,
+    max_distance: int = settings.social_simhash_max_distance,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Local pre-processing of all fetched posts before the LLM sees them.
+
+    Normalizes text, drops near-duplicates (SimHash), scores each unique post with the
+    lexicon and aggregates volume, engagement and sentiment with numpy. `time_key` must
+    hold parsed datetimes. Returns (stats, sample) where the sample is a diverse set of
+    unique posts: the most engaged posts taken round-robin from the bullish, bearish and
+    neutral groups.
+    """
+    texts = [normalize_persian_text(str(post.get(text_key) or "")) for post in posts]
+    candidates = [i for i, text in enumerate(texts) if text]
+    if not candidates:
+        return {"total_posts": len(posts), "unique_posts": 0}, []
+
+    engagement_all = np.array(
+        [sum(float(posts[i].get(key) or 0) for key in engagement_keys) for i in candidates]
+    )
+    # Most engaged copy of a near-duplicate group is the one kept.
+    order = [candidates[j] for j in np.argsort(-engagement_all, kind="stable")]
+    kept, group_sizes = dedupe_near_duplicates([simhash(texts[i]) for i in order], max_distance)
+    unique = [order[k] for k in kept]
+
+    scores = np.array([lexicon_score(texts[i]) for i in unique])
+    engagement = np.array([sum(float(posts[i].get(key) or 0) for key in engagement_keys) for i in unique])
+    weights = np.log1p(engagement) + 1.0
+    repeats = np.array(group_sizes)
+
+    stats: Dict[str, Any] = {
+        "total_posts": len(posts),
+        "unique_posts": len(unique),
+        "duplicate_ratio": round(1 - len(unique) / len(candidates), 3),
+        "max_repeats_of_one_text": int(repeats.max()),
+        "mean_sentiment": round(float(scores.mean()), 3),
+        "engagement_weighted_sentiment": round(float(np.average(scores, weights=weights)), 3),
+        "bullish_share": round(float((scores > 0.2).mean()), 3),
+        "bearish_share": round(float((scores < -0.2).mean()), 3),
+        "neutral_share": round(float((np.abs(scores) <= 0.2).mean()), 3),
+        "total_engagement": int(engagement.sum()),
+        "median_engagement": float(np.median(engagement)),
+    }
+
+    if time_key:
+        times = [posts[i].get(time_key) for i in unique]
+        days = np.array([t.date().toordinal() for t in times if isinstance(t, datetime)])
+        if days.size:
+            counts = np.bincount(days - days.min())
+            stats["posts_per_day"] = round(float(counts.mean()), 2)
+            stats["busiest_day_posts"] = int(counts.max())
+            stats["span_days"] = int(counts.size)
+
+    groups = [
+        [i for i, score in zip(unique, scores) if score > 0.2],
+        [i for i, score in zip(unique, scores) if score < -0.2],
+        [i for i, score in zip(unique, scores) if abs(score) <= 0.2],
+    ]
+    sample: List[int] = []
+    while len(sample) < sample_size and any(groups):
+        for group in groups:
+            if group and len(sample) < sample_size:
+                sample.append(group.pop(0))
+
+    score_by_index = dict(zip(unique, scores))
+    return stats, [
+        {**posts[i], "lexicon_sentiment": round(float(score_by_index[i]), 2)} for i in sample
+    ]
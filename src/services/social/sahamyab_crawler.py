@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from zoneinfo import ZoneInfo
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.mongo_manger import MongoManager
+from src.services.providers.sahamyab import SahamyabClient
+from src.utils.helper import item_timestamp, parse_iso_date
+
+
+class SahamyabTweetCrawler:
+    """
+    Incremental crawler for Sahamyab posts of a symbol.
+
+    Pages are requested `concurrency` at a time (newest first) until a page is empty,
+    `max_pages` is reached, or posts fall behind the stop point: the symbol's
+    high-water mark from the last crawl, or `lookback_days` ago on the first one.
+    Posts are upserted into the tweet collection by id, so page overlap is harmless.
+    The cursor advances to the newest post seen only when the crawl reached the stop
+    point (or an empty page) and the store write succeeded; otherwise the old mark is
+    kept, so the next run re-crawls down to it and fills the gap.
+    """
+    def __init__(
+        self,
+        lookback_days: int = settings.sahamyab_crawl_lookback_days,
+        max_pages: int = settings.sahamyab_crawl_max_pages,
+        concurrency: int = settings.sahamyab_crawl_concurrency,
+    ):
+        self.lookback_days = lookback_days
+        self.max_pages = max_pages
+        self.concurrency = concurrency
+
+    @staticmethod
+    def _cursor_id(symbol: str) -> str:
+        return f"sahamyab:{symbol}"
+
+    def _to_document(self, symbol: str, item: Dict[str, Any], published_at: datetime) -> Dict[str, Any]:
+        return {
+            **item,
+            "_id": f"{symbol}:{item['id']}",
+            "symbol": symbol,
+            "tweet_id": str(item["id"]),
+            "published_at": published_at,
+            "has_media": bool(item.get("mediaContentType")),
+        }
+
+    async def crawl(self, client: SahamyabClient, symbol: str) -> int:
+        """Fetches posts newer than the cursor and stores them. Returns the number of new posts."""
+        cursors = MongoManager(settings.mongo_crawl_cursor_collection_name)
+        cursor = await cursors.read_data({"_id": self._cursor_id(symbol)}) or {}
+        stop_at = datetime.utcnow() - timedelta(days=self.lookback_days)
+        if cursor.get("last_published_at") and cursor["last_published_at"] > stop_at:
+            stop_at = cursor["last_published_at"]
+
+        tehran = ZoneInfo(settings.market_timezone)
+        documents: Dict[str, Dict[str, Any]] = {}
+        page, done, complete = 0, False, False
+        while not done and page < self.max_pages:
+            pages = list(range(page, min(page + self.concurrency, self.max_pages)))
+            results = await asyncio.gather(
+                *(client.get_tweets(symbol, page=p, include_media=True, raise_errors=True) for p in pages),
+                return_exceptions=True,
+            )
+            for p, items in zip(pages, results):
+                if isinstance(items, Exception):
+                    logger.warning(f"⚠️ Sahamyab crawl stopped at page {p} for {symbol}: {items}")
+                    done = True
+                    break
+                if not items:
+                    done = complete = True
+                    break
+                for item in items:
+                    published_at = item_timestamp(item, "sendTime", parse_iso_date, tz=tehran)
+                    if published_at is None or item.get("id") is None:
+                        continue
+                    if published_at <= stop_at:
+                        done = complete = True
+                        continue
+                    document = self._to_document(symbol, item, published_at)
+                    documents[document["_id"]] = document
+                if done:
+                    break
+            page += len(pages)
+
+        if not documents:
+            logger.info(f"💬 No new Sahamyab posts for {symbol} since {stop_at:%Y-%m-%d %H:%M} UTC.")
+            return 0
+
+        try:
+            inserted = await MongoManager(settings.mongo_tweet_collection_name).bulk_upsert(
+                list(documents.values()), raise_errors=True
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Storing Sahamyab posts for {symbol} failed; cursor kept at {stop_at:%Y-%m-%d %H:%M} UTC: {e}")
+            return 0
+
+        if complete:
+            newest = max(documents.values(), key=lambda document: document["published_at"])
+            await cursors.set_fields(self._cursor_id(symbol), {
+                "last_published_at": newest["published_at"],
+                "last_tweet_id": newest["tweet_id"],
+                "updated_at": datetime.utcnow(),
+            })
+        else:
+            logger.warning(
+                f"⚠️ Sahamyab crawl for {symbol} stopped after {page} pages before reaching "
+                f"{stop_at:%Y-%m-%d %H:%M} UTC; cursor kept so the gap is re-crawled next run."
+            )
+        logger.info(f"💬 Crawled {page} Sahamyab pages for {symbol}: {inserted} new posts stored.")
+        return inserted
+
+    async def recent(self, symbol: str, limit: int = settings.sahamyab_tweets_limit) -> List[Dict[str, Any]]:
+        """Stored posts from the lookback window, newest first."""
+        since = datetime.utcnow() - timedelta(days=self.lookback_days)
+        posts = await MongoManager(settings.mongo_tweet_collection_name).read_data(
+            {"symbol": symbol, "published_at": {"$gte": since}},
+            limit=max(limit, 2),
+            sort=[("published_at", -1)],
+            projection={"_id": 0},
+        )
+        return (posts or [])[:limit]
+
+    async def sync(self, client: SahamyabClient, symbol: str) -> List[Dict[str, Any]]:
+        """Crawls new posts, then returns the recent window from the store."""
+        try:
+            await self.crawl(client, symbol)
+        except Exception as e:
+            logger.error(f"❌ Sahamyab crawl failed for {symbol}: {e}", exc_info=True)
+        return await self.recent(symbol)
+
+
+sahamyab_crawler = SahamyabTweetCrawler()
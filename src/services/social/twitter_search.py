@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.logger import logger
+from src.services.providers.twitter_rapid import TwitterRapidClient
+from src.utils.text import normalize_persian_text
+
+
+def plan_twitter_queries(symbol: str, names: Iterable[Optional[str]] = (), max_queries: int = settings.twitter_max_queries) -> List[str]:
+    """
+    Query variants for a symbol, most specific first: the ticker, its hashtag, then the
+    company names (quoted, and as a hashtag with underscores). Duplicates after Persian
+    normalization are dropped.
+    """
+    candidates = [symbol, f"#{symbol}"]
+    for name in names:
+        name = normalize_persian_text(name or "")
+        if not name or name == symbol:
+            continue
+        candidates.append(f'"{name}"')
+        candidates.append("#" + name.replace(" ", "_"))
+
+    queries: List[str] = []
+    seen = set()
+    for query in candidates:
+        key = normalize_persian_text(query).lower()
+        if key and key not in seen:
+            seen.add(key)
+            queries.append(query)
+    return queries[:max_queries]
+
+
+def _tweet_key(tweet: Dict[str, Any]) -> str:
+    if tweet.get("tweet_id"):
+        return str(tweet["tweet_id"])
+    text = f"{tweet.get('user')}:{tweet.get('created_at')}:{tweet.get('text')}"
+    return "text:" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class TwitterSearchService:
+    """
+    Fans a symbol's query variants out to RapidAPI concurrently, each following the
+    continuation token for up to `max_pages` pages. Results are cached per
+    (query, date window) and merged by tweet id; every tweet lists the queries that found it.
+    Each query is bounded by `query_timeout`, so a slow variant costs its own results only.
+    """
+    def __init__(
+        self,
+        max_pages: int = settings.twitter_max_pages_per_query,
+        query_timeout: float = settings.twitter_query_timeout_seconds,
+    ):
+        self.max_pages = max_pages
+        self.query_timeout = query_timeout
+        self._cache = TTLCache(
+            max_size=settings.twitter_cache_max_size,
+            ttl_seconds=settings.twitter_cache_ttl_seconds,
+        )
+
+    async def _search_query(
+        self, client: TwitterRapidClient, query: str, start_date: date, end_date: date
+    ) -> List[Dict[str, Any]]:
+        cache_key = (normalize_persian_text(query).lower(), str(start_date), str(end_date))
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Twitter cache hit for '{query}'.")
+            return cached
+
+        try:
+            tweets = await asyncio.wait_for(
+                client.search_tweets(query=query, start_date=start_date, end_date=end_date, max_pages=self.max_pages),
+                timeout=self.query_timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Twitter query '{query}' timed out after {self.query_timeout}s.")
+            return []
+        # search_tweets returns [] on errors, so empty results are not cached.
+        if tweets:
+            self._cache.set(cache_key, tweets)
+        return tweets
+
+    async def search(
+        self, symbol: str, names: Iterable[Optional[str]], start_date: date, end_date: date
+    ) -> List[Dict[str, Any]]:
+        queries = plan_twitter_queries(symbol, names)
+        async with TwitterRapidClient(base_url=settings.rapid_base_url) as client:
+            results = await asyncio.gather(
+                *(self._search_query(client, query, start_date, end_date) for query in queries)
+            )
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        for query, tweets in zip(queries, results):
+            for tweet in tweets:
+                key = _tweet_key(tweet)
+                if key not in merged:
+                    merged[key] = {**tweet, "matched_queries": []}
+                merged[key]["matched_queries"].append(query)
+
+        logger.info(
+            f"🐦 {len(queries)} Twitter queries for {symbol} returned "
+            f"{sum(len(tweets) for tweets in results)} tweets, {len(merged)} unique."
+        )
+        return list(merged.values())
+
+
+twitter_search = TwitterSearchService()
@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.mongo_manger import MongoManager
+
+# Detail kind -> (section that writes it, fields it holds, where older documents embedded them).
+DETAIL_KINDS: Dict[str, Dict[str, Any]] = {
+    "bars": {
+        "section": "technical_analysis",
+        "fields": ("price_history", "raw_pivots_debug"),
+        "legacy": {"price_history": "price_history"},
+    },
+    "news": {
+        "section": "news_announcements",
+        "fields": ("news", "codal"),
+        "legacy": {"news": "news_announcements.news", "codal": "news_announcements.codal"},
+    },
+    "snapshot": {
+        "section": "market_data",
+        "fields": ("general_snapshot",),
+        "legacy": {"general_snapshot": "market_data.general_snapshot"},
+    },
+    "posts": {
+        "section": "social_post",
+        "fields": ("rapid_tweets", "latest_sahamyab_tweet"),
+        "legacy": {"rapid_tweets": "social_post.rapid_tweets", "latest_sahamyab_tweet": "social_post.latest_sahamyab_tweet"},
+    },
+}
+
+
+def _collection_name(kind: str) -> str:
+    return {
+        "bars": settings.mongo_bars_collection_name,
+        "news": settings.mongo_news_collection_name,
+        "posts": settings.mongo_posts_collection_name,
+        "snapshot": settings.mongo_snapshot_collection_name,
+    }[kind]
+
+
+def _dotted_get(document: Dict[str, Any], path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(document, dict):
+            return None
+        document = document.get(part)
+    return document
+
+
+class SymbolDetailStore:
+    """
+    Bulky per-symbol payloads (price bars, news/Codal lists, social posts, the raw Rahavard
+    snapshot) kept out of the hot `market_analysis` summary document, one detail document
+    per kind sharing the summary's `_id`. Reads are cached per summary version (`section_updated_at`), so a
+    detail is fetched from Mongo once per refresh of its section.
+    """
+    def __init__(self):
+        self._cache = TTLCache(max_size=settings.symbol_cache_max_size * len(DETAIL_KINDS), ttl_seconds=settings.symbol_cache_ttl_seconds)
+
+    async def write(self, doc_id: str, symbol: str, kind: str, fields: Dict[str, Any]) -> bool:
+        document = await MongoManager(_collection_name(kind)).set_fields(
+            doc_id, {"symbol": symbol, **fields, "updated_at": datetime.utcnow()}, projection={"_id": 1}
+        )
+        return document is not None
+
+    async def write_many(self, doc_id: str, symbol: str, details: Dict[str, Dict[str, Any]]) -> bool:
+        """Writes every detail kind in `details` concurrently; True if all succeeded."""
+        results = await asyncio.gather(*(self.write(doc_id, symbol, kind, fields) for kind, fields in details.items()))
+        return all(results)
+
+    async def load(self, summary: Dict[str, Any], kind: str, fields: Optional[tuple] = None) -> Dict[str, Any]:
+        """
+        Detail fields of `kind` for a summary document (all of the kind's fields by default).
+        Falls back to the fields embedded in summaries written before the split.
+        """
+        spec = DETAIL_KINDS[kind]
+        fields = fields or spec["fields"]
+        doc_id = summary.get("_id")
+        version = (summary.get("section_updated_at") or {}).get(spec["section"])
+        cache_key = (kind, doc_id, str(version), fields)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        document = await MongoManager(_collection_name(kind)).read_data(
+            {"_id": doc_id}, projection={field: 1 for field in fields}
+        )
+        if document is None:
+            legacy = {field: spec["legacy"][field] for field in fields if field in spec["legacy"]}
+            if not legacy:
+                return {}
+            logger.info(f"📦 No '{kind}' detail document for {doc_id}; reading the embedded legacy fields.")
+            stored = await MongoManager().read_data({"_id": doc_id}, projection={path: 1 for path in legacy.values()}) or {}
+            document = {field: _dotted_get(stored, path) for field, path in legacy.items()}
+
+        details = {field: document.get(field) for field in fields}
+        self._cache.set(cache_key, details)
+        return details
+
+
+symbol_details = SymbolDetailStore()
@@ -0,0 +1,550 @@
+import math
+from typing import Any, Dict, List, Optional
+
+from src.schema.technical import (
+    OscillatorAgentOutput,
+    SmartMoneyAnalysis,
+    SupportResistanceAgentOutput,
+    TrendAgentOutput,
+    VolatilityAgentOutput,
+    VolumeAgentOutput,
+)
+
+# Distance (% of price) within which price counts as sitting on a level.
+NEAR_LEVEL_PCT = 2.0
+# Share of dojis in the visual window that reads as hesitation.
+DOJI_HESITATION_RATIO = 0.3
+
+
+def _get(data: Any, *path: str) -> Any:
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def _num(value: Any) -> Optional[float]:
+    """Float value, or None for missing/NaN inputs."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) or math.isinf(number) else number
+
+
+def _sign(value: Optional[float], dead_zone: float = 0.0) -> int:
+    if value is None or abs(value) <= dead_zone:
+        return 0
+    return 1 if value > 0 else -1
+
+
+def _doji_ratio(visual: Dict[str, Any]) -> Optional[float]:
+    return _num(_get(visual, "visuals", "doji_ratio"))
+
+
+def _confidence(agreement: float) -> str:
+    if agreement >= 0.8:
+        return "high"
+    if agreement >= 0.5:
+        return "medium"
+    return "low"
+
+
+# ---------- trend ----------
+
+def trend_rule_report(data: Dict[str, Any], visual: Dict[str, Any]) -> Optional[TrendAgentOutput]:
+    """
+    Trend direction is a vote of the EMA slopes, the EMA stack, the Ichimoku regime and
+    the swing structure; strength follows ADX, phase follows ADX slope and extension.
+    """
+    emas = data.get("trend_identity") or {}
+    if not emas:
+        return None
+    adx = _get(data, "momentum_strength", "adx_14") or {}
+    ichimoku = data.get("ichimoku_structure") or {}
+    geometry = data.get("market_geometry") or {}
+    atr = _get(data, "volatility_risk", "atr_14") or {}
+    doji_ratio = _doji_ratio(visual)
+
+    values = [_num(_get(emas, f"ema_{period}", "value")) for period in (10, 50, 100)]
+    if None not in values and values[0] > values[1] > values[2]:
+        ema_stack = "bullish (EMA10 > EMA50 > EMA100)"
+    elif None not in values and values[0] < values[1] < values[2]:
+        ema_stack = "bearish (EMA10 < EMA50 < EMA100)"
+    else:
+        ema_stack = "mixed"
+
+    votes = [_sign(_num(_get(emas, f"ema_{period}", "slope_atr_norm")), 0.1) for period in (10, 50, 100)]
+    votes.append(1 if ema_stack.startswith("bullish") else -1 if ema_stack.startswith("bearish") else 0)
+    votes.append({"bullish": 1, "bearish": -1}.get(ichimoku.get("regime"), 0))
+    votes.append({"uptrend": 1, "downtrend": -1}.get(geometry.get("regime"), 0))
+    score = sum(votes)
+    direction = "bullish" if score >= 2 else "bearish" if score <= -2 else "neutral"
+
+    adx_value, adx_slope = _num(adx.get("value")), _num(adx.get("slope"))
+    if adx_value is None or adx_value <= 25:
+        strength = "weak"
+    elif adx_value <= 35:
+        strength = "moderate"
+    elif adx_value <= 50:
+        strength = "strong"
+    else:
+        strength = "very_strong"
+
+    atr_percent = _num(atr.get("percent"))
+    ema50_distance = _num(_get(emas, "ema_50", "price_distance_pct"))
+    extended = ema50_distance is not None and atr_percent and abs(ema50_distance) > 3 * atr_percent
+    if extended:
+        phase = "extended"
+    elif (adx_slope or 0) > 0:
+        phase = "early" if (adx_value or 0) <= 25 else "developing"
+    else:
+        phase = "mature"
+
+    causes = [
+        f"EMA stack {ema_stack}; " + ", ".join(
+            f"EMA{period} {_get(emas, f'ema_{period}', 'regime')} (slope {_get(emas, f'ema_{period}', 'slope_atr_norm')} ATR, "
+            f"price {_get(emas, f'ema_{period}', 'price_distance_pct')}% away)"
+            for period in (10, 50, 100) if f"ema_{period}" in emas
+        ),
+    ]
+    if adx:
+        causes.append(f"ADX14 {adx.get('value')} ({adx.get('regime')}, {adx.get('trend_quality')}, slope {adx.get('slope')})")
+    if ichimoku:
+        causes.append(
+            f"Ichimoku {ichimoku.get('regime')}: price {_get(ichimoku, 'features', 'price_vs_cloud_pct')}% vs cloud top, "
+            f"cloud {ichimoku.get('stability')}"
+        )
+    if geometry:
+        causes.append(
+            f"Market structure {geometry.get('regime')} ({geometry.get('integrity')}), "
+            f"{geometry.get('bars_since_last_structure_break')} bars since the last swing"
+        )
+    if atr:
+        causes.append(f"ATR14 {atr.get('percent')}% of price ({atr.get('regime')} volatility)")
+
+    flags = []
+    if extended:
+        flags.append(f"overextension: price {ema50_distance}% from EMA50 vs ATR {atr_percent}%")
+    if geometry.get("integrity") == "fragile":
+        flags.append(f"fragile structure ({geometry.get('regime')})")
+    if (_num(atr.get("slope_atr_norm")) or 0) > 0.2:
+        flags.append(f"volatility expansion: ATR up {round(atr['slope_atr_norm'] * 100)}% over 14 bars")
+    if adx.get("trend_quality") == "decaying" and (adx_value or 0) > 25:
+        flags.append("late-stage trend: ADX above 25 but decaying")
+    if doji_ratio is not None and doji_ratio >= DOJI_HESITATION_RATIO:
+        flags.append(f"exhaustion risk: doji ratio {doji_ratio}")
+
+    available = sum(1 for vote in votes if vote) or 1
+    return TrendAgentOutput(
+        trend_summary={
+            "direction": direction,
+            "strength": strength,
+            "phase": phase,
+            "confidence": _confidence(abs(score) / len(votes) if direction != "neutral" else 1 - abs(score) / available),
+        },
+        primary_causes=causes,
+        trend_health_flags=flags,
+        key_metrics={
+            "ema_stack": ema_stack,
+            "ema10_slope_atr_norm": _num(_get(emas, "ema_10", "slope_atr_norm")),
+            "ema50_slope_atr_norm": _num(_get(emas, "ema_50", "slope_atr_norm")),
+            "ema100_slope_atr_norm": _num(_get(emas, "ema_100", "slope_atr_norm")),
+            "adx14": adx_value,
+            "ichimoku_regime": ichimoku.get("regime"),
+            "price_vs_cloud_pct": _num(_get(ichimoku, "features", "price_vs_cloud_pct")),
+            "atr14_percent": atr_percent,
+            "doji_ratio": doji_ratio,
+        },
+    )
+
+
+# ---------- oscillators ----------
+
+def oscillator_rule_report(data: Dict[str, Any], visual: Dict[str, Any]) -> Optional[OscillatorAgentOutput]:
+    """Momentum from the MACD histogram and its slope, confirmed by the RSI slope."""
+    indicators = data.get("indicators") or {}
+    rsi, macd, adx = indicators.get("rsi_14") or {}, indicators.get("macd_26") or {}, indicators.get("adx_14") or {}
+    rsi_value, rsi_slope = _num(rsi.get("value")), _num(rsi.get("slope"))
+    hist, hist_slope = _num(macd.get("histogram_value")), _num(macd.get("histogram_slope"))
+    if rsi_value is None or hist is None:
+        return None
+    adx_value = _num(adx.get("value"))
+    regime_state = _get(data, "market_regime", "state")
+    doji_ratio = _doji_ratio(visual)
+
+    if hist_slope is None or abs(hist_slope) <= 0.02 * abs(hist):
+        momentum = "steady"
+    elif _sign(hist) == _sign(hist_slope):
+        momentum = "accelerating" if _sign(rsi_slope) in (0, _sign(hist)) else "mixed"
+    else:
+        momentum = "fading"
+
+    obos = "overbought" if rsi_value > 70 else "oversold" if rsi_value < 30 else "neutral"
+    if regime_state in ("bullish_climax", "bearish_capitulation"):
+        regime = "climax"
+    elif obos != "neutral" or regime_state == "choppy_noise":
+        regime = "mean_reversion_risk"
+    else:
+        regime = "trend_following"
+
+    strong = sum(1 for item in (rsi, macd) if item.get("strength_r2") in ("strong", "very_strong"))
+
+    causes = [
+        f"RSI14 {rsi_value} ({rsi.get('regime')}), slope {rsi_slope} over {rsi.get('slope_horizon_bars')} bars",
+        f"MACD histogram {hist} ({macd.get('state')}), slope {hist_slope}",
+    ]
+    if adx:
+        causes.append(f"ADX14 {adx_value} ({adx.get('state')}), slope {adx.get('slope')}")
+    if regime_state:
+        causes.append(f"Market regime {regime_state}, extension risk {_get(data, 'market_regime', 'factors', 'extension_risk')}")
+
+    flags = []
+    if _sign(rsi_slope) and _sign(hist_slope) and _sign(rsi_slope) != _sign(hist_slope):
+        flags.append(f"momentum divergence: RSI slope {rsi_slope} vs MACD histogram slope {hist_slope}")
+    if regime == "climax":
+        flags.append(f"climax conditions: {regime_state} with RSI {rsi_value} and ADX {adx_value}")
+    elif obos != "neutral":
+        flags.append(f"RSI {obos} ({rsi_value})" + (" inside a trending ADX" if (adx_value or 0) > 25 else ""))
+    if regime_state == "choppy_noise":
+        flags.append("choppy regime: low ADX with RSI mid-range")
+    if doji_ratio is not None and doji_ratio >= DOJI_HESITATION_RATIO:
+        flags.append(f"hesitation: doji ratio {doji_ratio}")
+
+    return OscillatorAgentOutput(
+        oscillator_summary={
+            "momentum_state": momentum,
+            "overbought_oversold": obos,
+            "regime": regime,
+            "confidence": ("low", "medium", "high")[strong],
+        },
+        primary_causes=causes,
+        divergence_and_exhaustion_flags=flags,
+        key_metrics={
+            "rsi14": rsi_value,
+            "rsi_slope": rsi_slope,
+            "macd_hist": hist,
+            "macd_hist_slope": hist_slope,
+            "adx14": adx_value,
+            "market_regime_state": regime_state,
+            "doji_ratio": doji_ratio,
+        },
+    )
+
+
+# ---------- volatility ----------
+
+_VOL_REGIME = {"EXPANSION": "EXPANSION", "RISING_VOL": "RISING_VOL", "COMPRESSION": "CONTRACTION", "COOLING_OFF": "COOLING_OFF"}
+_VOL_GROUP = {"EXPANSION": 1, "RISING_VOL": 1, "CONTRACTION": -1, "COOLING_OFF": -1}
+
+
+def volatility_rule_report(data: Dict[str, Any], visual: Dict[str, Any]) -> Optional[VolatilityAgentOutput]:
+    """Regime of the synthesis' main driver band, MIXED when the bands disagree; a squeeze is a contraction."""
+    signals = data.get("volatility_signals") or {}
+    synthesis = data.get("signal_synthesis") or {}
+    if not signals:
+        return None
+    keltner, bollinger = signals.get("keltner_16") or {}, signals.get("bollinger_20") or {}
+    log_std, hist_vol = signals.get("log_return_std") or {}, signals.get("historical_volatility") or {}
+    squeeze = bool(synthesis.get("is_squeeze"))
+    doji_ratio = _doji_ratio(visual)
+
+    regimes = {name: _VOL_REGIME.get((signal or {}).get("regime")) for name, signal in signals.items()}
+    driver = synthesis.get("main_driver") or "bollinger_20"
+    other = "keltner_16" if driver == "bollinger_20" else "bollinger_20"
+    if squeeze:
+        regime = "CONTRACTION"
+    elif regimes.get(driver) is None or _VOL_GROUP.get(regimes.get(driver)) == -_VOL_GROUP.get(regimes.get(other), 0):
+        regime = "MIXED"
+    else:
+        regime = regimes[driver]
+    group = _VOL_GROUP.get(regime, 0)
+    agreeing = sum(1 for value in regimes.values() if group and _VOL_GROUP.get(value) == group)
+
+    causes = [
+        f"Keltner16 width {keltner.get('value')} {keltner.get('regime')} (slope {keltner.get('slope')}, {keltner.get('position_pct')} pct-rank)",
+        f"Bollinger20 width {bollinger.get('band_width')} {bollinger.get('regime')} (slope {bollinger.get('slope')}, {bollinger.get('position_pct')} pct-rank)",
+        f"Log-return std {log_std.get('final')} {log_std.get('regime')}, historical volatility {hist_vol.get('final')} {hist_vol.get('regime')}",
+        f"Synthesis {synthesis.get('regime')}, squeeze {squeeze}, driven by {driver}",
+    ]
+
+    flags = []
+    price = _num(_get(data, "meta", "price", "current_price"))
+    upper, lower = _num(bollinger.get("upper_band")), _num(bollinger.get("lower_band"))
+    if price and upper and price >= upper * 0.99:
+        flags.append(f"price {price} hugging the upper Bollinger band ({upper})")
+    elif price and lower and price <= lower * 1.01:
+        flags.append(f"price {price} hugging the lower Bollinger band ({lower})")
+    if _VOL_GROUP.get(regimes.get("keltner_16")) and \
+            _VOL_GROUP.get(regimes.get("keltner_16")) == -_VOL_GROUP.get(regimes.get("bollinger_20"), 0):
+        flags.append(f"conflict: Keltner {regimes['keltner_16']} vs Bollinger {regimes['bollinger_20']}")
+    if (_num(hist_vol.get("position_pct")) or 0) > 80 and (_num(hist_vol.get("slope")) or 0) < 0:
+        flags.append("transition: historical volatility high but rolling over")
+    if squeeze:
+        flags.append("squeeze: Bollinger bands inside Keltner channel, breakout risk")
+    if doji_ratio is not None and doji_ratio >= DOJI_HESITATION_RATIO:
+        flags.append(f"hesitation: doji ratio {doji_ratio}")
+
+    return VolatilityAgentOutput(
+        volatility_summary={
+            "regime": regime,
+            "squeeze": squeeze,
+            "confidence": _confidence(agreeing / len(regimes)) if group else "low",
+        },
+        primary_causes=causes,
+        risk_flags=flags,
+        key_metrics={
+            "keltner_regime": keltner.get("regime"),
+            "keltner_position_pct": _num(keltner.get("position_pct")),
+            "bollinger_regime": bollinger.get("regime"),
+            "bollinger_position_pct": _num(bollinger.get("position_pct")),
+            "bollinger_band_width": _num(bollinger.get("band_width")),
+            "log_return_std": _num(log_std.get("final")),
+            "historical_volatility": _num(hist_vol.get("final")),
+            "synthesis_regime": synthesis.get("regime"),
+            "main_driver": driver,
+            "doji_ratio": doji_ratio,
+        },
+    )
+
+
+# ---------- volume ----------
+
+def volume_rule_report(data: Dict[str, Any], visual: Dict[str, Any]) -> Optional[VolumeAgentOutput]:
+    """Participation from VMA ratio and RVOL, flow bias from OBV/CVD/MFI slopes, efficiency from VWAP."""
+    vma = _get(data, "volume_participation", "vma_ratio") or {}
+    rvol = _get(data, "volume_participation", "rvol") or {}
+    obv = _get(data, "directional_flow", "obv_20") or {}
+    cvd = _get(data, "directional_flow", "cvd") or {}
+    mfi = _get(data, "price_volume_efficiency", "mfi_14") or {}
+    vwap = _get(data, "institutional_reference", "vwap") or {}
+    rv_30 = _get(data, "relative_volume_regime", "rv_30") or {}
+    rv_90 = _get(data, "relative_volume_regime", "rv_90") or {}
+    if not (vma or obv or cvd):
+        return None
+    doji_ratio = _doji_ratio(visual)
+
+    vma_ratio, vma_slope, rvol_value = _num(vma.get("value")), _num(vma.get("slope")), _num(rvol.get("value"))
+    if (rvol_value or 0) >= 2.0 or ((vma_ratio or 0) > 1.1 and (vma_slope or 0) > 0):
+        participation = "mixed" if rvol_value is not None and rvol_value < 0.7 else "expanding"
+    elif vma_ratio is not None and vma_ratio < 0.9 and (vma_slope or 0) < 0:
+        participation = "fading"
+    else:
+        participation = "normal"
+
+    votes = [_sign(_num(signal.get("slope"))) for signal in (obv, cvd, mfi) if signal]
+    score = sum(votes)
+    if score >= 2:
+        flow_bias = "accumulation"
+    elif score <= -2:
+        flow_bias = "distribution"
+    elif not any(votes):
+        flow_bias = "neutral"
+    else:
+        flow_bias = "mixed"
+
+    vwap_distance = _num(vwap.get("distance_percent"))
+    flow_sign = {"accumulation": 1, "distribution": -1}.get(flow_bias, 0)
+    if not flow_sign or vwap_distance is None:
+        efficiency = "mixed"
+    elif _sign(vwap_distance) == flow_sign:
+        efficiency = "high" if abs(vwap_distance) >= 1 else "moderate"
+    else:
+        efficiency = "low"
+
+    strong = sum(1 for signal in (obv, cvd) if signal.get("strength") in ("strong", "very_strong"))
+    confidence = ("low", "medium", "high")[strong] if flow_sign else "low"
+
+    causes = [
+        f"VMA20/50 ratio {vma.get('value')} ({vma.get('regime')}, slope {vma.get('slope')}), RVOL {rvol.get('value')} ({rvol.get('regime')})",
+        f"OBV {obv.get('regime')} (slope {obv.get('slope')}, {obv.get('strength')}), CVD {cvd.get('regime')} (slope {cvd.get('slope')}, {cvd.get('strength')})",
+        f"MFI14 {mfi.get('value')} ({mfi.get('regime')})",
+        f"Price {vwap_distance}% from VWAP20 ({vwap.get('regime')})",
+    ]
+    if rv_30 or rv_90:
+        causes.append(f"RV30 {rv_30.get('value')} ({rv_30.get('regime')}), RV90 {rv_90.get('value')} ({rv_90.get('regime')})")
+
+    flags = []
+    if len(set(vote for vote in votes if vote)) > 1:
+        flags.append(f"flow conflict: OBV {obv.get('regime')}, CVD {cvd.get('regime')}, MFI {mfi.get('regime')}")
+    if flow_sign and rvol_value is not None and rvol_value < 0.8:
+        flags.append(f"thin participation: RVOL {rvol_value} behind {flow_bias}")
+    if (vwap_distance or 0) > 5:
+        flags.append(f"VWAP premium {vwap_distance}%: extension / pullback sensitivity")
+    if mfi.get("regime") in ("overbought", "oversold"):
+        flags.append(f"MFI {mfi.get('regime')} ({mfi.get('value')})")
+    if doji_ratio is not None and doji_ratio >= DOJI_HESITATION_RATIO:
+        flags.append(f"hesitation: doji ratio {doji_ratio}")
+
+    return VolumeAgentOutput(
+        volume_summary={
+            "participation": participation,
+            "flow_bias": flow_bias,
+            "efficiency": efficiency,
+            "confidence": confidence,
+        },
+        primary_causes=causes,
+        conflict_and_risk_flags=flags,
+        key_metrics={
+            "vma_ratio": vma_ratio,
+            "rvol": rvol_value,
+            "obv_slope": _num(obv.get("slope")),
+            "cvd_slope": _num(cvd.get("slope")),
+            "mfi14": _num(mfi.get("value")),
+            "vwap_distance_pct": vwap_distance,
+            "rv_30": _num(rv_30.get("value")),
+            "rv_90": _num(rv_90.get("value")),
+            "doji_ratio": doji_ratio,
+        },
+    )
+
+
+# ---------- support / resistance ----------
+
+def _level(zone: Dict[str, Any]) -> Dict[str, Any]:
+    return {"price": zone["avg_price"], "strength_score": zone.get("strength_score"), "contributors": zone.get("contributors") or []}
+
+
+def sr_rule_report(data: Dict[str, Any], visual: Dict[str, Any]) -> Optional[SupportResistanceAgentOutput]:
+    """
+    Posture from the distance to the nearest support/resistance zones and their strength.
+    None without a support zone, since the schema requires one.
+    """
+    price = _num(data.get("current_price"))
+    support = _get(data, "signal_summary", "nearest_support")
+    resistance = _get(data, "signal_summary", "nearest_resistance")
+    if not price or not support:
+        return None
+    zones = data.get("confluence_zones") or []
+    doji_ratio = _doji_ratio(visual)
+
+    support_distance = round((price - support["avg_price"]) / price * 100, 2)
+    support_strength = _num(support.get("strength_score")) or 0.0
+    resistance_strength = _num((resistance or {}).get("strength_score")) or 0.0
+    if not resistance:
+        bias = "no_overhead_resistance"
+    else:
+        resistance_distance = round((resistance["avg_price"] - price) / price * 100, 2)
+        if support_distance <= NEAR_LEVEL_PCT and support_distance <= resistance_distance:
+            bias = "near_support"
+        elif resistance_distance <= NEAR_LEVEL_PCT:
+            bias = "near_resistance"
+        else:
+            bias = "between_levels"
+
+    if bias == "near_support" and support_strength >= resistance_strength:
+        status = "BULLISH_BIAS"
+    elif bias == "near_resistance" and resistance_strength >= support_strength:
+        status = "BEARISH_BIAS"
+    else:
+        status = "NEUTRAL"
+    relevant = {"near_support": support_strength, "near_resistance": resistance_strength}.get(
+        bias, max(support_strength, resistance_strength)
+    )
+
+    top_zones = sorted(
+        zones, key=lambda zone: (-(zone.get("strength_score") or 0), abs(zone["avg_price"] - price))
+    )[:3]
+
+    causes = [
+        f"Nearest support {support['avg_price']} ({support_distance}% below, strength {support.get('strength_score')}, "
+        f"{', '.join(support.get('contributors') or [])})",
+        f"Nearest resistance {resistance['avg_price']} ({resistance_distance}% above, strength {resistance.get('strength_score')}, "
+        f"{', '.join(resistance.get('contributors') or [])})" if resistance else "No mapped overhead resistance in this window",
+    ]
+    if top_zones:
+        zone = top_zones[0]
+        causes.append(f"Strongest confluence: {zone['type']} {zone['price_range']} from {len(zone.get('contributors') or [])} sources")
+
+    flags = []
+    if not resistance:
+        flags.append("air pocket: no resistance mapped above price")
+    if support_strength < 0.5:
+        flags.append(f"weak nearest support (strength {support.get('strength_score')})")
+    if support_distance > 5:
+        flags.append(f"nearest support {support_distance}% below price (gap risk)")
+    if doji_ratio is not None and doji_ratio >= DOJI_HESITATION_RATIO:
+        flags.append(f"hesitation near levels: doji ratio {doji_ratio}")
+
+    return SupportResistanceAgentOutput(
+        sr_summary={"status": status, "nearest_level_bias": bias, "confidence": _confidence(relevant)},
+        primary_causes=causes,
+        key_zones={
+            "nearest_support": _level(support),
+            "nearest_resistance": _level(resistance) if resistance else None,
+            "top_confluence_zones": top_zones,
+        },
+        risk_flags=flags,
+        key_metrics={"current_price": price, "doji_ratio": doji_ratio, "nearest_support_distance_pct": support_distance},
+    )
+
+
+# ---------- smart money ----------
+
+def _flow_signal(ratio: Optional[float], flow: Optional[float]) -> str:
+    if ratio is None or flow is None:
+        return "NEUTRAL"
+    if ratio > 1.2 and flow > 0:
+        return "BULLISH"
+    if ratio < 0.8 and flow < 0:
+        return "BEARISH"
+    if (ratio > 1.2 and flow < 0) or (ratio < 0.8 and flow > 0):
+        return "CAUTION"
+    return "NEUTRAL"
+
+
+def smart_money_rule_report(rows: List[Dict[str, Any]]) -> Optional[SmartMoneyAnalysis]:
+    """Signal from the latest day's buyer power and real net flow (newest row first), trend over the window."""
+    if not isinstance(rows, list) or not rows:
+        return None
+    ratios = [_num(row.get("real_buy_power_ratio")) for row in rows]
+    flows = [_num(row.get("real_net_flow")) for row in rows]
+    ratio, flow = ratios[0], flows[0]
+    signal = _flow_signal(ratio, flow)
+
+    recent = [(r, f) for r, f in zip(ratios[:3], flows[:3]) if r is not None and f is not None]
+    recent_flow = sum(f for _, f in recent)
+    if rows[0].get("volume_status") == "Smart Money Entry" or signal == "BULLISH":
+        status = "ENTERING"
+    elif signal == "BEARISH":
+        status = "EXITING"
+    elif len(recent) >= 2 and recent[0][0] > recent[-1][0] and recent_flow > 0:
+        status = "ACCUMULATION"
+    elif len(recent) >= 2 and recent[0][0] < recent[-1][0] and recent_flow < 0:
+        status = "DISTRIBUTION"
+    else:
+        status = "NO_ACTIVITY"
+
+    series = [value for value in reversed(ratios) if value is not None]  # oldest first
+    half = len(series) // 2
+    if len(series) < 2:
+        trend = "Stable"
+    else:
+        mean = sum(series) / len(series)
+        spread = (sum((value - mean) ** 2 for value in series) / len(series)) ** 0.5
+        early, late = sum(series[:half]) / half, sum(series[half:]) / (len(series) - half)
+        if mean and spread / mean > 0.5:
+            trend = "Volatile"
+        elif late > early * 1.1:
+            trend = "Improving"
+        elif late < early * 0.9:
+            trend = "Deteriorating"
+        else:
+            trend = "Stable"
+
+    consistent = sum(1 for r, f in recent if _flow_signal(r, f) == signal)
+    confidence = 0.5 if signal == "NEUTRAL" else min(1.0, 0.4 + 0.2 * consistent)
+
+    summary = f"Buyer power {ratio}, real net flow {flow}"
+    if len(rows) > 1:
+        summary += f" (previous day {ratios[1]}, {flows[1]})"
+    summary += f"; {rows[0].get('volume_status', 'Normal')}, {trend.lower()} over {len(rows)} days."
+
+    return SmartMoneyAnalysis(
+        signal=signal,
+        confidence=round(confidence, 2),
+        analysis_summary=summary,
+        smart_money_status=status,
+        trend_7_days=trend,
+    )
@@ -0,0 +1,119 @@
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.mongo_manger import MongoManager
+from src.core.single_flight import SingleFlight
+from src.services.providers.tavily_search import TavilyClient
+from src.utils.text import normalize_persian_text
+
+# Result fields kept on the symbol document; the full payload lives in the Tavily collection.
+RESULT_SUMMARY_FIELDS = ("title", "url", "published_date", "score")
+# Tavily's content snippet is kept (truncated) so clustered news events have article text.
+RESULT_SNIPPET_CHARS = 500
+
+
+def normalize_query(query: str) -> str:
+    return normalize_persian_text(query).lower()
+
+
+def tavily_cache_key(query: str, **params: Any) -> str:
+    """Same normalized query and search parameters -> same key."""
+    payload = json.dumps({"query": normalize_query(query), **params}, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TavilySearchService:
+    """
+    Cached Tavily search.
+    A search is answered from the in-process cache, then from the `tavily_results`
+    collection while younger than `ttl_seconds`, and only then from the API; identical
+    searches in flight share one request. In lean mode raw page text is not requested,
+    since the workflow only reads the answer, result headlines and content snippets.
+    """
+    def __init__(
+        self,
+        collection_name: str = settings.mongo_tavily_collection_name,
+        ttl_seconds: float = settings.tavily_cache_ttl_seconds,
+        lean: bool = settings.tavily_lean_mode,
+    ):
+        self.collection_name = collection_name
+        self.ttl_seconds = ttl_seconds
+        self.lean = lean
+        self._memory = TTLCache(max_size=settings.tavily_memory_cache_size, ttl_seconds=ttl_seconds)
+        self._flight = SingleFlight("tavily search")
+
+    async def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        document = await MongoManager(self.collection_name).read_data({"_id": key})
+        if document and document.get("fetched_at") and \
+                datetime.utcnow() - document["fetched_at"] < timedelta(seconds=self.ttl_seconds):
+            return document
+        return None
+
+    async def _fetch(self, key: str, query: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        document = await self._load(key)
+        if document:
+            logger.info(f"📚 Tavily store hit for '{query}'.")
+        else:
+            async with TavilyClient(
+                api_key=settings.tavily_api_key.get_secret_value(),
+                base_url=settings.tavily_base_url,
+                timeout=settings.tavily_timeout_seconds,
+            ) as tavily:
+                data = await tavily.search(query=query, **params)
+            if not data:
+                return None
+            document = {
+                "_id": key,
+                "query": query,
+                "params": params,
+                "answer": data.get("answer"),
+                "results": data.get("results", []),
+                "usage": data.get("usage"),
+                "fetched_at": datetime.utcnow(),
+            }
+            await MongoManager(self.collection_name).upsert_data(document)
+
+        summary = {
+            "query": query,
+            "answer": document.get("answer"),
+            "results": [
+                {
+                    **{field: result.get(field) for field in RESULT_SUMMARY_FIELDS},
+                    "content": (result.get("content") or "")[:RESULT_SNIPPET_CHARS] or None,
+                }
+                for result in document.get("results") or []
+            ],
+            "raw_ref": key,
+            "fetched_at": document["fetched_at"],
+        }
+        self._memory.set(key, summary)
+        return summary
+
+    async def search(self, query: str, start_date: date, end_date: date) -> Optional[Dict[str, Any]]:
+        """
+        Answer plus result headlines and snippets for the query; the raw results are stored under
+        `raw_ref` in the Tavily collection. None if the search failed.
+        """
+        params: Dict[str, Any] = {
+            "start_date": str(start_date),
+            "end_date": str(end_date),
+            "include_raw_content": None if self.lean else "text",
+        }
+        key = tavily_cache_key(query, **params)
+        cached = self._memory.get(key)
+        if cached is not None:
+            logger.info(f"⚡ Tavily cache hit for '{query}'.")
+            return cached
+        return await self._flight.do(key, lambda: self._fetch(key, query, params))
+
+    async def raw_results(self, raw_ref: str) -> Optional[Dict[str, Any]]:
+        """Full stored payload for a `raw_ref`, for debugging and offline analysis."""
+        return await MongoManager(self.collection_name).read_data({"_id": raw_ref})
+
+
+tavily_search = TavilySearchService()
@@ -1,11 +1,9 @@
 from typing import Any, Dict, Optional, Tuple, Type
-from datetime import datetime , timedelta
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
 import json
-import ssl
-import aiohttp
-from bs4 import BeautifulSoup
+import time
 import jdatetime
-from tenacity import retry, stop_after_attempt, wait_fixed
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableConfig
 from pydantic import BaseModel, ValidationError
@@ -13,8 +11,9 @@ from pydantic import BaseModel, ValidationError
 try:
     from src.core.logger import logger
     from src.core.config import settings
-    from src.utils.proxy import build_proxy_connector, proxy_request_kwargs
     from src.core.mongo_manger import MongoManager
+    from src.core.usage_recorder import usage_recorder
+    from src.utils.llm_router import llm_router
 except ImportError:
     import logging
     logger = logging.getLogger(__name__)
@@ -66,22 +65,27 @@ def _make_mongo_safe(value: Any) -> Any:
         return str(value)
 
 
-async def save_llm_usage(node_name: str, session_id: Optional[str], response: Any) -> None:
+async def save_llm_usage(
+    node_name: str,
+    session_id: Optional[str],
+    response: Any,
+    latency_seconds: Optional[float] = None,
+    route: Optional[Dict[str, Any]] = None,
+) -> None:
     response_metadata = getattr(response, "response_metadata", {}) or {}
     document = {
         "node_name": node_name,
         "session_id": session_id,
         "model_name": response_metadata.get("model_name"),
         **_extract_token_usage(response),
+        "latency_seconds": round(latency_seconds, 3) if latency_seconds is not None else None,
+        "route": route,
         "created_at": datetime.utcnow(),
     }
-    mongo = MongoManager(settings.mongo_llm_usage_collection_name)
     try:
-        await mongo.write_data(_make_mongo_safe(document))
+        usage_recorder.record(_make_mongo_safe(document))
     except Exception as exc:
-        logger.warning("Failed to persist LLM usage for node %s.", node_name, exc_info=exc)
-    finally:
-        mongo.close()
+        logger.warning("Failed to queue LLM usage for node %s.", node_name, exc_info=exc)
 
 
 def build_analysis_timing(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -137,13 +141,25 @@ async def save_agent_run(session_id: Optional[str], state: Dict[str, Any], final
         await mongo.upsert_data(document)
     except Exception as exc:
         logger.warning("Failed to persist final agent run for session %s.", session_id, exc_info=exc)
-    finally:
-        mongo.close()
+
+
+def _model_name(llm: Any, route: Optional[Dict[str, Any]]) -> Optional[str]:
+    if route:
+        return route.get("model_name")
+    return getattr(llm, "model_name", None)
 
 
 async def invoke_llm_and_log(llm: Any, prompt_value: Any, node_name: str, session_id: Optional[str]):
-    response = await llm.ainvoke(prompt_value)
-    await save_llm_usage(node_name=node_name, session_id=session_id, response=response)
+    llm, route = llm_router.select(node_name, llm)
+    started_at = time.perf_counter()
+    try:
+        response = await llm.ainvoke(prompt_value)
+    except Exception:
+        llm_router.observe(_model_name(llm, route), time.perf_counter() - started_at, ok=False)
+        raise
+    latency = time.perf_counter() - started_at
+    llm_router.observe(_model_name(llm, route), latency)
+    await save_llm_usage(node_name=node_name, session_id=session_id, response=response, latency_seconds=latency, route=route)
     return response
 
 
@@ -157,38 +173,55 @@ async def invoke_structured_llm_and_log(
     """
     Invoke structured output while still logging usage/cost from the raw model response.
     """
+    llm, route = llm_router.select(node_name, llm)
+    started_at = time.perf_counter()
+
+    async def _log_usage(response: Any) -> None:
+        await save_llm_usage(
+            node_name=node_name,
+            session_id=session_id,
+            response=response,
+            latency_seconds=time.perf_counter() - started_at,
+            route=route,
+        )
+
     try:
-        structured_llm = llm.with_structured_output(schema_model, include_raw=True)
-        result = await structured_llm.ainvoke(prompt_value)
-
-        if isinstance(result, dict) and "raw" in result:
-            raw_response = result.get("raw")
-            if raw_response is not None:
-                await save_llm_usage(node_name=node_name, session_id=session_id, response=raw_response)
-
-            parsing_error = result.get("parsing_error")
-            if parsing_error:
-                raise parsing_error
-
-            parsed = result.get("parsed")
-            if parsed is None:
-                raise ValueError(f"Structured output parsing returned None for schema {schema_model.__name__}")
-            return parsed
-
-        # Fallback path if adapter doesn't return include_raw payload structure.
-        parsed_output = result if isinstance(result, BaseModel) else None
-        if parsed_output is None:
+        try:
+            structured_llm = llm.with_structured_output(schema_model, include_raw=True)
+            result = await structured_llm.ainvoke(prompt_value)
+
+            if isinstance(result, dict) and "raw" in result:
+                raw_response = result.get("raw")
+                if raw_response is not None:
+                    await _log_usage(raw_response)
+
+                parsing_error = result.get("parsing_error")
+                if parsing_error:
+                    raise parsing_error
+
+                parsed = result.get("parsed")
+                if parsed is None:
+                    raise ValueError(f"Structured output parsing returned None for schema {schema_model.__name__}")
+                parsed_output = parsed
+            else:
+                # Fallback path if adapter doesn't return include_raw payload structure.
+                parsed_output = result if isinstance(result, BaseModel) else None
+                if parsed_output is None:
+                    parsed_output = await llm.with_structured_output(schema_model).ainvoke(prompt_value)
+                if getattr(parsed_output, "response_metadata", None) or getattr(parsed_output, "usage_metadata", None):
+                    await _log_usage(parsed_output)
+
+        except TypeError:
+            # Some model adapters may not support include_raw.
             parsed_output = await llm.with_structured_output(schema_model).ainvoke(prompt_value)
-        if getattr(parsed_output, "response_metadata", None) or getattr(parsed_output, "usage_metadata", None):
-            await save_llm_usage(node_name=node_name, session_id=session_id, response=parsed_output)
-        return parsed_output
+            if getattr(parsed_output, "response_metadata", None) or getattr(parsed_output, "usage_metadata", None):
+                await _log_usage(parsed_output)
+    except Exception:
+        llm_router.observe(_model_name(llm, route), time.perf_counter() - started_at, ok=False)
+        raise
 
-    except TypeError:
-        # Some model adapters may not support include_raw.
-        parsed_output = await llm.with_structured_output(schema_model).ainvoke(prompt_value)
-        if getattr(parsed_output, "response_metadata", None) or getattr(parsed_output, "usage_metadata", None):
-            await save_llm_usage(node_name=node_name, session_id=session_id, response=parsed_output)
-        return parsed_output
+    llm_router.observe(_model_name(llm, route), time.perf_counter() - started_at)
+    return parsed_output
 
 
 async def _invoke_structured_with_recovery(
@@ -269,67 +302,71 @@ def parse_iso_date(date_str):
         return None
 
 
-@retry(stop=stop_after_attempt(5), wait=wait_fixed(2))
-async def scrape_codal_report(url: str) -> str:
-    """
-    Asynchronously scrapes text content from a Codal report URL.
-    Extracts text from all <p> tags.
-    """
-    logger.info(f"Scraping Codal report: {url}")
-    
-    # Create a custom SSL context that does not verify certificates
-    ssl_context = ssl.create_default_context()
-    ssl_context.check_hostname = False
-    ssl_context.verify_mode = ssl.CERT_NONE
-
-    async with aiohttp.ClientSession(
-        connector=build_proxy_connector(settings.proxy_url, limit=100)
-    ) as session:
-        async with session.get(
-            url,
-            ssl=ssl_context,
-            timeout=30,
-            **proxy_request_kwargs(settings.proxy_url),
-        ) as response:
-            response.raise_for_status()
-            content = await response.read()
-            
-            soup = BeautifulSoup(content, 'html.parser')
-            p_tags = soup.find_all('p')
-            
-            logger.debug(f"Found {len(p_tags)} paragraphs in report.")
-            
-            final_text = []
-            for p in p_tags:
-                text = p.get_text(separator="\n", strip=True)
-                if text:
-                    final_text.append(text)
-            
-            return "\n".join(final_text)
-        
+def parse_twitter_date(date_str):
+    """Twitter `created_at` (`Mon Oct 16 09:31:00 +0000 2023`), with ISO strings as fallback."""
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(date_str, "%a %b %d %H:%M:%S %z %Y")
+    except ValueError:
+        return parse_iso_date(date_str)
+
+
+@lru_cache(maxsize=4096)
+def jalali_to_gregorian(year: int, month: int, day: int) -> date:
+    """Memoized day-level Jalali -> Gregorian conversion (feeds repeat the same few days)."""
+    return jdatetime.date(year, month, day).togregorian()
+
 
 def parse_persian_date(date_str):
     """Parse Persian date string to Gregorian datetime"""
     # Split date and time
-    date_part, time_part = date_str.split(' ')
+    date_part, _, time_part = date_str.strip().partition(' ')
     
-    # Parse Persian date
+    # Parse Persian date and convert to Gregorian
     year, month, day = map(int, date_part.split('/'))
-    
-    # Create jdatetime object
-    persian_date = jdatetime.datetime(year, month, day)
-    
-    # Convert to Gregorian datetime
-    gregorian_date = persian_date.togregorian()
+    gregorian_date = datetime.combine(jalali_to_gregorian(year, month, day), datetime.min.time())
     
     # Add time if needed (for more precise filtering)
     if time_part:
-        hour, minute = map(int, time_part.split(':'))
+        hour, minute = map(int, time_part.split(':')[:2])
         gregorian_date = gregorian_date.replace(hour=hour, minute=minute)
     
     return gregorian_date
 
 
+def to_utc_naive(value: Optional[datetime], tz: Optional[tzinfo] = None) -> Optional[datetime]:
+    """
+    Canonical form for stored timestamps: naive UTC (what Mongo returns).
+    Naive inputs are read as wall time in `tz` (server local time if None).
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=tz) if tz else value.astimezone()
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def item_timestamp(item: Dict[str, Any], field: str, parser, tz: Optional[tzinfo] = None) -> Optional[datetime]:
+    """Pre-parsed `published_at` when the item was normalized at ingestion, else parses `field` now."""
+    published_at = item.get("published_at")
+    if isinstance(published_at, datetime):
+        return published_at
+    try:
+        return to_utc_naive(parser(item[field]), tz) if item.get(field) else None
+    except (ValueError, TypeError):
+        return None
+
+
+def normalize_timestamps(items: Any, field: str, parser, tz: Optional[tzinfo] = None) -> None:
+    """Parses `field` once per item into a naive-UTC `published_at` (None when unparseable)."""
+    if not isinstance(items, list):
+        return
+    for item in items:
+        if isinstance(item, dict):
+            item["published_at"] = item_timestamp(item, field, parser, tz)
+
+
 def ensure_object(data, schema_class):
     """Converts a dict to a Pydantic object if necessary."""
     if isinstance(data, dict):
@@ -15,7 +15,8 @@ class LLMFactory:
     def get_model(temperature: float = 0.0, thinking:bool = True,
                 top_p:Optional[float] = None, max_output_tokens:Optional[int] = None,
                 structured_output=None, tools: Optional[list] = None,
-                node_name: Optional[str] = None, model_name: Optional[str] = None):
+                node_name: Optional[str] = None, model_name: Optional[str] = None,
+                reasoning_effort: Optional[str] = None):
 
         tools = tools or []
         resolved_model_name = LLMFactory.resolve_model_name(node_name=node_name, model_name=model_name)
@@ -27,7 +28,7 @@ class LLMFactory:
             temperature=temperature,
             max_tokens=max_output_tokens or settings.max_tokens,
             top_p=top_p if top_p is not None else settings.top_p,
-            reasoning_effort=settings.model_reasoning_effort if thinking else None
+            reasoning_effort=(reasoning_effort or settings.model_reasoning_effort) if thinking else None
         )
         if structured_output:
             return llm.with_structured_output(structured_output)
@@ -0,0 +1,111 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.language_models import BaseChatModel
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.utils.llm_factory import LLMFactory
+
+
+class LLMRouter:
+    """
+    Picks model, reasoning effort and max_tokens per node from tier profiles,
+    and falls back to the tier's `fallback_tier` when the chosen backend is
+    measured as slow or unreliable.
+    """
+    EWMA_ALPHA = 0.3
+    # A degraded model gets one probe call after this long so it can recover.
+    PROBE_INTERVAL_SECONDS = 300
+
+    def __init__(self):
+        self._latency: Dict[str, float] = {}
+        self._error_rate: Dict[str, float] = {}
+        self._degraded_since: Dict[str, float] = {}
+        self._models: Dict[Tuple[str, Optional[str], Optional[int]], Any] = {}
+
+    def _update(self, table: Dict[str, float], model_name: str, value: float) -> None:
+        previous = table.get(model_name)
+        table[model_name] = value if previous is None else (
+            self.EWMA_ALPHA * value + (1 - self.EWMA_ALPHA) * previous
+        )
+
+    def observe(self, model_name: Optional[str], latency_seconds: float, ok: bool = True) -> None:
+        """Records one call's latency and outcome for the model that served it."""
+        if not model_name:
+            return
+        self._update(self._latency, model_name, latency_seconds)
+        self._update(self._error_rate, model_name, 0.0 if ok else 1.0)
+
+    def profile_stats(self, model_name: str) -> Dict[str, Optional[float]]:
+        latency = self._latency.get(model_name)
+        error_rate = self._error_rate.get(model_name)
+        return {
+            "observed_latency_seconds": round(latency, 2) if latency is not None else None,
+            "observed_error_rate": round(error_rate, 2) if error_rate is not None else None,
+        }
+
+    def _is_degraded(self, model_name: str) -> bool:
+        degraded = (
+            self._latency.get(model_name, 0.0) > settings.llm_slow_latency_seconds
+            or self._error_rate.get(model_name, 0.0) > settings.llm_max_error_rate
+        )
+        if not degraded:
+            self._degraded_since.pop(model_name, None)
+            return False
+
+        since = self._degraded_since.setdefault(model_name, time.monotonic())
+        if time.monotonic() - since > self.PROBE_INTERVAL_SECONDS:
+            self._latency.pop(model_name, None)
+            self._error_rate.pop(model_name, None)
+            self._degraded_since.pop(model_name, None)
+            return False
+        return True
+
+    def _get_model(self, model_name: str, reasoning_effort: Optional[str], max_tokens: Optional[int]):
+        key = (model_name, reasoning_effort, max_tokens)
+        if key not in self._models:
+            self._models[key] = LLMFactory.get_model(
+                model_name=model_name,
+                reasoning_effort=reasoning_effort,
+                max_output_tokens=max_tokens,
+            )
+        return self._models[key]
+
+    def select(self, node_name: Optional[str], default_llm: Any) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """
+        Returns (llm, route_decision). The default model is kept when routing is off,
+        the node has no tier, or the default is a bound runnable (tools/structured output)
+        that cannot be swapped without losing its bindings.
+        """
+        tier = settings.llm_node_tiers.get(node_name or "")
+        if not settings.llm_routing_enabled or not tier or not isinstance(default_llm, BaseChatModel):
+            return default_llm, None
+
+        default_model = getattr(default_llm, "model_name", None) or settings.model_name
+        profile = settings.llm_tier_profiles.get(tier) or {}
+        model_name = profile.get("model") or default_model
+        fallback_from = None
+
+        fallback_tier = profile.get("fallback_tier")
+        if fallback_tier and self._is_degraded(model_name):
+            fallback_profile = settings.llm_tier_profiles.get(fallback_tier) or {}
+            fallback_model = fallback_profile.get("model") or default_model
+            if fallback_model != model_name:
+                logger.warning(f"🐢 Model '{model_name}' is degraded; routing '{node_name}' to tier '{fallback_tier}'.")
+                fallback_from, tier, profile, model_name = tier, fallback_tier, fallback_profile, fallback_model
+
+        decision = {
+            "node_name": node_name,
+            "tier": tier,
+            "model_name": model_name,
+            "reasoning_effort": profile.get("reasoning_effort") or settings.model_reasoning_effort,
+            "max_tokens": profile.get("max_tokens") or settings.max_tokens,
+            "fallback_from": fallback_from,
+            **self.profile_stats(model_name),
+        }
+        llm = self._get_model(model_name, decision["reasoning_effort"], decision["max_tokens"])
+        return llm, decision
+
+
+llm_router = LLMRouter()
@@ -0,0 +1,26 @@
+import re
+
+# Arabic code points that commonly replace their Persian forms in Codal/Sahamyab text.
+_CHAR_MAP = str.maketrans({
+    "ي": "ی",
+    "ى": "ی",
+    "ك": "ک",
+    "ة": "ه",
+    "ۀ": "ه",
+    "أ": "ا",
+    "إ": "ا",
+    "‌": " ",  # zero-width non-joiner
+    "ـ": "",   # tatweel
+    **{chr(0x06F0 + i): str(i) for i in range(10)},  # Persian digits
+    **{chr(0x0660 + i): str(i) for i in range(10)},  # Arabic-Indic digits
+})
+_DIACRITICS = re.compile(r"[ً-ْ]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_persian_text(text: str) -> str:
+    """Unifies Arabic/Persian letter variants, digits and spacing so Persian text can be matched lexically."""
+    if not text:
+        return ""
+    text = _DIACRITICS.sub("", text.translate(_CHAR_MAP))
+    return _WHITESPACE.sub(" ", text).strip()
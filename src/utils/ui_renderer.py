@@ -99,6 +99,12 @@ def render_social_report(report: NewsSocialFusionOutput) -> str:
     
     return md
 
+def render_missing_input(marker: dict) -> str:
+    return (
+        f"⏳ این بخش در زمان مقرر آماده نشد و گزارش نهایی بدون آن تهیه می‌شود.\n\n"
+        f"`{marker.get('input', '-')}`: {marker.get('reason', '')}\n"
+    )
+
 def render_final_report(text: str) -> str:
     return (
         f"# 📝 گزارش نهایی دستیار مالی\n\n"
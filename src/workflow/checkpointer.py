@@ -0,0 +1,392 @@
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from pymongo import DESCENDING, UpdateOne
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.mongo_manger import MongoManager
+
+
+def _digest(typed: Tuple[str, bytes]) -> str:
+    return hashlib.blake2b(typed[0].encode("utf-8") + b"\x00" + typed[1], digest_size=20).hexdigest()
+
+
+class _ContentPool:
+    """Reference-counted store of serialized values, keyed by content digest."""
+    def __init__(self, min_bytes: int):
+        self.min_bytes = min_bytes
+        self._entries: Dict[str, List[Any]] = {}  # digest -> [bytes, refcount]
+
+    def intern(self, typed: Tuple[str, bytes]) -> Tuple[str, bytes]:
+        type_, data = typed
+        if len(data) < self.min_bytes:
+            return typed
+        digest = _digest(typed)
+        entry = self._entries.get(digest)
+        if entry is None:
+            self._entries[digest] = entry = [data, 0]
+        entry[1] += 1
+        return type_, entry[0]
+
+    def release(self, typed: Tuple[str, bytes]) -> None:
+        if len(typed[1]) < self.min_bytes:
+            return
+        digest = _digest(typed)
+        entry = self._entries.get(digest)
+        if entry is not None:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._entries[digest]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    In-process checkpointer with bounded retention.
+
+    Threads are kept in LRU order: a thread idle for longer than `ttl_seconds`, or the
+    least recently used one beyond `max_threads`, is dropped with all its checkpoints.
+    Serialized values of at least `intern_min_bytes` are content-addressed, so the large
+    read-only inputs that every superstep, subgraph namespace and pending write repeats
+    (price history, news, statements) are held once per distinct payload.
+    """
+    def __init__(
+        self,
+        max_threads: int = settings.checkpoint_max_threads,
+        ttl_seconds: float = settings.checkpoint_ttl_seconds,
+        intern_min_bytes: int = settings.checkpoint_intern_min_bytes,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.max_threads = max(1, max_threads)
+        self.ttl_seconds = ttl_seconds
+        self._pool = _ContentPool(intern_min_bytes)
+        self._threads: "OrderedDict[str, float]" = OrderedDict()  # thread_id -> last use
+
+    def _touch(self, config: Optional[RunnableConfig]) -> None:
+        thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+        if thread_id is None:
+            return
+        self._threads[thread_id] = time.monotonic()
+        self._threads.move_to_end(thread_id)
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        while self._threads:
+            thread_id, last_used = next(iter(self._threads.items()))
+            if len(self._threads) <= self.max_threads and now - last_used < self.ttl_seconds:
+                break
+            self.delete_thread(thread_id)
+            logger.debug(f"🧹 Evicted checkpoints of thread {thread_id}.")
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        self._touch(config)
+        return super().get_tuple(config)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        self._touch(config)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        keys = [(thread_id, checkpoint_ns, channel, version) for channel, version in new_versions.items()]
+        replaced = [self.blobs[key] for key in keys if key in self.blobs]
+        result = super().put(config, checkpoint, metadata, new_versions)
+        for typed in replaced:
+            self._pool.release(typed)
+        for key in keys:
+            self.blobs[key] = self._pool.intern(self.blobs[key])
+        self._evict()
+        return result
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self._touch(config)
+        outer_key = (
+            config["configurable"]["thread_id"],
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+        before = dict(self.writes.get(outer_key, {}))
+        super().put_writes(config, writes, task_id, task_path)
+        stored = self.writes[outer_key]
+        for inner_key, write in list(stored.items()):
+            if before.get(inner_key) is write:
+                continue
+            if inner_key in before:
+                self._pool.release(before[inner_key][2])
+            stored[inner_key] = (write[0], write[1], self._pool.intern(write[2]), write[3])
+
+    def delete_thread(self, thread_id: str) -> None:
+        for key, typed in self.blobs.items():
+            if key[0] == thread_id:
+                self._pool.release(typed)
+        for key, stored in self.writes.items():
+            if key[0] == thread_id:
+                for write in stored.values():
+                    self._pool.release(write[2])
+        super().delete_thread(thread_id)
+        self._threads.pop(thread_id, None)
+
+
+class MongoCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    Persistent async checkpointer on MongoDB, for multi-worker deployments and resuming
+    interrupted sessions across restarts.
+
+    Channel values are stored once per content digest in the blobs collection; a
+    checkpoint document only lists the digests of its channels, inheriting unchanged ones
+    from its parent. Every collection carries a TTL index on `updated_at`, so abandoned
+    threads expire after `ttl_seconds`. Only the async API is implemented (the graph is
+    driven with `astream`).
+    """
+    def __init__(
+        self,
+        checkpoints_collection: str = settings.mongo_checkpoint_collection_name,
+        writes_collection: str = settings.mongo_checkpoint_writes_collection_name,
+        blobs_collection: str = settings.mongo_checkpoint_blobs_collection_name,
+        ttl_seconds: float = settings.checkpoint_ttl_seconds,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.checkpoints_collection = checkpoints_collection
+        self.writes_collection = writes_collection
+        self.blobs_collection = blobs_collection
+        self.ttl_seconds = ttl_seconds
+        # Channel digests of recent checkpoints, so a child does not re-read its parent.
+        self._refs = TTLCache(max_size=settings.checkpoint_max_threads * 8, ttl_seconds=ttl_seconds)
+
+    @staticmethod
+    def _checkpoint_key(thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> str:
+        return f"{thread_id}|{checkpoint_ns}|{checkpoint_id}"
+
+    async def _parent_refs(self, thread_id: str, checkpoint_ns: str, parent_id: Optional[str]) -> Dict[str, str]:
+        if not parent_id:
+            return {}
+        key = self._checkpoint_key(thread_id, checkpoint_ns, parent_id)
+        refs = self._refs.get(key)
+        if refs is None:
+            document = await MongoManager(self.checkpoints_collection).read_data({"_id": key}, projection={"blob_refs": 1})
+            refs = dict((document or {}).get("blob_refs") or [])
+        return refs
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        parent_id = config["configurable"].get("checkpoint_id")
+        now = datetime.utcnow()
+
+        stored = checkpoint.copy()
+        values: Dict[str, Any] = stored.pop("channel_values")
+        refs = await self._parent_refs(thread_id, checkpoint_ns, parent_id)
+        refs = {channel: digest for channel, digest in refs.items() if channel not in new_versions}
+        blobs: Dict[str, Tuple[str, bytes]] = {}
+        for channel in values:
+            if channel in new_versions or channel not in refs:
+                typed = self.serde.dumps_typed(values[channel])
+                refs[channel] = _digest(typed)
+                blobs[refs[channel]] = typed
+
+        # New payloads are inserted once per digest; inherited ones only have their TTL refreshed.
+        operations = [
+            UpdateOne(
+                {"_id": digest},
+                {"$setOnInsert": {"type": typed[0], "data": typed[1]}, "$set": {"updated_at": now}},
+                upsert=True,
+            )
+            for digest, typed in blobs.items()
+        ]
+        operations += [UpdateOne({"_id": digest}, {"$set": {"updated_at": now}}) for digest in set(refs.values()) - set(blobs)]
+        if operations:
+            await MongoManager(self.blobs_collection).collection.bulk_write(operations, ordered=False)
+
+        key = self._checkpoint_key(thread_id, checkpoint_ns, checkpoint["id"])
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(stored)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        await MongoManager(self.checkpoints_collection).collection.replace_one({"_id": key}, {
+            "_id": key,
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+            "parent_checkpoint_id": parent_id,
+            "type": checkpoint_type,
+            "checkpoint": checkpoint_data,
+            "metadata_type": metadata_type,
+            "metadata": metadata_data,
+            # Channel names are not safe as Mongo field names, so refs are stored as pairs.
+            "blob_refs": [[channel, digest] for channel, digest in refs.items()],
+            "updated_at": now,
+        }, upsert=True)
+        self._refs.set(key, refs)
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        now = datetime.utcnow()
+        operations = []
+        for index, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, index)
+            type_, data = self.serde.dumps_typed(value)
+            document = {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "task_path": task_path,
+                "idx": idx,
+                "channel": channel,
+                "type": type_,
+                "value": data,
+                "updated_at": now,
+            }
+            # Regular writes are idempotent per (task, idx); special writes (errors, interrupts) are replaced.
+            update = {"$setOnInsert": document} if idx >= 0 else {"$set": document}
+            key = f"{self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id)}|{task_id}|{idx}"
+            operations.append(UpdateOne({"_id": key}, update, upsert=True))
+        if operations:
+            await MongoManager(self.writes_collection).collection.bulk_write(operations, ordered=False)
+
+    async def _to_tuple(self, document: Dict[str, Any]) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id = document["thread_id"], document["checkpoint_ns"], document["checkpoint_id"]
+        refs = dict(document.get("blob_refs") or [])
+        self._refs.set(document["_id"], refs)
+
+        blobs_cursor = MongoManager(self.blobs_collection).collection.find({"_id": {"$in": list(set(refs.values()))}})
+        blobs = {blob["_id"]: (blob["type"], blob["data"]) async for blob in blobs_cursor}
+        writes_cursor = MongoManager(self.writes_collection).collection.find(
+            {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}
+        )
+        writes = sorted(
+            [write async for write in writes_cursor],
+            key=lambda write: writes_sort_key(write.get("task_path", ""), write["task_id"], write["idx"]),
+        )
+
+        checkpoint = self.serde.loads_typed((document["type"], document["checkpoint"]))
+        parent_id = document.get("parent_checkpoint_id")
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={
+                **checkpoint,
+                "channel_values": {
+                    channel: self.serde.loads_typed(blobs[digest]) for channel, digest in refs.items() if digest in blobs
+                },
+            },
+            metadata=self.serde.loads_typed((document["metadata_type"], document["metadata"])),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[
+                (write["task_id"], write["channel"], self.serde.loads_typed((write["type"], write["value"])))
+                for write in writes
+            ],
+        )
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        collection = MongoManager(self.checkpoints_collection).collection
+        if checkpoint_id := get_checkpoint_id(config):
+            document = await collection.find_one({"_id": self._checkpoint_key(thread_id, checkpoint_ns, checkpoint_id)})
+        else:
+            document = await collection.find_one(
+                {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}, sort=[("checkpoint_id", DESCENDING)]
+            )
+        return await self._to_tuple(document) if document else None
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        query: Dict[str, Any] = {}
+        if config:
+            query["thread_id"] = config["configurable"]["thread_id"]
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query["checkpoint_ns"] = checkpoint_ns
+            if checkpoint_id := get_checkpoint_id(config):
+                query["checkpoint_id"] = checkpoint_id
+        if before and (before_id := get_checkpoint_id(before)):
+            query.setdefault("checkpoint_id", {})
+            if isinstance(query["checkpoint_id"], dict):
+                query["checkpoint_id"]["$lt"] = before_id
+
+        cursor = MongoManager(self.checkpoints_collection).collection.find(query).sort("checkpoint_id", DESCENDING)
+        # Metadata is stored serialized, so filters are applied after loading.
+        if limit is not None and not filter:
+            cursor = cursor.limit(limit)
+        remaining = limit
+        async for document in cursor:
+            if filter:
+                metadata = self.serde.loads_typed((document["metadata_type"], document["metadata"]))
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+                remaining -= 1
+            yield await self._to_tuple(document)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Blobs are shared across threads by digest and left to their TTL index."""
+        await MongoManager(self.checkpoints_collection).collection.delete_many({"thread_id": thread_id})
+        await MongoManager(self.writes_collection).collection.delete_many({"thread_id": thread_id})
+
+    # Same monotonically increasing string versions as the in-memory saver.
+    get_next_version = InMemorySaver.get_next_version
+
+
+def build_checkpointer() -> BaseCheckpointSaver:
+    """Checkpointer selected by `checkpoint_backend` ("memory" or "mongo")."""
+    if settings.checkpoint_backend == "mongo":
+        logger.info("🧷 Using the MongoDB checkpointer.")
+        return MongoCheckpointSaver()
+    if settings.checkpoint_backend != "memory":
+        logger.warning(f"⚠️ Unknown checkpoint_backend '{settings.checkpoint_backend}'; using memory.")
+    return BoundedMemorySaver()
@@ -1,6 +1,6 @@
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
 
+from src.workflow.checkpointer import build_checkpointer
 from src.workflow.state import AgentState, TechnicalState, FundamentalState, NewsSocialState
 from src.workflow.nodes.technical import (
     trend_agent_node,
@@ -32,6 +32,7 @@ from src.workflow.nodes.introduction import (
     should_continue
 )
 from src.workflow.nodes.data_preparation import run_orchestrator as data_preparation_node
+from src.workflow.speculative import speculative_node
 from src.core.logger import logger
 
 
@@ -45,12 +46,12 @@ def build_technical_graph():
     workflow = StateGraph(TechnicalState)
     
     # Nodes
-    workflow.add_node("trend_agent", trend_agent_node)
-    workflow.add_node("oscillator_agent", oscillator_agent_node)
-    workflow.add_node("volatility_agent", volatility_agent_node)
-    workflow.add_node("volume_agent", volume_agent_node)
-    workflow.add_node("sr_agent", sr_agent_node)
-    workflow.add_node("smart_money_agent", smart_money_agent_node)
+    workflow.add_node("trend_agent", speculative_node("trend_agent", trend_agent_node, "trend_report"))
+    workflow.add_node("oscillator_agent", speculative_node("oscillator_agent", oscillator_agent_node, "oscillator_report"))
+    workflow.add_node("volatility_agent", speculative_node("volatility_agent", volatility_agent_node, "volatility_report"))
+    workflow.add_node("volume_agent", speculative_node("volume_agent", volume_agent_node, "volume_report"))
+    workflow.add_node("sr_agent", speculative_node("sr_agent", sr_agent_node, "sr_report"))
+    workflow.add_node("smart_money_agent", speculative_node("smart_money_agent", smart_money_agent_node, "smart_money_report"))
     workflow.add_node("technical_consensus", technical_consensus_node)
 
     # Dispatcher (Fan-out)
@@ -92,10 +93,10 @@ def build_fundamental_graph():
     workflow = StateGraph(FundamentalState)
     
     # Nodes
-    workflow.add_node("balance_sheet_agent", balance_sheet_node)
-    workflow.add_node("earnings_quality_agent", earnings_quality_node)
-    workflow.add_node("valuation_agent", valuation_node)
-    workflow.add_node("codal_agent", codal_agent_node)
+    workflow.add_node("balance_sheet_agent", speculative_node("balance_sheet_agent", balance_sheet_node, "balance_sheet_report"))
+    workflow.add_node("earnings_quality_agent", speculative_node("earnings_quality_agent", earnings_quality_node, "earnings_quality_report"))
+    workflow.add_node("valuation_agent", speculative_node("valuation_agent", valuation_node, "valuation_report"))
+    workflow.add_node("codal_agent", speculative_node("codal_agent", codal_agent_node, "codal_report"))
     workflow.add_node("fundamental_consensus", fundamental_consensus_node)
 
     # Dispatcher
@@ -133,9 +134,9 @@ def build_social_news_graph():
     workflow = StateGraph(NewsSocialState)
     
     # Nodes
-    workflow.add_node("twitter_agent", twitter_agent_node)
-    workflow.add_node("sahamyab_agent", sahamyab_agent_node)
-    workflow.add_node("news_agent", news_agent_node)
+    workflow.add_node("twitter_agent", speculative_node("twitter_agent", twitter_agent_node, "twitter_report"))
+    workflow.add_node("sahamyab_agent", speculative_node("sahamyab_agent", sahamyab_agent_node, "sahamyab_report"))
+    workflow.add_node("news_agent", speculative_node("news_agent", news_agent_node, "news_report"))
     workflow.add_node("social_news_consensus", social_news_consensus_node)
 
     # Dispatcher
@@ -178,9 +179,9 @@ def build_graph():
     workflow.add_node("data_preparation", data_preparation_node)
     
     # Sub-Graphs
-    workflow.add_node("technical_graph", build_technical_graph())
-    workflow.add_node("fundamental_graph", build_fundamental_graph())
-    workflow.add_node("social_news_graph", build_social_news_graph())
+    workflow.add_node("technical_graph", speculative_node("technical_graph", build_technical_graph(), "technical_consensus_report"))
+    workflow.add_node("fundamental_graph", speculative_node("fundamental_graph", build_fundamental_graph(), "fundamental_consensus_report"))
+    workflow.add_node("social_news_graph", speculative_node("social_news_graph", build_social_news_graph(), "social_news_consensus_report"))
     
     # Reporter
     workflow.add_node("reporter_agent", reporter_node)
@@ -224,9 +225,9 @@ def build_graph():
     
     workflow.add_edge("reporter_agent", END)
     
-    memory = MemorySaver()
+    checkpointer = build_checkpointer()
     # No explicit interrupt_before/after needed as we use interrupt() in the node
-    app = workflow.compile(checkpointer=memory)
+    app = workflow.compile(checkpointer=checkpointer)
     logger.info("Graph constructed and compiled successfully.")
     return app
 
@@ -1,126 +1,218 @@
 import asyncio
 from datetime import datetime
 
+from pymongo.errors import PyMongoError
+
 from src.core.mongo_manger import MongoManager
+from src.core.cache import symbol_data_cache
+from src.core.config import settings
+from src.core.single_flight import pipeline_flight, pipeline_lease
 from src.workflow.state import AgentState
 from src.services.prepare_data import StockAnalysisPipeline
+from src.services.freshness import SECTIONS, freshness_policy
+from src.services.news_clustering import cluster_news_events
+from src.services.symbol_details import symbol_details
+from src.workflow.run_data import RunDataCache, run_data_ref
 from src.core.logger import logger
 
 
-async def get_latest_symbol_data(symbol: str) -> dict | None:
-    """Fetch the latest stored analysis document for a symbol."""
+# Fields of the lean summary document the workflow reads. Bars, news and posts live in the
+# detail collections (see SymbolDetailStore) and are loaded per subgraph; the symbol document
+# only holds Tavily headlines and snippets, full results live in the Tavily collection.
+WORKFLOW_PROJECTION = {
+    "symbol": 1,
+    "short_name": 1,
+    "analysis_datetime": 1,
+    "section_updated_at": 1,
+    "technical_analysis": 1,
+    "market_data": 1,
+    "fundamental_analysis": 1,
+    "search.tavily.answer": 1,
+    "search.tavily.results.title": 1,
+    "search.tavily.results.url": 1,
+    "search.tavily.results.published_date": 1,
+    "search.tavily.results.content": 1,
+}
+
+FRESHNESS_PROJECTION = {"analysis_datetime": 1, "section_updated_at": 1}
+
+
+async def get_latest_symbol_data(symbol: str, projection: dict | None = None) -> dict | None:
+    """Fetch the latest stored analysis document for a symbol, optionally only the projected fields."""
     mongo = MongoManager()
+    return await mongo.read_data(
+        {"symbol": symbol},
+        limit=1,
+        sort=[("analysis_datetime", -1)],
+        projection=projection,
+    )
+
+async def get_stale_sections(symbol: str) -> list[str]:
+    """
+    Checks the database to determine which document sections need a refresh.
+    Only the section timestamps are read; see FreshnessPolicy for the rules.
+    """
+    try:
+        document = await get_latest_symbol_data(symbol, projection=FRESHNESS_PROJECTION)
+        return freshness_policy.stale_sections(symbol, document)
+
+    except Exception as e:
+        logger.error(f"❌ Error checking DB status for '{symbol}': {e}", exc_info=True)
+        logger.warning(f"⚠️ Falling back to a full pipeline run for '{symbol}' because cache validation failed.")
+        return list(SECTIONS)
+
+
+async def run_pipeline(symbol: str, sections: list[str] | None = None) -> dict | None:
+    """
+    Runs the pipeline for `sections` (all by default) and returns the persisted document.
+    With PIPELINE_LEASE_ENABLED, a worker that finds the symbol leased by another worker
+    waits for that run instead and returns None, so the caller reads the stored result.
+    If the lease cannot be checked, or the other run outlives the lease TTL, it runs locally.
+    """
+    lease_key = f"pipeline:{symbol}"
+    leased = False
+    if settings.pipeline_lease_enabled:
+        try:
+            leased = await pipeline_lease.acquire(lease_key)
+            if not leased:
+                logger.info(f"⏳ Another worker is refreshing '{symbol}'; waiting for its result.")
+                if await pipeline_lease.wait_released(lease_key, settings.pipeline_lease_poll_seconds):
+                    return None
+                logger.warning(f"⚠️ Lease on '{symbol}' still held after its TTL; running the pipeline locally.")
+        except PyMongoError as e:
+            logger.warning(f"⚠️ Pipeline lease unavailable for '{symbol}'; running without it: {e}")
 
     try:
-        return await mongo.read_data(
-            {"symbol": symbol},
-            limit=1,
-            sort=[("analysis_datetime", -1)],
-        )
+        logger.info(f"🚀 Initializing Pipeline for: {symbol}")
+        pipeline = StockAnalysisPipeline(symbol)
+        document = await pipeline.execute(sections, projection=WORKFLOW_PROJECTION)
+        logger.info(f"✨ Pipeline execution finished for: {symbol}")
+        return document
+    except Exception as e:
+        logger.critical(f"🔥 Pipeline execution failed: {e}", exc_info=True)
+        return None
     finally:
-        mongo.close()
+        if leased:
+            await pipeline_lease.release(lease_key)
 
-async def should_run_pipeline(symbol: str) -> bool:
+
+async def _load_uncached_symbol_data(symbol: str) -> dict | None:
+    # 1. Check Condition
+    stale_sections = await get_stale_sections(symbol)
+
+    # 2. Refresh only the stale sections
+    if stale_sections:
+        document = await run_pipeline(symbol, stale_sections)
+        if document:
+            return document
+
+    # 3. Reuse the stored data (fresh, or the last good copy if the refresh failed).
+    document = await get_latest_symbol_data(symbol, projection=WORKFLOW_PROJECTION)
+    if document:
+        symbol_data_cache.set(symbol, document)
+    return document
+
+
+async def load_symbol_data(symbol: str) -> dict | None:
     """
-    Checks the database to determine if the pipeline needs to run.
-    Returns True if:
-      1. The symbol does not exist in the DB.
-      2. The symbol exists but 'analysis_datetime' is not from today.
+    Returns the latest symbol document with at most one Mongo read:
+    the in-process cache first, then the document the pipeline just persisted,
+    and only then a projected read from Mongo.
+    Concurrent callers for the same symbol share one check/refresh via pipeline_flight.
     """
-    try:
-        document = await get_latest_symbol_data(symbol)
-
-        if not document:
-            logger.info(f"🔎 Symbol '{symbol}' not found in DB. Scheduling analysis.")
-            return True
-
-        # Check timestamp
-        last_analysis_ts = document.get('analysis_datetime')
-        
-        if not last_analysis_ts:
-            logger.warning(f"⚠️ Symbol '{symbol}' exists but has no timestamp. Scheduling analysis.")
-            return True
-
-        # Ensure last_analysis_ts is a datetime object (Motor returns datetime objects)
-        if isinstance(last_analysis_ts, str):
-            try:
-                last_analysis_ts = datetime.fromisoformat(last_analysis_ts)
-            except ValueError:
-                logger.error(f"❌ Invalid date format for '{symbol}'. Scheduling analysis.")
-                return True
-
-        # Compare dates
-        today = datetime.now().date()
-        analysis_date = last_analysis_ts.date()
-
-        if analysis_date < today:
-            logger.info(f"📉 Data for '{symbol}' is outdated ({analysis_date}). Scheduling update for {today}.")
-            return True
-        elif analysis_date == today:
-            logger.info(f"✅ Data for '{symbol}' is already up-to-date ({today}). Skipping.")
-            return False
-        else:
-            # Edge case: Future date?
-            logger.warning(f"⚠️ Future date detected for '{symbol}'. Skipping to be safe.")
-            return False
+    cached = symbol_data_cache.get(symbol)
+    if cached and not freshness_policy.stale_sections(symbol, cached):
+        logger.info(f"⚡ Using in-process cached data for '{symbol}'.")
+        return cached
+
+    return await pipeline_flight.do(symbol, lambda: _load_uncached_symbol_data(symbol))
+
+
+async def load_technical_inputs(summary: dict) -> dict:
+    """Technical subgraph input (indicator payloads) plus the price bars for the chart."""
+    bars = await symbol_details.load(summary, "bars", fields=("price_history",))
+    return {
+        "price_history": bars.get("price_history") or [],
+        "technical_data": summary["technical_analysis"],
+    }
+
+
+async def load_news_social_inputs(summary: dict) -> dict:
+    """News/Codal/web events and social posts; the Codal agent reads the distinct notices."""
+    news, posts = await asyncio.gather(
+        symbol_details.load(summary, "news"),
+        symbol_details.load(summary, "posts"),
+    )
+    # Same event reported by the feed, Codal and the web is collapsed to one canonical item.
+    tavily = (summary.get("search") or {}).get("tavily") or {}
+    news_events = cluster_news_events(news.get("news"), news.get("codal"), tavily.get("results"))
+    return {
+        "distinct_codal": [event["item"] for event in news_events if event["source"] == "codal"],
+        "news_social_data": {
+            "symbol": summary.get("symbol"),
+            "short_name": summary.get("short_name"),
+            "analysis_date": datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+            "rapid_tweet": posts.get("rapid_tweets") or [],
+            "latest_sahamyab_tweet": posts.get("latest_sahamyab_tweet") or [],
+            "news_events": news_events,
+            "search_tavily_answer": tavily.get("answer", "")
+        },
+    }
+
+
+async def build_run_inputs(summary: dict) -> dict:
+    """Every slice of a run's inputs (see RUN_DATA_SLICES), plus its `data_ref`."""
+    technical_inputs, news_social_inputs = await asyncio.gather(
+        load_technical_inputs(summary),
+        load_news_social_inputs(summary),
+    )
+    return {
+        "data_ref": run_data_ref(summary),
+        "technical": technical_inputs["technical_data"],
+        "price_history": technical_inputs["price_history"],
+        "fundamental": {
+            "symbol_name": summary["symbol"],
+            "name" : summary["short_name"],
+            "market_data" : summary["market_data"],
+            "fundamental_analysis" : summary["fundamental_analysis"],
+            "codal": news_social_inputs["distinct_codal"]
+        },
+        "news_social": news_social_inputs["news_social_data"],
+    }
+
+
+async def _reload_run_inputs(doc_id: str) -> dict | None:
+    summary = await MongoManager().read_data({"_id": doc_id}, projection=WORKFLOW_PROJECTION)
+    return await build_run_inputs(summary) if summary else None
+
+
+run_data = RunDataCache(loader=_reload_run_inputs)
 
-    except Exception as e:
-        logger.error(f"❌ Error checking DB status for '{symbol}': {e}", exc_info=True)
-        logger.warning(f"⚠️ Falling back to pipeline execution for '{symbol}' because cache validation failed.")
-        return True
 
 async def run_orchestrator(state: AgentState):
     """
     Orchestrates the check and execution flow.
+    The inputs are kept in `run_data`; state only carries their `data_ref`.
     """
     symbol = state["symbol"]
     logger.info(f"--- 🏁 Starting Data Orchestrator for {symbol} ---")
-    
-    # 1. Check Condition
-    run_required = await should_run_pipeline(symbol)
 
-    # 2. Execute if needed
-    if run_required:
-        try:
-            logger.info(f"🚀 Initializing Pipeline for: {symbol}")
-            pipeline = StockAnalysisPipeline(symbol)
-            await pipeline.execute()
-            logger.info(f"✨ Pipeline execution finished for: {symbol}")
-        except Exception as e:
-            logger.critical(f"🔥 Pipeline execution failed: {e}", exc_info=True)
-
-    # 3. Load the latest stored data regardless of whether we reused cache or refreshed it.
-    symbol_data = await get_latest_symbol_data(symbol)
+    symbol_data = await load_symbol_data(symbol)
     if not symbol_data:
         raise RuntimeError(f"No stored analysis data found for symbol '{symbol}' after preparation.")
 
+    inputs = await build_run_inputs(symbol_data)
+    data_ref = run_data.put(inputs["data_ref"], inputs)
+
     logger.info("--- 🏁 Orchestrator Finished ---")
     return {
         "symbol": symbol_data["symbol"],
         "short_name": symbol_data.get("short_name", ""),
-        "price_history": symbol_data.get("price_history", []),
-        "technical_data" : symbol_data['technical_analysis'],
-        "fundamental_data" : {
-            "symbol_name": symbol_data["symbol"],
-            "name" : symbol_data["short_name"],
-            "market_data" : symbol_data["market_data"],
-            "fundamental_analysis" : symbol_data["fundamental_analysis"],
-            "codal": symbol_data.get("news_announcements", {}).get("codal", [])
-        },
-        "news_social_data": {
-            "symbol": symbol_data.get("symbol"),
-            "short_name": symbol_data.get("short_name"),
-            "analysis_date": datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
-            "rapid_tweet": symbol_data.get("social_post", {}).get("rapid_tweets", []),
-            "latest_sahamyab_tweet": symbol_data.get("social_post", {}).get("latest_sahamyab_tweet", []),
-            "news": symbol_data.get("news_announcements", {}).get("news", []),
-            "search_tavily_answer": symbol_data.get("search", {}).get("tavily", {}).get("answer", "")
-        }
+        "data_ref": data_ref,
     }
 
 
 
-
 if __name__ == "__main__":
     # You can change this target symbol or load it from args
     TARGET_SYMBOL = "فملی"
@@ -1,5 +1,6 @@
 import json
 from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 from langchain_core.runnables import RunnableLambda, RunnableConfig
 from langchain_core.messages import HumanMessage
 
@@ -24,10 +25,15 @@ from src.core.prompt import (
 from src.utils.helper import (
     create_prompt, 
     _invoke_structured_with_recovery, 
-    scrape_codal_report, 
     parse_persian_date,
+    item_timestamp,
     get_session_id,
 )
+from src.workflow.speculative import speculative_consensus
+from src.workflow.nodes.data_preparation import run_data
+from src.services.codal_store import codal_store
+from src.services.fundamental.codal_ranker import codal_ranker
+from src.core.config import settings
 from src.services.fundamental.balance_sheet import BalanceSheetAgent
 from src.services.fundamental.earnings_cash import EarningsQualityAgent
 from src.services.fundamental.valuation_market import ValuationAgent
@@ -37,7 +43,7 @@ llm = LLMFactory.get_model(node_name="fundamental")
 
 async def balance_sheet_node(state: FundamentalState, config: RunnableConfig):
     logger.info("📊 Starting Balance Sheet Analysis Node...")
-    agent = BalanceSheetAgent(state["fundamental_data"])
+    agent = BalanceSheetAgent(await run_data.get(state["data_ref"], "fundamental"))
     data = agent.process()
     
     user_content = (
@@ -65,7 +71,7 @@ async def balance_sheet_node(state: FundamentalState, config: RunnableConfig):
 
 async def earnings_quality_node(state: FundamentalState, config: RunnableConfig):
     logger.info("💰 Starting Earnings Quality Analysis Node...")
-    agent = EarningsQualityAgent(state["fundamental_data"])
+    agent = EarningsQualityAgent(await run_data.get(state["data_ref"], "fundamental"))
     data = agent.process()
     
     user_content = (
@@ -93,7 +99,7 @@ async def earnings_quality_node(state: FundamentalState, config: RunnableConfig)
 
 async def valuation_node(state: FundamentalState, config: RunnableConfig):
     logger.info("🏷️ Starting Valuation Analysis Node...")
-    agent = ValuationAgent(state["fundamental_data"])
+    agent = ValuationAgent(await run_data.get(state["data_ref"], "fundamental"))
     data = agent.process()
     
     user_content = (
@@ -121,62 +127,51 @@ async def valuation_node(state: FundamentalState, config: RunnableConfig):
 
 async def codal_agent_node(state: FundamentalState, config: RunnableConfig):
     logger.info("📜 Starting Codal Report Analysis Node...")
-    data = state["fundamental_data"].get("codal", [])
+    data = (await run_data.get(state["data_ref"], "fundamental")).get("codal", [])
     symbol = state.get("symbol", "")
     
 
-    # Get current date in Gregorian
-    current_date = datetime.now()
-
-    # Calculate date 60 days ago
-    sixty_days_ago = current_date - timedelta(days=60)
+    # Dates are parsed once at ingestion (`published_at`, naive UTC); older documents are parsed here.
+    tehran = ZoneInfo(settings.market_timezone)
+    sixty_days_ago = datetime.utcnow() - timedelta(days=60)
 
     # Filter and sort the data
-    filtered_data = []
-
+    dated_items = []
     for item in data:
-        try:
-            # Parse the Persian publish date
-            publish_date = parse_persian_date(item["publishDate"])
-            
-            # Check if the date is within the last 60 days
-            if publish_date >= sixty_days_ago:
-                filtered_data.append(item)
-        except Exception as e:
-            logger.error(f"❌ Error parsing date for item {item.get('id', 'unknown')}: {e}")
-
-    # Sort filtered data by publishDate (newest first)
-    sorted_filtered_data = sorted(
-        filtered_data, 
-        key=lambda x: parse_persian_date(x["publishDate"]), 
-        reverse=True
-    )
+        publish_date = item_timestamp(item, "publishDate", parse_persian_date, tz=tehran)
+        if publish_date is None:
+            logger.error(f"❌ Error parsing date for item {item.get('id', 'unknown')}: {item.get('publishDate')!r}")
+        elif publish_date >= sixty_days_ago:
+            dated_items.append((publish_date, item))
+
+    # Sort filtered data by publish date (newest first)
+    dated_items.sort(key=lambda pair: pair[0], reverse=True)
+    sorted_filtered_data = [item for _, item in dated_items]
     
     filtered_reports = sorted_filtered_data[:20]
     clean_filtered_reports = [{'id':x['id'], 'title':x['title'], 'url':x['url']} for x in filtered_reports]
 
     logger.info(f"🔎 Found {len(clean_filtered_reports)} relevant Codal reports (last 60 days).")
 
-    # 2. Select Relevant Reports
-    codal_list_prompt = CODAL_LIST_PROMPT.format(symbol=symbol, data='\n'.join(json.dumps(d,ensure_ascii=False) for d in clean_filtered_reports))
-    prompt_value_select = [HumanMessage(content=codal_list_prompt)]
+    # 2. Select Relevant Reports (rule-based ranker first, LLM only when the ranking is ambiguous)
+    selected_ids, ambiguous = codal_ranker.rank(clean_filtered_reports)
+    if not settings.codal_ranker_enabled or ambiguous:
+        codal_list_prompt = CODAL_LIST_PROMPT.format(symbol=symbol, data='\n'.join(json.dumps(d,ensure_ascii=False) for d in clean_filtered_reports))
+        prompt_value_select = [HumanMessage(content=codal_list_prompt)]
 
-    selection_result, _ = await _invoke_structured_with_recovery(
-        llm, prompt_value_select, CodalReportSelection, node_name="codal_agent", session_id=get_session_id(config)
-    )
+        selection_result, _ = await _invoke_structured_with_recovery(
+            llm, prompt_value_select, CodalReportSelection, node_name="codal_agent", session_id=get_session_id(config)
+        )
+        selected_ids = selection_result.selected_ids
+    else:
+        logger.info("⚡ Codal reports selected by the local ranker; skipping the selection LLM call.")
     
-    final_codal_list = [x for x in clean_filtered_reports if x['id'] in selection_result.selected_ids]
+    final_codal_list = [x for x in clean_filtered_reports if x['id'] in selected_ids]
     logger.info(f"📌 Selected {len(final_codal_list)} reports for detailed analysis.")
 
-    # 3. Scrape Content
-    scraped_contents = []
-    for data in final_codal_list:
-        url = data['url']
-        try:
-            content = await scrape_codal_report(url)
-            scraped_contents.append(content[:2000]) # Truncate to avoid context limit
-        except Exception as e:
-            logger.warning(f"⚠️ Failed to scrape {url}: {e}")
+    # 3. Scrape Content (stored filings are reused, misses scraped concurrently, failures skipped)
+    reports = await codal_store.fetch([x['url'] for x in final_codal_list])
+    scraped_contents = [content[:2000] for content in reports.values() if content] # Truncate to avoid context limit
 
     if not scraped_contents:
         logger.warning("⚠️ No accessible reports found for Codal analysis.")
@@ -190,7 +185,7 @@ async def codal_agent_node(state: FundamentalState, config: RunnableConfig):
     prompt_analyze = [HumanMessage(content=codal_content_prompt)]
 
     analysis_result, meta = await _invoke_structured_with_recovery(
-        llm, prompt_analyze, CodalAnalysisOutput, node_name="codal_agent", session_id=get_session_id(config)
+        llm, prompt_analyze, CodalAnalysisOutput, node_name="codal_analysis", session_id=get_session_id(config)
     )
     
     response = {"codal_report": analysis_result}
@@ -236,12 +231,17 @@ async def fundamental_consensus_node(state: FundamentalState, config: RunnableCo
         "codal_data": json.dumps(x.get("codal_report", {}), ensure_ascii=False, default=str),
     })
 
-    prompt_value = (to_prompt_vars | prompt).invoke(state)
-    result, meta = await _invoke_structured_with_recovery(
-        llm, prompt_value, FundamentalAnalysisOutput, node_name="fundamental_consensus", session_id=get_session_id(config)
+    async def _run_consensus(inputs):
+        prompt_value = (to_prompt_vars | prompt).invoke(inputs)
+        return await _invoke_structured_with_recovery(
+            llm, prompt_value, FundamentalAnalysisOutput, node_name="fundamental_consensus", session_id=get_session_id(config)
+        )
+
+    result, meta, late_reports = await speculative_consensus(
+        state, config, required_keys, _run_consensus, verdict_key="fundamental_consensus_report"
     )
     
-    response = {"fundamental_consensus_report": result}
+    response = {"fundamental_consensus_report": result, **late_reports}
     if meta:
         response["fundamental_consensus_meta"] = meta
     
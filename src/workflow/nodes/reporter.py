@@ -4,6 +4,7 @@ from src.utils.llm_factory import LLMFactory
 from src.workflow.state import AgentState
 from src.core.prompt import REPORTER_AGENT
 from src.utils.helper import create_prompt, get_session_id, invoke_llm_and_log, save_agent_run, build_analysis_timing
+from src.workflow.speculative import speculative_consensus
 from src.core.logger import logger
 
 llm = LLMFactory.get_model(node_name="reporter")
@@ -48,22 +49,29 @@ async def reporter_node(state: AgentState, config: RunnableConfig):
         "social_news_consensus": json.dumps(x.get("social_news_consensus_report", {}), ensure_ascii=False, default=str),
     })
 
-    # We expect a string (Markdown), not structured JSON
-    prompt_value = (to_prompt_vars | prompt).invoke(state)
-    
-    # Simple invoke for text output
     session_id = get_session_id(config)
-    response_msg = await invoke_llm_and_log(
-        llm,
-        prompt_value,
-        node_name="reporter_agent",
-        session_id=session_id,
-    )
+
+    async def _run_reporter(inputs):
+        # We expect a string (Markdown), not structured JSON
+        prompt_value = (to_prompt_vars | prompt).invoke(inputs)
+
+        # Simple invoke for text output
+        response = await invoke_llm_and_log(
+            llm,
+            prompt_value,
+            node_name="reporter_agent",
+            session_id=session_id,
+        )
+        return response, None
+
+    required_keys = ["technical_consensus_report", "fundamental_consensus_report", "social_news_consensus_report"]
+    response_msg, _, late_reports = await speculative_consensus(state, config, required_keys, _run_reporter)
     
     logger.info("✅ Reporter Node Completed. Final report generated.")
     timing_data = build_analysis_timing(state)
-    await save_agent_run(session_id=session_id, state=state, final_report=response_msg.content)
+    await save_agent_run(session_id=session_id, state={**state, **late_reports}, final_report=response_msg.content)
     return {
         "final_report": response_msg.content,
+        **late_reports,
         **timing_data,
     }
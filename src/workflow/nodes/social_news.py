@@ -1,5 +1,6 @@
 import json
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 from langchain_core.runnables import RunnableLambda, RunnableConfig
 from src.utils.llm_factory import LLMFactory
 from src.workflow.state import NewsSocialState
@@ -15,37 +16,57 @@ from src.core.prompt import (
     NEWS_PROMPT,
     SOCIAL_NEWS_AGENT_PROMPT,
 )
-from src.utils.helper import create_prompt, _invoke_structured_with_recovery , parse_iso_date, get_session_id
+from src.utils.helper import (
+    create_prompt,
+    _invoke_structured_with_recovery,
+    parse_iso_date,
+    parse_twitter_date,
+    get_session_id,
+    item_timestamp,
+    to_utc_naive,
+)
+from src.services.social.post_stats import summarize_posts
+from src.workflow.speculative import speculative_consensus
+from src.workflow.nodes.data_preparation import run_data
+from src.core.config import settings
 from src.core.logger import logger
 
 llm = LLMFactory.get_model(node_name="social_news")
 
 async def twitter_agent_node(state: NewsSocialState, config: RunnableConfig):
     logger.info("🐦 Starting Twitter Analysis Node...")
-    data = state["news_social_data"].get("rapid_tweet", [])
-    symbol = state["news_social_data"].get("symbol", "")
-    short_name = state["news_social_data"].get("short_name", "")
-    current_date = state["news_social_data"].get("analysis_date", str(datetime.now()))
-    
-    sorted_tweets = sorted(data, key=lambda x: int(x.get("likes", 0)), reverse=True)
-    top_tweets = sorted_tweets[:10]
+    news_social = await run_data.get(state["data_ref"], "news_social")
+    data = news_social.get("rapid_tweet", [])
+    symbol = news_social.get("symbol", "")
+    short_name = news_social.get("short_name", "")
+    current_date = news_social.get("analysis_date", str(datetime.now()))
     
-    cleaned_tweets = []
-    for t in top_tweets:
-        cleaned_tweets.append({
+    tweets = [{**t, "published_at": item_timestamp(t, "created_at", parse_twitter_date)} for t in data]
+    post_stats, sample = summarize_posts(
+        tweets, text_key="text", engagement_keys=("likes", "retweets"), time_key="published_at"
+    )
+    cleaned_tweets = [
+        {
             "text": t.get("text"),
             "likes": t.get("likes"),
             "retweets": t.get("retweets"),
             "views": t.get("views"),
-            "created_at": t.get("created_at")
-        })
+            "created_at": t.get("created_at"),
+            "lexicon_sentiment": t.get("lexicon_sentiment"),
+        }
+        for t in sample
+    ]
 
-    logger.info(f"🐦 Analyzed top {len(cleaned_tweets)} tweets for {symbol}.")
+    logger.info(
+        f"🐦 Pre-scored {len(data)} tweets for {symbol}: "
+        f"{post_stats['unique_posts']} unique, {len(cleaned_tweets)} sampled for the LLM."
+    )
 
     input_data = {
         "symbol": symbol,
         "short_name": short_name,
         "current_date": current_date,
+        "post_stats": post_stats,
         "tweets": cleaned_tweets
     }
     
@@ -70,34 +91,38 @@ async def twitter_agent_node(state: NewsSocialState, config: RunnableConfig):
 
 async def sahamyab_agent_node(state: NewsSocialState, config: RunnableConfig):
     logger.info("💬 Starting Sahamyab Analysis Node...")
-    data = state["news_social_data"].get("latest_sahamyab_tweet", [])
-    symbol = state["news_social_data"].get("symbol", "")
-    short_name = state["news_social_data"].get("short_name", "")
-    current_date = state["news_social_data"].get("analysis_date", str(datetime.now()))
+    news_social = await run_data.get(state["data_ref"], "news_social")
+    data = news_social.get("latest_sahamyab_tweet", [])
+    symbol = news_social.get("symbol", "")
+    short_name = news_social.get("short_name", "")
+    current_date = news_social.get("analysis_date", str(datetime.now()))
     
-    # Sort by sendTime descending
-    sorted_data = sorted(
-        data, 
-        key=lambda x: parse_iso_date(x.get("sendTime")) or datetime(1970, 1, 1, tzinfo=timezone.utc), 
-        reverse=True
+    tehran = ZoneInfo(settings.market_timezone)
+    comments = [{**c, "published_at": item_timestamp(c, "sendTime", parse_iso_date, tz=tehran)} for c in data]
+    post_stats, sample = summarize_posts(
+        comments, text_key="content", engagement_keys=("likeCount", "retwitCount"), time_key="published_at"
     )
-    top_comments = sorted_data[:10]
-    
-    cleaned_comments = []
-    for c in top_comments:
-        cleaned_comments.append({
+    cleaned_comments = [
+        {
             "content": c.get("content"),
             "date": c.get("sendTime"),
             "likeCount": c.get("likeCount"),
-            "retwitCount": c.get("retwitCount")
-        })
-    
-    logger.info(f"💬 Analyzed top {len(cleaned_comments)} Sahamyab comments for {symbol}.")
+            "retwitCount": c.get("retwitCount"),
+            "lexicon_sentiment": c.get("lexicon_sentiment"),
+        }
+        for c in sample
+    ]
+
+    logger.info(
+        f"💬 Pre-scored {len(data)} Sahamyab comments for {symbol}: "
+        f"{post_stats['unique_posts']} unique, {len(cleaned_comments)} sampled for the LLM."
+    )
 
     input_data = {
         "symbol": symbol,
         "short_name": short_name,
         "current_date": current_date,
+        "post_stats": post_stats,
         "comments": cleaned_comments
     }
     
@@ -122,53 +147,38 @@ async def sahamyab_agent_node(state: NewsSocialState, config: RunnableConfig):
 
 async def news_agent_node(state: NewsSocialState, config: RunnableConfig):
     logger.info("📰 Starting News Analysis Node...")
-    data = state["news_social_data"].get("news", [])
-    symbol = state["news_social_data"].get("symbol", "")
-    short_name = state["news_social_data"].get("short_name", "")
-    analysis_date_str = state["news_social_data"].get("analysis_date")
-    
-    filtered_news = []
-    
-    if analysis_date_str:
-        try:
-            current_date_dt = parse_iso_date(analysis_date_str)
-            if current_date_dt:
-                threshold_date = current_date_dt - timedelta(days=30)
-                
-                # Filter last 30 days
-                valid_news = []
-                for n in data:
-                    news_date_str = n.get("date")
-                    news_dt = parse_iso_date(news_date_str)
-                    
-                    if news_dt and news_dt >= threshold_date.replace(tzinfo=timezone.utc):
-                        valid_news.append(n)
-                
-                # Sort by date descending
-                # (Assuming news_dt comparison works with offset-aware datetimes)
-                valid_news.sort(key=lambda x: parse_iso_date(x.get("date")), reverse=True)
-                
-                # Take top 10
-                filtered_news = valid_news[:10]
-            else:
-                # Fallback if parsing fails
-                filtered_news = data[:10]
-        except Exception as e:
-            logger.error(f"❌ Error filtering news dates: {e}")
-            filtered_news = data[:10]
+    news_social = await run_data.get(state["data_ref"], "news_social")
+    events = news_social.get("news_events", [])
+    symbol = news_social.get("symbol", "")
+    short_name = news_social.get("short_name", "")
+    analysis_date_str = news_social.get("analysis_date")
+    limit = settings.news_events_limit
+
+    # Events are clustered across the feed, Codal and Tavily and sorted newest first.
+    current_date_dt = to_utc_naive(parse_iso_date(analysis_date_str)) if analysis_date_str else None
+    if current_date_dt:
+        threshold_date = current_date_dt - timedelta(days=30)
+        dated = [e for e in events if e.get("published_at") and e["published_at"] >= threshold_date]
+        undated = [e for e in events if not e.get("published_at")]
+        filtered_events = (dated + undated)[:limit]
     else:
-        filtered_news = data[:10]
+        filtered_events = events[:limit]
 
     # Map fields
     cleaned_news = []
-    for n in filtered_news:
+    for event in filtered_events:
+        item = event["item"]
         cleaned_news.append({
-            "date": n.get("date"),
-            "body": n.get("body"),
-            "type": n.get("type")
+            "date": event.get("published_at"),
+            "source": event["source"],
+            "title": item.get("title"),
+            "body": event.get("body"),
+            "type": item.get("type") or event["source"],
+            "reported_by": event["sources"],
+            "report_count": event["item_count"],
         })
 
-    logger.info(f"📰 Analyzed {len(cleaned_news)} news items for {symbol}.")
+    logger.info(f"📰 Analyzed {len(cleaned_news)} distinct news events for {symbol} (of {len(events)}).")
 
     input_data = {
         "symbol": symbol,
@@ -206,10 +216,11 @@ async def social_news_consensus_node(state: NewsSocialState, config: RunnableCon
         logger.warning(f"⏳ Social News Consensus waiting for inputs: {missing}")
         return {}
         
-    tavily_answer = state["news_social_data"].get("search_tavily_answer", "")
-    symbol = state["news_social_data"].get("symbol", "")
-    short_name = state["news_social_data"].get("short_name", "")
-    current_date = state["news_social_data"].get("analysis_date", "")
+    news_social = await run_data.get(state["data_ref"], "news_social")
+    tavily_answer = news_social.get("search_tavily_answer", "")
+    symbol = news_social.get("symbol", "")
+    short_name = news_social.get("short_name", "")
+    current_date = news_social.get("analysis_date", "")
 
     input_data = {
         "symbol": symbol,
@@ -232,10 +243,15 @@ async def social_news_consensus_node(state: NewsSocialState, config: RunnableCon
         "schema_json": json.dumps(NewsSocialFusionOutput.model_json_schema(), ensure_ascii=False)
     })
 
-    prompt_value = (to_prompt_vars | prompt).invoke(input_data)
-    result, meta = await _invoke_structured_with_recovery(
-        llm, prompt_value, NewsSocialFusionOutput, node_name="social_news_consensus", session_id=get_session_id(config)
+    async def _run_consensus(inputs):
+        prompt_value = (to_prompt_vars | prompt).invoke({**input_data, **{key: inputs.get(key) for key in required_keys}})
+        return await _invoke_structured_with_recovery(
+            llm, prompt_value, NewsSocialFusionOutput, node_name="social_news_consensus", session_id=get_session_id(config)
+        )
+
+    result, meta, late_reports = await speculative_consensus(
+        state, config, required_keys, _run_consensus, verdict_key="social_news_consensus_report"
     )
     
     logger.info("✅ Social & News Consensus Completed.")
-    return {"social_news_consensus_report": result}
+    return {"social_news_consensus_report": result, **late_reports}
@@ -22,21 +22,49 @@ from src.core.prompt import (
     SMART_MOENY_PROMPT,
     TECHNICAL_AGENT,
 )
+from src.services.technical.rule_reports import (
+    trend_rule_report,
+    oscillator_rule_report,
+    volatility_rule_report,
+    volume_rule_report,
+    sr_rule_report,
+    smart_money_rule_report,
+)
 from src.utils.helper import create_prompt, _invoke_structured_with_recovery, get_session_id
+from src.workflow.speculative import speculative_consensus
+from src.workflow.nodes.data_preparation import run_data
+from src.core.config import settings
 from src.core.logger import logger
 
 
 llm = LLMFactory.get_model(node_name="technical")
 
+
+def _rule_report(node_name: str, build, *args):
+    """Report built by rules when the node is listed in `technical_rule_nodes`; None means use the LLM."""
+    if node_name not in settings.technical_rule_nodes:
+        return None
+    report = build(*args)
+    if report is None:
+        logger.warning(f"⚠️ {node_name}: analyzer output incomplete for the rule-based report; using the LLM.")
+    return report
+
+
 async def trend_agent_node(state: TechnicalState, config: RunnableConfig):
     logger.info("📈 Starting Trend Analysis Node...")
-    data = state["technical_data"].get("trend", {})
-    visual = state["technical_data"].get("visuals", {})
+    technical = await run_data.get(state["data_ref"], "technical")
+    data = technical.get("trend", {})
+    visual = technical.get("visuals", {})
     
     input_data = {
         **data ,
         **visual
     }
+    report = _rule_report("trend_agent", trend_rule_report, data, visual)
+    if report is not None:
+        logger.info("✅ Trend Analysis Completed (rule-based).")
+        return {"trend_report": report}
+
     user_content = (
     "INPUT JSON:\n{input_json}\n\n"
     "Return JSON that matches this schema:\n{schema_json}\n"
@@ -61,12 +89,18 @@ async def trend_agent_node(state: TechnicalState, config: RunnableConfig):
 async def oscillator_agent_node(state: TechnicalState, config: RunnableConfig):
     logger.info("〰️ Starting Oscillator Analysis Node...")
     # Mapping 'oscillators' from input key usually found in 'technical_analysis'
-    data = state["technical_data"].get("oscillators", {})
-    visual = state["technical_data"].get("visuals", {})
+    technical = await run_data.get(state["data_ref"], "technical")
+    data = technical.get("oscillators", {})
+    visual = technical.get("visuals", {})
     input_data = {
         **data ,
         **visual
     }
+    report = _rule_report("oscillator_agent", oscillator_rule_report, data, visual)
+    if report is not None:
+        logger.info("✅ Oscillator Analysis Completed (rule-based).")
+        return {"oscillator_report": report}
+
     user_content = (
     "INPUT JSON:\n{input_json}\n\n"
     "Return JSON that matches this schema:\n{schema_json}\n"
@@ -90,13 +124,19 @@ async def oscillator_agent_node(state: TechnicalState, config: RunnableConfig):
 
 async def volatility_agent_node(state: TechnicalState, config: RunnableConfig):
     logger.info("🌩️ Starting Volatility Analysis Node...")
-    data = state["technical_data"].get("volatility", {})
-    visual = state["technical_data"].get("visuals", {})
+    technical = await run_data.get(state["data_ref"], "technical")
+    data = technical.get("volatility", {})
+    visual = technical.get("visuals", {})
     input_data = {
         **data ,
         **visual
     }
 
+    report = _rule_report("volatility_agent", volatility_rule_report, data, visual)
+    if report is not None:
+        logger.info("✅ Volatility Analysis Completed (rule-based).")
+        return {"volatility_report": report}
+
     user_content = (
     "INPUT JSON:\n{input_json}\n\n"
     "Return JSON that matches this schema:\n{schema_json}\n"
@@ -119,12 +159,18 @@ async def volatility_agent_node(state: TechnicalState, config: RunnableConfig):
 
 async def volume_agent_node(state: TechnicalState, config: RunnableConfig):
     logger.info("📊 Starting Volume Analysis Node...")
-    data = state["technical_data"].get("volume", {})
-    visual = state["technical_data"].get("visuals", {})
+    technical = await run_data.get(state["data_ref"], "technical")
+    data = technical.get("volume", {})
+    visual = technical.get("visuals", {})
     input_data = {
         **data ,
         **visual
     }
+    report = _rule_report("volume_agent", volume_rule_report, data, visual)
+    if report is not None:
+        logger.info("✅ Volume Analysis Completed (rule-based).")
+        return {"volume_report": report}
+
     user_content = (
     "INPUT JSON:\n{input_json}\n\n"
     "Return JSON that matches this schema:\n{schema_json}\n"
@@ -148,13 +194,19 @@ async def volume_agent_node(state: TechnicalState, config: RunnableConfig):
 
 async def sr_agent_node(state: TechnicalState, config: RunnableConfig):
     logger.info("🧱 Starting S/R Analysis Node...")
-    data = state["technical_data"].get("support_resistance", {})
-    visual = state["technical_data"].get("visuals", {})
+    technical = await run_data.get(state["data_ref"], "technical")
+    data = technical.get("support_resistance", {})
+    visual = technical.get("visuals", {})
     input_data = {
         **data ,
         **visual
     }
 
+    report = _rule_report("sr_agent", sr_rule_report, data, visual)
+    if report is not None:
+        logger.info("✅ S/R Analysis Completed (rule-based).")
+        return {"sr_report": report}
+
     user_content = (
     "INPUT JSON:\n{input_json}\n\n"
     "Return JSON that matches this schema:\n{schema_json}\n"
@@ -178,7 +230,13 @@ async def sr_agent_node(state: TechnicalState, config: RunnableConfig):
 
 async def smart_money_agent_node(state: TechnicalState, config: RunnableConfig):
     logger.info("🏦 Starting Smart Money Analysis Node...")
-    input_data = state["technical_data"].get("smart_money", {})
+    technical = await run_data.get(state["data_ref"], "technical")
+    input_data = technical.get("smart_money", {})
+    report = _rule_report("smart_money_agent", smart_money_rule_report, input_data)
+    if report is not None:
+        logger.info("✅ Smart Money Analysis Completed (rule-based).")
+        return {"smart_money_report": report}
+
     user_content = (
     "INPUT JSON:\n{input_json}\n\n"
     "Return JSON that matches this schema:\n{schema_json}\n"
@@ -244,15 +302,20 @@ async def technical_consensus_node(state: TechnicalState, config: RunnableConfig
         "smart_money_data": json.dumps(x.get("smart_money_report", {}), ensure_ascii=False, default=str)
     })
 
-    prompt_value = (to_prompt_vars | consensus_prompt).invoke(state)
-    result, meta = await _invoke_structured_with_recovery(
-        llm,
-        prompt_value,
-        TechnicalConsensus,
-        node_name="technical_consensus",
-        session_id=get_session_id(config),
+    async def _run_consensus(inputs):
+        prompt_value = (to_prompt_vars | consensus_prompt).invoke(inputs)
+        return await _invoke_structured_with_recovery(
+            llm,
+            prompt_value,
+            TechnicalConsensus,
+            node_name="technical_consensus",
+            session_id=get_session_id(config),
+        )
+
+    result, meta, late_reports = await speculative_consensus(
+        state, config, required_keys, _run_consensus, verdict_key="technical_consensus_report"
     )
-    response = {"technical_consensus_report": result}
+    response = {"technical_consensus_report": result, **late_reports}
     if meta:
         response["technical_consensus_meta"] = meta
     
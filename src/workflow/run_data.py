@@ -0,0 +1,53 @@
+import hashlib
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.core.cache import TTLCache
+from src.core.config import settings
+from src.core.logger import logger
+from src.core.single_flight import SingleFlight
+
+# Slices of a run's inputs, each read by one part of the graph.
+RUN_DATA_SLICES = ("technical", "price_history", "fundamental", "news_social")
+
+
+def run_data_ref(summary: Dict[str, Any]) -> str:
+    """`<summary _id>@<version>`: changes whenever any section of the summary is refreshed."""
+    version = repr(sorted((summary.get("section_updated_at") or {}).items())) + str(summary.get("analysis_datetime"))
+    return f"{summary['_id']}@{hashlib.sha1(version.encode('utf-8')).hexdigest()[:12]}"
+
+
+class RunDataCache:
+    """
+    Read-only inputs of graph runs, addressed by the `data_ref` handle kept in state.
+
+    State (and with it every checkpoint) carries only the handle; nodes resolve the slice
+    they read from this cache. Runs of the same symbol version share one entry. If the
+    entry was evicted, or the run resumed on another worker, `loader` rebuilds the inputs
+    from the summary document in Mongo.
+    """
+    def __init__(self, loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]]):
+        self._loader = loader
+        self._cache = TTLCache(max_size=settings.run_data_cache_max_size, ttl_seconds=settings.run_data_cache_ttl_seconds)
+        self._flight = SingleFlight("run data")
+
+    def put(self, ref: str, inputs: Dict[str, Any]) -> str:
+        self._cache.set(ref, inputs)
+        return ref
+
+    async def _reload(self, ref: str) -> Dict[str, Any]:
+        doc_id = ref.rsplit("@", 1)[0]
+        logger.info(f"📦 Run data for '{ref}' not cached; rebuilding it from MongoDB.")
+        inputs = await self._loader(doc_id)
+        if not inputs:
+            raise RuntimeError(f"No stored analysis data found for run data '{ref}'.")
+        if inputs["data_ref"] != ref:
+            logger.warning(f"⚠️ '{ref}' was refreshed since the run started; using version '{inputs['data_ref']}'.")
+        self._cache.set(ref, inputs)
+        return inputs
+
+    async def get(self, ref: str, slice_name: str) -> Any:
+        """One slice of the run's inputs. Values are shared, so callers must not mutate them."""
+        inputs = self._cache.get(ref)
+        if inputs is None:
+            inputs = await self._flight.do(ref, lambda: self._reload(ref))
+        return inputs[slice_name]
@@ -0,0 +1,262 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+
+from src.core.config import settings
+from src.core.logger import logger
+from src.utils.helper import get_session_id
+
+MISSING_INPUT_STATUS = "missing_input"
+
+# Report fields that carry a directional verdict, used to decide whether a late input
+# materially disagrees with a consensus that was produced without it.
+DIRECTION_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "trend_report": ("trend_summary", "direction"),
+    "volume_report": ("volume_summary", "flow_bias"),
+    "sr_report": ("sr_summary", "status"),
+    "smart_money_report": ("signal",),
+    "balance_sheet_report": ("balance_sheet_signal",),
+    "earnings_quality_report": ("earnings_signal",),
+    "valuation_report": ("valuation_signal",),
+    "twitter_report": ("weighted_sentiment_score",),
+    "sahamyab_report": ("retail_sentiment_score",),
+    "news_report": ("news_sentiment_score",),
+    "technical_consensus_report": ("signal_bias",),
+    "fundamental_consensus_report": ("investment_bias",),
+    "social_news_consensus_report": ("information_bias",),
+}
+
+BULLISH_LABELS = {
+    "bullish", "bullish_bias", "buy", "strong_buy", "strong buy", "accumulation",
+    "undervalued", "robust", "high quality",
+}
+BEARISH_LABELS = {
+    "bearish", "bearish_bias", "sell", "strong_sell", "strong sell", "distribution",
+    "overvalued", "distressed", "strained", "low quality",
+}
+
+# Late inputs without a directional verdict are merged into the speculative result
+# instead of triggering a re-run: report_key -> (consensus field, late report field).
+INCREMENTAL_FIELDS: Dict[str, Tuple[str, str]] = {
+    "codal_report": ("strategic_outlook", "summary"),
+}
+
+
+def missing_input_marker(report_key: str, timeout: float) -> Dict[str, Any]:
+    """Explicit placeholder written to state when a branch misses its straggler timeout."""
+    return {
+        "status": MISSING_INPUT_STATUS,
+        "input": report_key,
+        "reason": f"No result within the {timeout:.0f}s straggler timeout; treat this input as unavailable.",
+    }
+
+
+def is_missing_input(value: Any) -> bool:
+    return isinstance(value, dict) and value.get("status") == MISSING_INPUT_STATUS
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, dict):
+        return value
+    return {}
+
+
+def report_direction(report_key: Optional[str], value: Any) -> Optional[str]:
+    """Returns 'bullish', 'bearish', 'neutral' or None when the report carries no verdict."""
+    path = DIRECTION_FIELDS.get(report_key or "")
+    if not path or is_missing_input(value):
+        return None
+
+    current: Any = _as_dict(value)
+    for part in path:
+        if not isinstance(current, dict):
+            return None
+        current = current.get(part)
+
+    if isinstance(current, (int, float)) and not isinstance(current, bool):
+        if current > 0.2:
+            return "bullish"
+        if current < -0.2:
+            return "bearish"
+        return "neutral"
+    if isinstance(current, str):
+        label = current.strip().lower()
+        if label in BULLISH_LABELS:
+            return "bullish"
+        if label in BEARISH_LABELS:
+            return "bearish"
+        return "neutral"
+    return None
+
+
+def is_material_change(report_key: str, late_value: Any, verdict: Optional[str]) -> bool:
+    """A late input is material when it has a directional view that the verdict does not share."""
+    late_direction = report_direction(report_key, late_value)
+    if late_direction in (None, "neutral"):
+        return False
+    return late_direction != verdict
+
+
+def merge_late_inputs(result: Any, late: Dict[str, Any]) -> Any:
+    """Folds non-material late inputs into the speculative result without another LLM call."""
+    if not isinstance(result, BaseModel):
+        return result
+
+    updates = {}
+    for report_key, value in late.items():
+        target = INCREMENTAL_FIELDS.get(report_key)
+        if not target:
+            continue
+        consensus_field, report_field = target
+        text = _as_dict(value).get(report_field)
+        if text and consensus_field in type(result).model_fields:
+            updates[consensus_field] = text
+    return result.model_copy(update=updates) if updates else result
+
+
+class LateInputRegistry:
+    """
+    Tracks straggler tasks that kept running after their branch timed out,
+    keyed by (session_id, report_key), so the consensus can pick them up later.
+    """
+    def __init__(self):
+        self._pending: Dict[Tuple[Optional[str], str], asyncio.Task] = {}
+
+    def register(self, session_id: Optional[str], report_key: str, task: asyncio.Task) -> None:
+        self._pending[(session_id, report_key)] = task
+
+    @staticmethod
+    def _extract(report_key: str, task: asyncio.Task) -> Any:
+        if task.cancelled():
+            return None
+        exc = task.exception()
+        if exc:
+            logger.warning(f"⚠️ Late input '{report_key}' failed: {exc}")
+            return None
+        output = task.result()
+        return output.get(report_key) if isinstance(output, dict) else None
+
+    def take_ready(self, session_id: Optional[str], report_keys: List[str]) -> Dict[str, Any]:
+        """Pops stragglers that already finished, leaving the rest pending."""
+        arrived = {}
+        for key in report_keys:
+            task = self._pending.get((session_id, key))
+            if task is None or not task.done():
+                continue
+            del self._pending[(session_id, key)]
+            value = self._extract(key, task)
+            if value:
+                arrived[key] = value
+        return arrived
+
+    async def collect(self, session_id: Optional[str], report_keys: List[str], grace_seconds: float) -> Dict[str, Any]:
+        """Waits up to ``grace_seconds`` for stragglers, then cancels whatever is still running."""
+        tasks = {
+            key: self._pending.pop((session_id, key))
+            for key in report_keys
+            if (session_id, key) in self._pending
+        }
+        if not tasks:
+            return {}
+
+        pending = [task for task in tasks.values() if not task.done()]
+        if pending and grace_seconds > 0:
+            await asyncio.wait(pending, timeout=grace_seconds)
+
+        arrived = {}
+        for key, task in tasks.items():
+            if not task.done():
+                logger.info(f"✂️ Dropping straggler '{key}' for session {session_id}; finalizing without it.")
+                task.cancel()
+                continue
+            value = self._extract(key, task)
+            if value:
+                arrived[key] = value
+        return arrived
+
+
+late_inputs = LateInputRegistry()
+
+
+def speculative_node(node_name: str, node: Any, report_key: str) -> Any:
+    """
+    Wraps a branch (node function or compiled subgraph) with its straggler timeout.
+    Returns the branch unchanged unless speculative mode is on and a timeout is configured.
+    On timeout the branch keeps running in the background and a missing-input marker is
+    written under ``report_key`` so the downstream consensus can start.
+    """
+    timeout = settings.speculative_straggler_timeouts.get(node_name)
+    if not settings.speculative_consensus_enabled or not timeout:
+        return node
+
+    async def _run(state: Dict[str, Any], config: RunnableConfig):
+        if hasattr(node, "ainvoke"):
+            task = asyncio.create_task(node.ainvoke(state, config))
+        else:
+            task = asyncio.create_task(node(state, config))
+
+        done, _ = await asyncio.wait({task}, timeout=timeout)
+        if done:
+            return task.result()
+
+        logger.warning(f"🐢 '{node_name}' exceeded its {timeout:.0f}s straggler timeout; continuing speculatively.")
+        late_inputs.register(get_session_id(config), report_key, task)
+        return {report_key: missing_input_marker(report_key, timeout)}
+
+    _run.__name__ = node_name
+    return _run
+
+
+async def speculative_consensus(
+    state: Dict[str, Any],
+    config: Optional[RunnableConfig],
+    required_keys: List[str],
+    run_consensus: Callable[[Dict[str, Any]], Awaitable[Tuple[Any, Optional[Dict[str, Any]]]]],
+    verdict_key: Optional[str] = None,
+) -> Tuple[Any, Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Runs ``run_consensus`` on the inputs that have arrived and reconciles stragglers.
+
+    Without missing-input markers this is a plain call. Otherwise stragglers that finished
+    in the meantime are used directly, the rest are awaited for the configured grace period
+    after the speculative call; a late input that flips the verdict triggers exactly one
+    re-run, anything else is merged in place. Prompts keep a fixed section order so the
+    re-run shares its prefix (system prompt + arrived inputs) with the speculative call.
+
+    Returns (result, meta, late_reports) where late_reports should be written back to state.
+    """
+    missing = [key for key in required_keys if is_missing_input(state.get(key))]
+    if not missing:
+        result, meta = await run_consensus(state)
+        return result, meta, {}
+
+    session_id = get_session_id(config)
+    late = late_inputs.take_ready(session_id, missing)
+    inputs = {**state, **late}
+    still_missing = [key for key in missing if key not in late]
+    logger.info(f"⚡ Speculative consensus starting without: {still_missing}")
+
+    result, meta = await run_consensus(inputs)
+    speculative_meta: Dict[str, Any] = {"speculative": True, "missing_inputs": still_missing, "action": "final"}
+
+    if still_missing:
+        arrived = await late_inputs.collect(session_id, still_missing, settings.speculative_late_input_grace_seconds)
+        if arrived:
+            late.update(arrived)
+            verdict = report_direction(verdict_key, result)
+            material = [key for key, value in arrived.items() if is_material_change(key, value, verdict)]
+            if material:
+                logger.info(f"🔁 Late inputs {material} change the verdict; re-running consensus.")
+                result, meta = await run_consensus({**inputs, **arrived})
+                speculative_meta["action"] = "rerun"
+            else:
+                result = merge_late_inputs(result, arrived)
+                speculative_meta["action"] = "merged"
+            speculative_meta["missing_inputs"] = [key for key in still_missing if key not in arrived]
+
+    speculative_meta["late_inputs"] = list(late)
+    return result, {**(meta or {}), **speculative_meta}, late
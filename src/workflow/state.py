@@ -33,7 +33,7 @@ def update_latest(old, new):
 class TechnicalState(TypedDict):
     symbol: str
     visual_data: Dict[str, Any]
-    technical_data: Dict[str, Any]
+    data_ref: str
     
     trend_report: TrendAgentOutput
     oscillator_report: OscillatorAgentOutput
@@ -45,7 +45,7 @@ class TechnicalState(TypedDict):
 
 class FundamentalState(TypedDict):
     symbol: str
-    fundamental_data: Dict[str, Any]
+    data_ref: str
     
     # Outputs
     balance_sheet_report: BalanceSheetOutput
@@ -56,7 +56,7 @@ class FundamentalState(TypedDict):
 
 class NewsSocialState(TypedDict):
     symbol: str
-    news_social_data: Dict[str, Any]
+    data_ref: str
     
     # Outputs
     twitter_report: SocialSentimentOutput
@@ -73,12 +73,9 @@ class AgentState(TypedDict):
     time_consumption_seconds: float
     time_consumption_display: str
     messages: list[Any]
-    price_history: list[Dict[str, Any]]
     
-    # Inputs
-    technical_data: Dict[str, Any]
-    fundamental_data: Dict[str, Any]
-    news_social_data: Dict[str, Any]
+    # Inputs: handle into run_data (technical, price_history, fundamental and news_social slices)
+    data_ref: str
     
     # Technical Outputs
     trend_report: TrendAgentOutput